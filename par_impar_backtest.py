@@ -0,0 +1,299 @@
+"""
+Backtest vetorizado (NumPy) da estratégia Par/Ímpar sobre ticks gravados.
+
+Mesma regra do TradingEngine:
+- sinal quando todos os dígitos da cotação formatada (pip_size) têm a mesma paridade
+- SEQUENCIA entra na paridade do sinal, REVERSAO na oposta
+- martingale com max_gale / mult e stakes arredondados por round2
+- modo virtual: sinais em DEMO até vwin_target/vloss_target, então UM sinal em REAL
+
+Modelo de execução (offline):
+- contrato de 1 tick liquida no dígito do tick settle_offset à frente do sinal;
+  cada gale entra após a liquidação anterior
+- um sinal por símbolo por vez (sinais durante um gale em andamento são ignorados)
+- lucro de contrato ganho = round2(stake * payout)
+
+Uso:
+    python par_impar_backtest.py R_10.csv R_25.csv --stake 1 --gale 2 --mult 2.2
+    python par_impar_backtest.py ticks/*/R_10.bin ticks/*/R_25.bin --gale 2
+"""
+import argparse
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from par_impar_money import round2
+from par_impar_recorder import open_ticks
+
+
+@dataclass
+class TickSeries:
+    symbol: str
+    epochs: np.ndarray      # int64
+    quotes: np.ndarray      # float64
+    pip_sizes: np.ndarray   # int, um por tick (normalmente constante por símbolo)
+
+
+@dataclass
+class PreparedSeries:
+    """
+    Série decodificada uma vez e reutilizada por todos os conjuntos de parâmetros.
+    """
+    symbol: str
+    epochs: np.ndarray
+    last_digit: np.ndarray  # int8
+    uniform: np.ndarray     # int8: 1 = PAR, -1 = IMPAR, 0 = sem sinal
+
+
+@dataclass
+class BacktestParams:
+    stake: float = 1.0
+    max_gale: int = 0
+    mult: float = 2.0
+    trigger_mode: str = "SEQUENCIA"
+    virtual_mode: bool = False
+    vwin_target: int = 0
+    vloss_target: int = 0
+    payout: float = 0.95
+    settle_offset: int = 1
+
+
+@dataclass
+class BacktestResult:
+    params: BacktestParams
+    profit: float
+    max_drawdown: float
+    hit_rate: float
+    signals: int        # sinais detectados (todas as contas, antes do filtro de ocupado)
+    sequences: int      # sequências executadas em REAL
+    wins: int
+    losses: int
+    demo_sequences: int
+
+
+def load_ticks_csv(path: str, symbol: str | None = None) -> TickSeries:
+    """
+    CSV sem cabeçalho: epoch,quote[,pip_size]. Sem pip_size assume 2 (igual ao engine).
+    O símbolo padrão é o nome do arquivo (R_10.csv -> R_10).
+    """
+    data = np.loadtxt(path, delimiter=",", ndmin=2)
+    if symbol is None:
+        symbol = os.path.splitext(os.path.basename(path))[0]
+    pips = data[:, 2].astype(np.int64) if data.shape[1] > 2 else np.full(len(data), 2, dtype=np.int64)
+    return TickSeries(symbol, data[:, 0].astype(np.int64), data[:, 1].astype(np.float64), pips)
+
+
+def load_ticks_recorded(paths, symbol: str) -> TickSeries:
+    """
+    Arquivos .bin do gravador (um por dia, em ordem); um único arquivo fica em mmap sem cópia.
+    """
+    recs = [open_ticks(p) for p in paths]
+    rec = recs[0] if len(recs) == 1 else np.concatenate(recs)
+    return TickSeries(symbol, rec["epoch"].astype(np.int64), rec["quote"], rec["pip_size"])
+
+
+def load_ticks_files(paths) -> list[TickSeries]:
+    """
+    Agrupa por símbolo (nome do arquivo) e carrega CSV ou .bin gravado.
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+
+    out = []
+    for symbol, group in groups.items():
+        if all(p.endswith(".bin") for p in group):
+            out.append(load_ticks_recorded(sorted(group), symbol))
+        else:
+            for p in group:
+                out.append(load_ticks_csv(p, symbol))
+    return out
+
+
+def _scaled_quotes(quotes: np.ndarray, pip: int) -> np.ndarray:
+    """
+    |quote| * 10**pip arredondado exatamente como f"{quote:.{pip}f}".
+    Casos perto do empate (ou grandes demais para o float) caem na formatação do Python.
+    """
+    scaled = np.abs(quotes) * (10.0 ** pip)
+    n = np.rint(scaled)
+    frac = scaled - np.floor(scaled)
+    ambiguous = (np.abs(frac - 0.5) <= 4 * np.spacing(scaled)) | (scaled >= 2.0 ** 52)
+    n = n.astype(np.int64)
+    for i in np.flatnonzero(ambiguous):
+        n[i] = int(f"{abs(float(quotes[i])):.{pip}f}".replace(".", ""))
+    return n
+
+
+def decode_parity(quotes: np.ndarray, pip_sizes: np.ndarray):
+    """
+    Versão vetorizada de TickDecoder.decode: retorna (last_digit, uniform).
+    """
+    last_digit = np.zeros(len(quotes), dtype=np.int8)
+    uniform = np.zeros(len(quotes), dtype=np.int8)
+
+    for pip in np.unique(pip_sizes):
+        pip = int(pip)
+        sel = np.flatnonzero(pip_sizes == pip)
+        rem = _scaled_quotes(quotes[sel], pip)
+        last_digit[sel] = rem % 10
+
+        all_even = np.ones(len(sel), dtype=bool)
+        all_odd = np.ones(len(sel), dtype=bool)
+        pos = 0
+        while True:
+            # até o ponto decimal os dígitos sempre existem ("0.005" tem 4 dígitos)
+            active = (rem > 0) | (pos < pip + 1)
+            if not active.any():
+                break
+            odd = (rem % 10) & 1 == 1
+            all_even &= ~(active & odd)
+            all_odd &= ~(active & ~odd)
+            rem //= 10
+            pos += 1
+
+        uniform[sel] = np.where(all_even, 1, np.where(all_odd, -1, 0))
+
+    return last_digit, uniform
+
+
+def prepare(series: TickSeries) -> PreparedSeries:
+    last_digit, uniform = decode_parity(series.quotes, series.pip_sizes)
+    return PreparedSeries(series.symbol, series.epochs, last_digit, uniform)
+
+
+def _gale_ladder(params: BacktestParams):
+    """
+    Stakes de cada passo e resultado total da sequência se ganhar no passo k / perder tudo.
+    """
+    stakes = [round2(params.stake)]
+    for _ in range(params.max_gale):
+        stakes.append(round2(stakes[-1] * params.mult))
+    win_total = []
+    spent = 0.0
+    for s in stakes:
+        win_total.append(round2(round2(s * params.payout) - spent))
+        spent = round2(spent + s)
+    return np.array(stakes), np.array(win_total), -spent
+
+
+def _symbol_sequences(prep: PreparedSeries, params: BacktestParams, win_total, loss_total):
+    """
+    Sequências executadas num símbolo: (epoch de início, lucro, ganhou?) já com o filtro
+    de um sinal por vez. Tudo vetorizado exceto o salto entre sequências ocupadas.
+    """
+    n = len(prep.uniform)
+    off = int(params.settle_offset)
+    steps = params.max_gale + 1
+
+    sig = np.flatnonzero(prep.uniform != 0)
+    sig = sig[sig + steps * off < n]  # ladder completo precisa caber nos dados
+    detected = len(sig)
+
+    direction_even = prep.uniform[sig] == 1
+    if params.trigger_mode != "SEQUENCIA":
+        direction_even = ~direction_even
+
+    idx = sig[:, None] + off * np.arange(1, steps + 1)[None, :]
+    outcome_even = prep.last_digit[idx] % 2 == 0
+    win = outcome_even == direction_even[:, None]
+    any_win = win.any(axis=1)
+    first = np.argmax(win, axis=1)
+    used = np.where(any_win, first, params.max_gale)
+    end = sig + (used + 1) * off
+    profit = np.where(any_win, win_total[first], loss_total)
+
+    chosen = []
+    j = 0
+    while j < len(sig):
+        chosen.append(j)
+        j = int(np.searchsorted(sig, end[j], side="right"))
+    chosen = np.asarray(chosen, dtype=np.int64)
+
+    return prep.epochs[sig[chosen]], profit[chosen], any_win[chosen], detected
+
+
+def run_backtest(prepared: list[PreparedSeries], params: BacktestParams) -> BacktestResult:
+    stakes, win_total, loss_total = _gale_ladder(params)
+
+    parts = [_symbol_sequences(p, params, win_total, loss_total) for p in prepared]
+    detected = sum(p[3] for p in parts)
+    if parts:
+        starts = np.concatenate([p[0] for p in parts])
+        profits = np.concatenate([p[1] for p in parts])
+        wins = np.concatenate([p[2] for p in parts])
+        order = np.argsort(starts, kind="stable")
+        profits, wins = profits[order], wins[order]
+    else:
+        profits = np.zeros(0)
+        wins = np.zeros(0, dtype=bool)
+
+    if params.virtual_mode:
+        is_real = np.zeros(len(profits), dtype=bool)
+        armed = False
+        vwin = vloss = 0
+        for i in range(len(profits)):
+            if armed:
+                # o gatilho vale para UM sinal; ao fechar, a contagem volta do zero
+                is_real[i] = True
+                armed = False
+                vwin = vloss = 0
+                continue
+            if wins[i]:
+                vwin += 1
+                vloss = 0
+            else:
+                vloss += 1
+                vwin = 0
+            if (params.vwin_target > 0 and vwin >= params.vwin_target) or \
+                    (params.vloss_target > 0 and vloss >= params.vloss_target):
+                armed = True
+    else:
+        is_real = np.ones(len(profits), dtype=bool)
+
+    real_profits = profits[is_real]
+    real_wins = int(wins[is_real].sum())
+    equity = np.cumsum(real_profits)
+    peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+    max_dd = float((peak - equity).max()) if len(equity) else 0.0
+    n_real = len(real_profits)
+
+    return BacktestResult(
+        params=params,
+        profit=round2(float(real_profits.sum())),
+        max_drawdown=round2(max_dd),
+        hit_rate=(real_wins / n_real) if n_real else 0.0,
+        signals=int(detected),
+        sequences=n_real,
+        wins=real_wins,
+        losses=n_real - real_wins,
+        demo_sequences=int(len(profits) - n_real),
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backtest Par/Ímpar sobre ticks gravados.")
+    ap.add_argument("files", nargs="+", help="CSV epoch,quote[,pip_size] ou .bin do gravador, por símbolo")
+    ap.add_argument("--stake", type=float, default=1.0)
+    ap.add_argument("--gale", type=int, default=0)
+    ap.add_argument("--mult", type=float, default=2.0)
+    ap.add_argument("--mode", choices=["SEQUENCIA", "REVERSAO"], default="SEQUENCIA")
+    ap.add_argument("--virtual", action="store_true")
+    ap.add_argument("--vwin", type=int, default=0)
+    ap.add_argument("--vloss", type=int, default=0)
+    ap.add_argument("--payout", type=float, default=0.95)
+    args = ap.parse_args()
+
+    prepared = [prepare(series) for series in load_ticks_files(args.files)]
+    params = BacktestParams(
+        stake=args.stake, max_gale=args.gale, mult=args.mult, trigger_mode=args.mode,
+        virtual_mode=args.virtual, vwin_target=args.vwin, vloss_target=args.vloss, payout=args.payout,
+    )
+    r = run_backtest(prepared, params)
+    print(f"P/L={r.profit:.2f} drawdown={r.max_drawdown:.2f} acerto={r.hit_rate:.1%} "
+          f"sinais={r.signals} seq_real={r.sequences} (W={r.wins} L={r.losses}) seq_demo={r.demo_sequences}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,859 +4,158 @@ import os
 import queue
 import threading
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from decimal import Decimal, ROUND_HALF_UP
+from collections import deque
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
 
-import websockets
-
-APP_ID = 122601
-DERIV_WS_URL = f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}"
-
-ALLOWED_SYMBOLS = [
-    "R_10", "R_25", "R_50", "R_75", "R_100",
-    "1HZ10V", "1HZ25V", "1HZ50V", "1HZ75V", "1HZ100V","RDBULL","RDBEAR"
-]
-
-CURRENCY = "USD"
-CONFIG_FILE = "par_impar_config.json"
-
-
-def utc_ts():
-    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-
-
-def round2(x: float) -> float:
-    d = Decimal(str(x)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    return float(d)
-
-
-def digits_parity_map(price_str: str):
-    digits = [ch for ch in price_str if ch.isdigit()]
-    if not digits:
-        return [], None, None
-    parities = []
-    for ch in digits:
-        n = int(ch)
-        parities.append("P" if (n % 2 == 0) else "I")
-    last_digit = int(digits[-1])
-    last_parity = "PAR" if (last_digit % 2 == 0) else "IMPAR"
-    return parities, last_digit, last_parity
-
-
-def all_same_parity(parities):
-    if not parities:
-        return None
-    if all(p == "P" for p in parities):
-        return "PAR"
-    if all(p == "I" for p in parities):
-        return "IMPAR"
-    return None
-
-
-@dataclass
-class SignalPlan:
-    symbol: str
-    direction: str  # "PAR" ou "IMPAR"
-    account: str    # "DEMO" ou "REAL"
-    base_stake: float
-    max_gale: int
-    mult: float
-
-
-class DerivWSClient:
+from par_impar_engine import (
+    ALLOWED_SYMBOLS,
+    CONFIG_FILE,
+    CURRENCY,
+    DEFAULT_MAX_EXPOSURE,
+    DEFAULT_MAX_PER_ACCOUNT,
+    DEFAULT_MAX_PER_SYMBOL,
+    DEFAULT_PUBLIC_CONNECTIONS,
+    DEFAULT_QUEUE_MAX,
+    DEFAULT_QUEUE_POLICY,
+    DEFAULT_SIGNAL_MAX_AGE,
+    JOURNAL_FILE,
+    UNIFORM_FILTER_WINDOW,
+    TradingEngine,
+    engine_kwargs_from_config,
+    load_config,
+    utc_ts,
+)
+from par_impar_journal import JournalView
+from par_impar_stats import STATS_WINDOWS
+
+UI_FRAME_MS = 60         # intervalo do pump de eventos da UI
+UI_FRAME_BUDGET = 0.030  # tempo máximo (s) drenando a fila por frame; o resto fica para o próximo
+UI_MAX_BATCH = 5000      # eventos no máximo por frame
+# eventos de estado: só o mais recente de cada frame importa
+UI_LATEST_ONLY = ("ui_balance", "ui_pl", "ui_virtual_state", "ui_sched", "ui_shards", "ui_metrics", "ui_ops", "ui_lanes", "ui_stats",
+                  "ui_rules")
+LOGS_DIR = "logs"        # histórico completo dos logs da UI (um arquivo por canal)
+UI_LOG_CAPACITY = 2000   # linhas mantidas em cada aba de log
+UI_LOG_PAGE = 500        # linhas trazidas por "Carregar anteriores"
+UI_OPS_ROWS = 16         # linhas visíveis da tabela de operações (janela lida do diário)
+
+
+class LogView(ttk.Frame):
     """
-    Cliente WS robusto:
-    - connect_forever mantém conexão viva e chama callbacks
-    - request() espera resposta (req_id)
-    - send_only() envia sem esperar ack (ideal para subscribe que às vezes não responde)
+    Aba de log limitada: o widget guarda no máximo `capacity` linhas vivas (as mais antigas
+    saem a cada append) e tudo vai para <LOGS_DIR>/<canal>.log.
+    "Carregar anteriores" lê o arquivo de trás para frente, uma página por clique; as páginas
+    carregadas ficam acima da cauda viva (o corte só mexe na cauda) até o usuário rolar de
+    volta ao fim, quando saem e a aba volta a seguir o fim.
     """
-    def __init__(self, url: str, name: str, ui_queue: queue.Queue):
-        self.url = url
-        self.name = name
-        self.ui_queue = ui_queue
-
-        self.ws = None
-        self.req_id = 0
-        self.pending = {}
-
-        self._lock = None
-        self._send_lock = None
-        self._connected = None
-
-        self.stop_flag = False
-        self.on_message_callbacks = []
-        self.on_disconnect_callbacks = []
-
-    def add_message_callback(self, cb):
-        self.on_message_callbacks.append(cb)
-
-    def add_disconnect_callback(self, cb):
-        self.on_disconnect_callbacks.append(cb)
-
-    def _ensure_async_primitives(self):
-        if self._lock is None:
-            self._lock = asyncio.Lock()
-        if self._send_lock is None:
-            self._send_lock = asyncio.Lock()
-        if self._connected is None:
-            self._connected = asyncio.Event()
-
-    def _ui_log(self, text: str):
-        self.ui_queue.put(("log_general", f"{utc_ts()} | {text}"))
-
-    def _clear_connection_state(self):
-        try:
-            if self._connected is not None:
-                self._connected.clear()
-        except Exception:
-            pass
-        self.ws = None
-
-        # quebra futures pendentes
-        if self.pending:
-            for rid, fut in list(self.pending.items()):
-                try:
-                    if not fut.done():
-                        fut.set_exception(ConnectionError(f"[{self.name}] conexão caiu (req_id={rid})"))
-                except Exception:
-                    pass
-            self.pending.clear()
-
-    async def close(self):
-        try:
-            if self.ws is not None:
-                await self.ws.close()
-        except Exception:
-            pass
-        self._clear_connection_state()
-
-    def stop(self):
-        self.stop_flag = True
-        self._clear_connection_state()
-
-    async def connect_forever(self):
-        self._ensure_async_primitives()
-        backoff = 1.0
-        while not self.stop_flag:
-            try:
-                async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as ws:
-                    if self.stop_flag:
-                        try:
-                            await ws.close()
-                        except Exception:
-                            pass
-                        break
-
-                    self.ws = ws
-                    self._connected.set()
-                    self._ui_log(f"[{self.name}] Conectado.")
-                    backoff = 1.0
-
-                    async for msg in ws:
-                        if self.stop_flag:
-                            break
-
-                        data = json.loads(msg)
-
-                        rid = data.get("req_id")
-                        if rid is not None and rid in self.pending:
-                            fut = self.pending.pop(rid)
-                            if not fut.done():
-                                fut.set_result(data)
-
-                        for cb in self.on_message_callbacks:
-                            try:
-                                cb(data)
-                            except Exception as e:
-                                self._ui_log(f"[{self.name}] Erro callback: {e}")
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self._clear_connection_state()
-
-                for cb in self.on_disconnect_callbacks:
-                    try:
-                        cb(self.name, e)
-                    except Exception:
-                        pass
-
-                if self.stop_flag:
-                    break
-
-                self._ui_log(f"[{self.name}] Reconectando... ({e})")
-                await asyncio.sleep(backoff)
-                backoff = min(backoff * 1.7, 20.0)
-
-        self._clear_connection_state()
-
-    async def _wait_connected_and_open(self, deadline_ts: float):
-        self._ensure_async_primitives()
-        while True:
-            remaining = deadline_ts - time.time()
-            if remaining <= 0:
-                raise TimeoutError(f"[{self.name}] timeout aguardando conexão")
-
-            if not self._connected.is_set():
-                try:
-                    await asyncio.wait_for(self._connected.wait(), timeout=remaining)
-                except Exception:
-                    continue
-
-            ws = self.ws
-            if ws is None or getattr(ws, "closed", False):
-                self._clear_connection_state()
-                await asyncio.sleep(0.05)
-                continue
-            return ws
-
-    async def send_only(self, payload: dict, timeout=25):
-        """
-        Envia sem esperar resposta. Útil para subscribe de ticks.
-        """
-        deadline = time.time() + float(timeout)
-        async with self._send_lock:
-            ws = await self._wait_connected_and_open(deadline)
-            try:
-                await ws.send(json.dumps(payload))
-            except Exception:
-                self._clear_connection_state()
-                # tenta uma vez mais dentro do deadline
-                ws = await self._wait_connected_and_open(deadline)
-                await ws.send(json.dumps(payload))
-
-    async def request(self, payload: dict, timeout=25):
-
-        self._ensure_async_primitives()
-        deadline = time.time() + float(timeout)
-
-        async with self._lock:
-            while True:
-                remaining = deadline - time.time()
-                if remaining <= 0:
-                    raise TimeoutError(f"[{self.name}] timeout total aguardando conexão/resposta")
-
-                ws = await self._wait_connected_and_open(deadline)
-
-                self.req_id += 1
-                rid = self.req_id
-                payload["req_id"] = rid
-
-                loop = asyncio.get_running_loop()
-                fut = loop.create_future()
-                self.pending[rid] = fut
-
-                try:
-                    await ws.send(json.dumps(payload))
-                except Exception:
-                    self.pending.pop(rid, None)
-                    self._clear_connection_state()
-                    await asyncio.sleep(0.15)
-                    continue
-
-                remaining = deadline - time.time()
-                if remaining <= 0:
-                    self.pending.pop(rid, None)
-                    raise TimeoutError(f"[{self.name}] timeout total aguardando resposta")
-
-                try:
-                    resp = await asyncio.wait_for(fut, timeout=remaining)
-                    return resp
-                except Exception:
-                    self.pending.pop(rid, None)
-                    self._clear_connection_state()
-                    await asyncio.sleep(0.15)
-                    continue
-
-
-class TradingEngine:
-    def __init__(self, ui_queue: queue.Queue):
-        self.ui_queue = ui_queue
-
-        self.public = None
-        self.demo = None
-        self.real = None
-
-        self.running = False
-        self.loop = None
-
-        # tokens (persistidos)
-        self._last_demo_token = ""
-        self._last_real_token = ""
-
-        # config
-        self.virtual_mode = False
-        self.vwin_target = 0
-        self.vloss_target = 0
-        self.vwin_streak = 0
-        self.vloss_streak = 0
-        self._armed_real_next = False
-
-        self.trigger_mode = "SEQUENCIA"
-        self.stake = 1.0
-        self.max_gale = 0
-        self.mult = 2.0
-        self.stop_win = 0.0
-
-        self.busy_trade = False
-
-        # real stats
-        self.real_balance = None
-        self.real_balance_start = None
-        self.real_wins = 0
-        self.real_losses = 0
-        self.real_profit = 0.0
-
-        # subs/seen
-        self._tick_subscribed = set()
-        self._tick_seen_events = {}
-        self._balance_subscribed = False
-        self._balance_seen = asyncio.Event() if asyncio.get_event_loop_policy() else None  # placeholder
-
-        # restart control
-        self._restart_in_progress = False
-        self._last_restart_ts = 0.0
-        self._stopping = False
-
-        # tasks
-        self._connect_tasks = []
-
-        self._create_clients()
-
-    def _create_clients(self):
-        self.public = DerivWSClient(DERIV_WS_URL, "PUBLIC", self.ui_queue)
-        self.demo = DerivWSClient(DERIV_WS_URL, "DEMO", self.ui_queue)
-        self.real = DerivWSClient(DERIV_WS_URL, "REAL", self.ui_queue)
-
-        self.public.add_message_callback(self._on_public_msg)
-        self.real.add_message_callback(self._on_real_msg)
-
-        self.public.add_disconnect_callback(self._on_any_disconnect)
-        self.demo.add_disconnect_callback(self._on_any_disconnect)
-        self.real.add_disconnect_callback(self._on_any_disconnect)
-
-    def ui(self, channel, msg):
-        self.ui_queue.put((channel, msg))
-
-    def log_market_exec(self, symbol: str, line: str):
-        self.ui("log_market_exec", {"symbol": symbol, "line": line})
-
-    def set_config(
-        self,
-        *,
-        virtual_mode,
-        vwin_target,
-        vloss_target,
-        trigger_mode,
-        stake,
-        max_gale,
-        mult,
-        stop_win,
-    ):
-        self.virtual_mode = bool(virtual_mode)
-        self.vwin_target = int(vwin_target)
-        self.vloss_target = int(vloss_target)
-        self.trigger_mode = trigger_mode
-        self.stake = float(stake)
-        self.max_gale = int(max_gale)
-        self.mult = float(mult)
-        self.stop_win = float(stop_win)
-
-        if not self.virtual_mode:
-            self.vwin_streak = 0
-            self.vloss_streak = 0
-            self._armed_real_next = False
-            self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
-
-    async def authorize(self, client: DerivWSClient, token: str, label: str):
-        if not token.strip():
-            self.ui("log_general", f"{utc_ts()} | [{label}] Token vazio (não autorizado).")
-            return False
-        resp = await client.request({"authorize": token.strip()}, timeout=45)
-        if resp.get("error"):
-            self.ui("log_general", f"{utc_ts()} | [{label}] ERRO authorize: {resp['error'].get('message')}")
-            return False
-        self.ui("log_general", f"{utc_ts()} | [{label}] Autorizado.")
-        return True
-
-    async def _subscribe_ticks_robust(self):
-        """
-        ✅ NOVO: subscribe robusto baseado em "primeiro tick recebido"
-        - não depende de ack/req_id do subscribe
-        - evita timeout do PUBLIC que você mostrou no log
-        """
-        # cria events por símbolo
-        for sym in ALLOWED_SYMBOLS:
-            if sym not in self._tick_seen_events:
-                self._tick_seen_events[sym] = asyncio.Event()
-
-        # 1) envia subscribe para todos (sem esperar ack)
-        for sym in ALLOWED_SYMBOLS:
-            if sym in self._tick_subscribed:
-                continue
-            await self.public.send_only({"ticks": sym, "subscribe": 1}, timeout=35)
-
-        # 2) espera ticks aparecerem (janela única)
-        t0 = time.time()
-        window = 25.0
-        while time.time() - t0 < window:
-            ok = True
-            for sym in ALLOWED_SYMBOLS:
-                if sym in self._tick_subscribed:
-                    continue
-                if self._tick_seen_events[sym].is_set():
-                    self._tick_subscribed.add(sym)
-                else:
-                    ok = False
-            if ok:
-                break
-            await asyncio.sleep(0.2)
-
-        # 3) retry nos que faltaram
-        missing = [s for s in ALLOWED_SYMBOLS if s not in self._tick_subscribed]
-        if missing:
-            self.ui("log_general", f"{utc_ts()} | [PUBLIC] Retry subscribe ticks (faltando {len(missing)}).")
-            for sym in missing:
-                # limpa evento e reenvia
-                try:
-                    self._tick_seen_events[sym].clear()
-                except Exception:
-                    self._tick_seen_events[sym] = asyncio.Event()
-                await self.public.send_only({"ticks": sym, "subscribe": 1}, timeout=35)
-
-            t1 = time.time()
-            while time.time() - t1 < 20.0:
-                for sym in list(missing):
-                    if self._tick_seen_events[sym].is_set():
-                        self._tick_subscribed.add(sym)
-                        missing.remove(sym)
-                if not missing:
-                    break
-                await asyncio.sleep(0.2)
-
-        self.ui("log_general", f"{utc_ts()} | [PUBLIC] Ticks ativos ({len(self._tick_subscribed)}/{len(ALLOWED_SYMBOLS)}).")
-        # se mesmo assim faltou, não derruba o engine — ele segue com os que chegaram
-        if len(self._tick_subscribed) == 0:
-            raise TimeoutError("[PUBLIC] Nenhum tick chegou após subscribe (rede instável).")
-
-    async def _subscribe_real_balance(self):
-        if self._balance_subscribed:
-            return
-        resp = await self.real.request({"balance": 1, "subscribe": 1}, timeout=45)
-        if resp.get("error"):
-            self.ui("log_general", f"{utc_ts()} | [REAL] ERRO balance: {resp['error'].get('message')}")
-            return
-        self._balance_subscribed = True
-        self.ui("log_general", f"{utc_ts()} | [REAL] Balance subscribe ok.")
-
-    async def _start_internal(self):
-        self._connect_tasks = [
-            asyncio.create_task(self.public.connect_forever()),
-            asyncio.create_task(self.demo.connect_forever()),
-            asyncio.create_task(self.real.connect_forever()),
-        ]
-
-        # tempo para estabilizar
-        await asyncio.sleep(1.0)
-
-        ok_demo = await self.authorize(self.demo, self._last_demo_token, "DEMO")
-        ok_real = await self.authorize(self.real, self._last_real_token, "REAL")
-
-        if self.virtual_mode and not ok_demo:
-            self.ui("log_general", f"{utc_ts()} | [ENGINE] Modo virtual ligado mas DEMO não autorizou (token/instabilidade).")
-        if not ok_real:
-            self.ui("log_general", f"{utc_ts()} | [ENGINE] REAL não autorizou (saldo/real pode falhar).")
-
-        # ✅ aqui era o problema (PUBLIC request timeout). Agora é robusto por tick.
-        await self._subscribe_ticks_robust()
-
-        if ok_real:
-            await self._subscribe_real_balance()
-
-        self.ui("log_general", f"{utc_ts()} | [ENGINE] Rodando.")
-
-    async def start(self, demo_token: str, real_token: str):
-        if self.running:
-            return
-
-        self.running = True
-        self._last_demo_token = demo_token or ""
-        self._last_real_token = real_token or ""
-
+    def __init__(self, parent, channel: str, capacity=UI_LOG_CAPACITY, page=UI_LOG_PAGE):
+        super().__init__(parent)
+        self.capacity = int(capacity)
+        self.page = int(page)
+        self.path = os.path.join(LOGS_DIR, f"{channel}.log")
+        self._spool = None
+        self._offsets = deque()  # offset no arquivo de cada linha viva (None = não gravada)
+        self._older = deque()    # offsets das linhas carregadas por "Carregar anteriores" (no topo)
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x")
+        ttk.Button(bar, text="Carregar anteriores", command=self.load_older).pack(side="left", padx=4, pady=2)
+
+        self.text = ScrolledText(self, height=18)
+        self.text.pack(fill="both", expand=True)
+
+    def _spool_file(self):
+        if self._spool is None:
+            os.makedirs(LOGS_DIR, exist_ok=True)
+            self._spool = open(self.path, "ab")
+        return self._spool
+
+    def append(self, lines):
+        follow = not self._older or self.text.yview()[1] >= 0.999
         try:
-            await self._start_internal()
-        except Exception as e:
-            self.ui("log_general", f"{utc_ts()} | [ENGINE] ERRO no start: {repr(e)}")
-            await self._reboot_all(reason=f"start falhou: {repr(e)}")
-
-    async def stop(self):
-        if self._stopping:
+            f = self._spool_file()
+            pos = f.tell()
+            data = bytearray()
+            for line in lines:
+                self._offsets.append(pos + len(data))
+                data += line.encode("utf-8", "replace") + b"\n"
+            f.write(data)
+            f.flush()
+        except OSError:
+            self._offsets.extend([None] * len(lines))
+
+        self.text.insert("end", "\n".join(lines) + "\n")
+        if self._older and follow:
+            # voltou ao fim: as páginas antigas saem
+            self.text.delete("1.0", f"{len(self._older) + 1}.0")
+            self._older.clear()
+        excess = len(self._offsets) - self.capacity
+        if excess > 0:
+            # corta só a cauda viva, logo abaixo das páginas carregadas
+            first = len(self._older) + 1
+            self.text.delete(f"{first}.0", f"{first + excess}.0")
+            for _ in range(excess):
+                self._offsets.popleft()
+        if follow:
+            self.text.see("end")
+
+    def load_older(self):
+        shown = self._older or self._offsets
+        top = shown[0] if shown else None
+        if top is None:
+            if shown or not os.path.exists(self.path):
+                return
+            top = os.path.getsize(self.path)
+        if top <= 0:
             return
-        self._stopping = True
-        try:
-            self.running = False
-
-            if self.public:
-                self.public.stop()
-            if self.demo:
-                self.demo.stop()
-            if self.real:
-                self.real.stop()
-
-            try:
-                await asyncio.gather(
-                    self.public.close(),
-                    self.demo.close(),
-                    self.real.close(),
-                    return_exceptions=True,
-                )
-            except Exception:
-                pass
-
-            for t in self._connect_tasks:
-                try:
-                    t.cancel()
-                except Exception:
-                    pass
-            if self._connect_tasks:
-                try:
-                    await asyncio.gather(*self._connect_tasks, return_exceptions=True)
-                except Exception:
-                    pass
-            self._connect_tasks = []
-
-            self.ui("log_general", f"{utc_ts()} | [ENGINE] Parado.")
-        finally:
-            self._stopping = False
-
-    def reset_counters_and_views(self):
-        self.real_wins = 0
-        self.real_losses = 0
-        self.real_profit = 0.0
-        self.real_balance_start = None
-
-        self.vwin_streak = 0
-        self.vloss_streak = 0
-        self._armed_real_next = False
-
-        self.ui("ui_pl", {
-            "wins": 0, "losses": 0, "profit": 0.0,
-            "balance": self.real_balance,
-            "start": self.real_balance_start,
-        })
-        self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
-        self.ui("ui_reset_views", {"ok": True})
 
-    async def _reboot_all(self, reason: str):
-        if self._restart_in_progress:
+        # lê blocos para trás até ter uma página de linhas inteiras
+        chunk = 64 * 1024
+        start = top
+        data = b""
+        with open(self.path, "rb") as f:
+            while start > 0 and data.count(b"\n") <= self.page:
+                step = min(chunk, start)
+                start -= step
+                f.seek(start)
+                data = f.read(step) + data
+        raw = data[:top - start].split(b"\n")
+        if raw and raw[-1] == b"":
+            raw.pop()
+        if start > 0:
+            # a primeira linha do bloco pode estar cortada
+            start += len(raw[0]) + 1
+            raw = raw[1:]
+        raw = raw[-self.page:]
+        if not raw:
             return
-        self._restart_in_progress = True
-        try:
-            self.ui("log_general", f"{utc_ts()} | [REBOOT] {reason}")
-            self.ui("log_general", f"{utc_ts()} | [REBOOT] Fechando e abrindo novamente (limpo)...")
-
-            self.reset_counters_and_views()
-
-            await self.stop()
-
-            # limpa estado interno
-            self.busy_trade = False
-            self._tick_subscribed = set()
-            self._tick_seen_events = {}
-            self._balance_subscribed = False
-            self.real_balance = None
-            self.real_balance_start = None
-
-            # recria clientes do zero
-            self._create_clients()
-
-            # reinicia
-            self.running = True
-            await self._start_internal()
 
-        except Exception as e:
-            self.ui("log_general", f"{utc_ts()} | [REBOOT] Falha: {repr(e)}")
-            self.running = False
-        finally:
-            self._restart_in_progress = False
-
-    def _on_any_disconnect(self, who: str, exc: Exception):
-        if not self.running:
-            return
-        if self._stopping or self._restart_in_progress:
-            return
-        now = time.time()
-        if now - self._last_restart_ts < 2.0:
-            return
-        self._last_restart_ts = now
-        try:
-            asyncio.create_task(self._reboot_all(reason=f"{who} caiu: {exc}"))
-        except Exception:
-            pass
+        offsets = []
+        pos = top
+        for line in reversed(raw):
+            pos -= len(line) + 1
+            offsets.append(pos)
+        offsets.reverse()
 
-    def _on_real_msg(self, data):
-        if data.get("msg_type") == "balance":
-            bal = data.get("balance", {}).get("balance")
-            if bal is not None:
-                try:
-                    bal = float(bal)
-                    self.real_balance = bal
-                    if self.real_balance_start is None:
-                        self.real_balance_start = bal
-                    self.ui("ui_balance", {"balance": bal, "start": self.real_balance_start})
-                except Exception:
-                    pass
-
-    def _format_quote(self, quote: float, pip_size: int | None):
-        if pip_size is None:
-            return f"{quote:.2f}"
-        fmt = f"{{:.{pip_size}f}}"
-        return fmt.format(quote)
-
-    def _on_public_msg(self, data):
-        if not self.running:
-            return
-        if data.get("msg_type") != "tick":
-            return
+        self.text.insert("1.0", "\n".join(line.decode("utf-8", "replace") for line in raw) + "\n")
+        self._older.extendleft(reversed(offsets))
+        self.text.see("1.0")
 
-        tick = data.get("tick", {})
-        symbol = tick.get("symbol")
-        quote = tick.get("quote")
-        pip_size = tick.get("pip_size")
+    def clear(self):
+        self.text.delete("1.0", "end")
+        self._offsets.clear()
+        self._older.clear()
 
-        if symbol in self._tick_seen_events:
-            # ✅ marca que o símbolo está vivo (resolve subscribe sem ack)
+    def close(self):
+        if self._spool is not None:
             try:
-                self._tick_seen_events[symbol].set()
-            except Exception:
+                self._spool.close()
+            except OSError:
                 pass
-
-        if symbol not in ALLOWED_SYMBOLS or quote is None:
-            return
-
-        try:
-            pip_size_int = int(pip_size) if pip_size is not None else None
-        except Exception:
-            pip_size_int = None
-
-        price_str = self._format_quote(float(quote), pip_size_int)
-
-        parities, last_digit, last_parity = digits_parity_map(price_str)
-        seq_str = "/".join(parities) if parities else "-"
-        self.ui("log_market", {"symbol": symbol, "line": f"{utc_ts()} | {price_str} ----> {seq_str} - digito {last_digit} - {last_parity}"})
-
-        uniform = all_same_parity(parities)
-        if uniform is None:
-            return
-
-        if self.trigger_mode == "SEQUENCIA":
-            direction = uniform
-        else:
-            direction = "IMPAR" if uniform == "PAR" else "PAR"
-
-        if self.busy_trade:
-            return
-        self.busy_trade = True
-
-        if self.virtual_mode:
-            account = "REAL" if self._armed_real_next else "DEMO"
-        else:
-            account = "REAL"
-
-        plan = SignalPlan(
-            symbol=symbol,
-            direction=direction,
-            account=account,
-            base_stake=float(self.stake),
-            max_gale=int(self.max_gale),
-            mult=float(self.mult),
-        )
-
-        asyncio.create_task(self._execute_signal(plan))
-
-    async def _proposal(self, client: DerivWSClient, symbol: str, direction: str, stake: float):
-        contract_type = "DIGITEVEN" if direction == "PAR" else "DIGITODD"
-        payload = {
-            "proposal": 1,
-            "amount": stake,
-            "basis": "stake",
-            "contract_type": contract_type,
-            "currency": CURRENCY,
-            "duration": 1,
-            "duration_unit": "t",
-            "symbol": symbol,
-        }
-        resp = await client.request(payload, timeout=45)
-        if resp.get("error"):
-            return None, resp["error"].get("message")
-        pid = resp.get("proposal", {}).get("id")
-        if not pid:
-            return None, "Proposal sem id"
-        return pid, None
-
-    async def _buy_and_wait(self, client: DerivWSClient, proposal_id: str, stake: float):
-        buy_resp = await client.request({"buy": proposal_id, "price": stake}, timeout=45)
-        if buy_resp.get("error"):
-            return None, None, buy_resp["error"].get("message")
-
-        buy = buy_resp.get("buy", {})
-        contract_id = buy.get("contract_id")
-        if not contract_id:
-            return None, None, "Buy sem contract_id"
-
-        deadline = time.time() + 35
-        while time.time() < deadline:
-            msg = await client.request({"proposal_open_contract": 1, "contract_id": contract_id}, timeout=45)
-            if msg.get("error"):
-                return contract_id, None, msg["error"].get("message")
-            poc = msg.get("proposal_open_contract", {})
-            if poc.get("is_sold"):
-                profit = float(poc.get("profit", 0.0) or 0.0)
-                status = poc.get("status")  # won/lost
-                return contract_id, {"status": status, "profit": profit}, None
-            await asyncio.sleep(0.12)
-
-        return contract_id, None, "Timeout aguardando resultado"
-
-    def _growth_value(self):
-        if self.real_balance is not None and self.real_balance_start is not None:
-            return float(self.real_balance - self.real_balance_start)
-        return None
-
-    async def _check_stop_win_and_maybe_stop(self):
-        if not self.running:
-            return
-        if self.stop_win <= 0:
-            return
-
-        growth = self._growth_value()
-        metric = growth if growth is not None else float(self.real_profit)
-        if metric >= float(self.stop_win):
-            self.ui("log_general", f"{utc_ts()} | [STOP WIN] Alvo atingido: {metric:.2f} >= {self.stop_win:.2f}. Parando engine.")
-            await self.stop()
-
-    async def _execute_signal(self, plan: SignalPlan):
-        try:
-            if not self.running:
-                return
-
-            client = self.real if plan.account == "REAL" else self.demo
-
-            signal_id = f"{int(time.time()*1000)}"
-            open_line = f"{utc_ts()} | EXEC OPEN | {plan.account} | {plan.symbol} | {plan.direction} | stake={round2(plan.base_stake):.2f} | gale_max={plan.max_gale} | mult={plan.mult}"
-            self.log_market_exec(plan.symbol, open_line)
-
-            self.ui("op_add", {
-                "id": signal_id,
-                "time": utc_ts(),
-                "symbol": plan.symbol,
-                "account": plan.account,
-                "direction": plan.direction,
-                "stake": round2(plan.base_stake),
-                "gale": 0,
-                "status": "OPEN",
-                "profit": "",
-            })
-
-            total_profit = 0.0
-            current_stake = round2(plan.base_stake)
-            used_gale = 0
-            final_status = None
-
-            while True:
-                if not self.running:
-                    final_status = "STOP"
-                    break
-
-                pid, perr = await self._proposal(client, plan.symbol, plan.direction, current_stake)
-                if perr:
-                    self.ui("log_general", f"{utc_ts()} | [{plan.account}] PROPOSAL ERRO {plan.symbol}: {perr}")
-                    final_status = "ERROR"
-                    break
-
-                _, result, berr = await self._buy_and_wait(client, pid, current_stake)
-                if berr:
-                    self.ui("log_general", f"{utc_ts()} | [{plan.account}] BUY/WAIT ERRO {plan.symbol}: {berr}")
-                    final_status = "ERROR"
-                    break
-
-                status = result.get("status")
-                profit = float(result.get("profit", 0.0))
-                total_profit += profit
-
-                self.ui("op_update", {
-                    "id": signal_id,
-                    "gale": used_gale,
-                    "status": "WIN" if status == "won" else "LOSS",
-                    "profit": f"{round2(total_profit):.2f}",
-                })
-
-                if status == "won":
-                    final_status = "WIN"
-                    break
-
-                if used_gale >= plan.max_gale:
-                    final_status = "LOSS"
-                    break
-
-                used_gale += 1
-                current_stake = round2(current_stake * plan.mult)
-                self.ui("log_general", f"{utc_ts()} | [{plan.account}] GALE {used_gale}/{plan.max_gale} {plan.symbol} {plan.direction} stake={current_stake:.2f}")
-
-            close_line = f"{utc_ts()} | EXEC CLOSE | {plan.account} | {plan.symbol} | {plan.direction} | result={final_status} | profit_total={round2(total_profit):.2f} | gales_used={used_gale}"
-            self.log_market_exec(plan.symbol, close_line)
-
-            if plan.account == "REAL":
-                if final_status == "WIN":
-                    self.real_wins += 1
-                elif final_status == "LOSS":
-                    self.real_losses += 1
-                self.real_profit = round2(self.real_profit + total_profit)
-                self.ui("ui_pl", {
-                    "wins": self.real_wins,
-                    "losses": self.real_losses,
-                    "profit": self.real_profit,
-                    "balance": self.real_balance,
-                    "start": self.real_balance_start,
-                })
-                await self._check_stop_win_and_maybe_stop()
-
-            if self.virtual_mode and self.running:
-                if plan.account == "DEMO":
-                    if final_status == "WIN":
-                        self.vwin_streak += 1
-                        self.vloss_streak = 0
-                    elif final_status == "LOSS":
-                        self.vloss_streak += 1
-                        self.vwin_streak = 0
-
-                    armed = False
-                    if self.vwin_target > 0 and self.vwin_streak >= self.vwin_target:
-                        armed = True
-                    if self.vloss_target > 0 and self.vloss_streak >= self.vloss_target:
-                        armed = True
-
-                    if armed:
-                        self._armed_real_next = True
-                        self.ui("log_general", f"{utc_ts()} | [VIRTUAL] Gatilho atingido -> PRÓXIMO sinal em REAL.")
-
-                    self.ui("ui_virtual_state", {"vwin": self.vwin_streak, "vloss": self.vloss_streak, "armed": self._armed_real_next})
-                else:
-                    self._armed_real_next = False
-                    self.vwin_streak = 0
-                    self.vloss_streak = 0
-                    self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
-                    self.ui("log_general", f"{utc_ts()} | [VIRTUAL] Sinal REAL finalizado -> volta para DEMO.")
-
-        except Exception as e:
-            self.ui("log_general", f"{utc_ts()} | [ENGINE] Erro execução: {repr(e)}")
-        finally:
-            self.busy_trade = False
+            self._spool = None
 
 
 class App(tk.Tk):
@@ -940,6 +239,18 @@ class App(tk.Tk):
             "gale": self.gale.get().strip(),
             "mult": self.mult.get().strip(),
             "stop_win": self.stop_win.get().strip(),
+            "exec_mode": self.exec_mode.get(),
+            "max_symbol": self.max_symbol.get().strip(),
+            "max_account": self.max_account.get().strip(),
+            "max_exposure": self.max_exposure.get().strip(),
+            "queue_max": self.queue_max.get().strip(),
+            "queue_policy": self.queue_policy.get(),
+            "min_uniform": self.min_uniform.get().strip(),
+            "signal_max_age": self.signal_max_age.get().strip(),
+            "public_connections": self.public_connections.get().strip(),
+            "record_ticks": bool(self.record_ticks.get()),
+            "parse_thread": bool(self.parse_thread.get()),
+            "shm_ring": bool(self.shm_ring.get()),
         }
 
     def _apply_config_to_ui(self, cfg: dict):
@@ -963,23 +274,43 @@ class App(tk.Tk):
         set_entry(self.gale, cfg.get("gale", "0"))
         set_entry(self.mult, cfg.get("mult", "2.0"))
         set_entry(self.stop_win, cfg.get("stop_win", "0"))
+        try:
+            self.exec_mode.set(cfg.get("exec_mode", "DIRETO"))
+        except Exception:
+            pass
+        set_entry(self.max_symbol, cfg.get("max_symbol", str(DEFAULT_MAX_PER_SYMBOL)))
+        set_entry(self.max_account, cfg.get("max_account", str(DEFAULT_MAX_PER_ACCOUNT)))
+        set_entry(self.max_exposure, cfg.get("max_exposure", f"{DEFAULT_MAX_EXPOSURE:g}"))
+        set_entry(self.queue_max, cfg.get("queue_max", str(DEFAULT_QUEUE_MAX)))
+        set_entry(self.min_uniform, cfg.get("min_uniform", "0"))
+        set_entry(self.signal_max_age, cfg.get("signal_max_age", f"{DEFAULT_SIGNAL_MAX_AGE:g}"))
+        try:
+            self.queue_policy.set(cfg.get("queue_policy", DEFAULT_QUEUE_POLICY))
+        except Exception:
+            pass
+        set_entry(self.public_connections, cfg.get("public_connections", str(DEFAULT_PUBLIC_CONNECTIONS)))
+        self.record_ticks.set(bool(cfg.get("record_ticks", False)))
+        self.parse_thread.set(bool(cfg.get("parse_thread", False)))
+        self.shm_ring.set(bool(cfg.get("shm_ring", False)))
+
+    def _file_config(self) -> dict:
+        """
+        Config da UI sobre a do arquivo: chaves só do arquivo ("rules", "strategies") são mantidas.
+        """
+        return {**load_config(CONFIG_FILE), **self._collect_config_from_ui()}
 
     def _save_config(self):
         try:
-            cfg = self._collect_config_from_ui()
+            cfg = self._file_config()
             with open(CONFIG_FILE, "w", encoding="utf-8") as f:
                 json.dump(cfg, f, ensure_ascii=False, indent=2)
         except Exception:
             pass
 
     def _load_config_into_ui(self):
-        try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    cfg = json.load(f)
-                self._apply_config_to_ui(cfg)
-        except Exception:
-            pass
+        cfg = load_config(CONFIG_FILE)
+        if cfg:
+            self._apply_config_to_ui(cfg)
 
     # ---------- UI ----------
     def _build_ui(self):
@@ -1031,8 +362,60 @@ class App(tk.Tk):
         self.stop_win.insert(0, "0")
         self.stop_win.grid(row=3, column=1, sticky="w", padx=6, pady=4)
 
+        ttk.Label(cfg, text="Execução:").grid(row=3, column=2, sticky="w", padx=10, pady=4)
+        self.exec_mode = tk.StringVar(value="DIRETO")
+        ttk.OptionMenu(cfg, self.exec_mode, "DIRETO", "DIRETO", "PROPOSTA").grid(row=3, column=3, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Fila de sinais (0 desativa):").grid(row=3, column=4, sticky="w", padx=10, pady=4)
+        self.queue_max = ttk.Entry(cfg, width=8)
+        self.queue_max.insert(0, str(DEFAULT_QUEUE_MAX))
+        self.queue_max.grid(row=3, column=5, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Simultâneos/símbolo:").grid(row=4, column=0, sticky="w", padx=6, pady=4)
+        self.max_symbol = ttk.Entry(cfg, width=10)
+        self.max_symbol.insert(0, str(DEFAULT_MAX_PER_SYMBOL))
+        self.max_symbol.grid(row=4, column=1, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Simultâneos/conta:").grid(row=4, column=2, sticky="w", padx=10, pady=4)
+        self.max_account = ttk.Entry(cfg, width=8)
+        self.max_account.insert(0, str(DEFAULT_MAX_PER_ACCOUNT))
+        self.max_account.grid(row=4, column=3, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Exposição máx (0 desativa):").grid(row=4, column=4, sticky="w", padx=10, pady=4)
+        self.max_exposure = ttk.Entry(cfg, width=8)
+        self.max_exposure.insert(0, f"{DEFAULT_MAX_EXPOSURE:g}")
+        self.max_exposure.grid(row=4, column=5, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Política da fila:").grid(row=5, column=0, sticky="w", padx=6, pady=4)
+        self.queue_policy = tk.StringVar(value=DEFAULT_QUEUE_POLICY)
+        ttk.OptionMenu(cfg, self.queue_policy, DEFAULT_QUEUE_POLICY, "COALESCER", "FIFO").grid(row=5, column=1, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Conexões PUBLIC:").grid(row=5, column=2, sticky="w", padx=10, pady=4)
+        self.public_connections = ttk.Entry(cfg, width=8)
+        self.public_connections.insert(0, str(DEFAULT_PUBLIC_CONNECTIONS))
+        self.public_connections.grid(row=5, column=3, sticky="w", padx=6, pady=4)
+
+        self.record_ticks = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cfg, text="Gravar ticks", variable=self.record_ticks).grid(row=5, column=4, sticky="w", padx=10, pady=4)
+
+        self.parse_thread = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cfg, text="Parser em thread", variable=self.parse_thread).grid(row=5, column=5, sticky="w", padx=10, pady=4)
+
+        self.shm_ring = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cfg, text="Ticks em memória compartilhada", variable=self.shm_ring).grid(row=5, column=6, sticky="w", padx=10, pady=4)
+
+        ttk.Label(cfg, text=f"Uniforme mín % ({UNIFORM_FILTER_WINDOW} ticks, 0 desativa):").grid(row=6, column=0, sticky="w", padx=6, pady=4)
+        self.min_uniform = ttk.Entry(cfg, width=10)
+        self.min_uniform.insert(0, "0")
+        self.min_uniform.grid(row=6, column=1, sticky="w", padx=6, pady=4)
+
+        ttk.Label(cfg, text="Idade máx na fila (s):").grid(row=6, column=2, sticky="w", padx=10, pady=4)
+        self.signal_max_age = ttk.Entry(cfg, width=8)
+        self.signal_max_age.insert(0, f"{DEFAULT_SIGNAL_MAX_AGE:g}")
+        self.signal_max_age.grid(row=6, column=3, sticky="w", padx=6, pady=4)
+
         btns = ttk.Frame(cfg)
-        btns.grid(row=4, column=0, columnspan=6, sticky="w", padx=6, pady=8)
+        btns.grid(row=7, column=0, columnspan=6, sticky="w", padx=6, pady=8)
 
         ttk.Button(btns, text="Iniciar", command=self.on_start).pack(side="left", padx=5)
         ttk.Button(btns, text="Parar", command=self.on_stop).pack(side="left", padx=5)
@@ -1056,38 +439,200 @@ class App(tk.Tk):
         self.lbl_virtual = ttk.Label(status, text="Virtual streak (DEMO): W=0 L=0 | armado REAL: não")
         self.lbl_virtual.grid(row=1, column=0, columnspan=4, sticky="w", padx=6, pady=4)
 
+        self.lbl_sched = ttk.Label(status, text="Sinais abertos: 0 | stake aberto: 0.00 | fila: 0 | descartados: 0 | coalescidos: 0 | filtrados: 0")
+        self.lbl_sched.grid(row=2, column=0, columnspan=4, sticky="w", padx=6, pady=4)
+
+        self.lbl_shards = ttk.Label(status, text="PUBLIC: --")
+        self.lbl_shards.grid(row=3, column=0, columnspan=4, sticky="w", padx=6, pady=4)
+
+        self.lbl_ui = ttk.Label(status, text="UI: backlog 0 | frame 0ms")
+        self.lbl_ui.grid(row=4, column=0, columnspan=4, sticky="w", padx=6, pady=4)
+
+        self.lbl_lanes = ttk.Label(status, text="Lanes: --")
+        self.lbl_lanes.grid(row=5, column=0, columnspan=4, sticky="w", padx=6, pady=4)
+
         self.nb = ttk.Notebook(self.root_frame)
         self.nb.pack(fill="both", expand=True, padx=10, pady=10)
 
         self.tab_ops = ttk.Frame(self.nb)
         self.nb.add(self.tab_ops, text="Operações")
 
+        # tabela virtualizada: só UI_OPS_ROWS linhas existem no Treeview, a janela vem do diário
+        self.ops_view = JournalView(JOURNAL_FILE)
+        self._ops_offset = 0
+        self._ops_total = 0
+        self._ops_follow = True  # na última página: acompanha novas operações
+
+        ops_bar = ttk.Frame(self.tab_ops)
+        ops_bar.pack(side="top", fill="x")
+        self.ops_filter = {}
+        for col, label, values in (
+            ("symbol", "Símbolo:", ["TODOS", *ALLOWED_SYMBOLS]),
+            ("account", "Conta:", ["TODAS", "DEMO", "REAL"]),
+            ("status", "Status:", ["TODOS", "OPEN", "WIN", "LOSS", "ERROR", "STOP"]),
+        ):
+            ttk.Label(ops_bar, text=label).pack(side="left", padx=(6, 2), pady=2)
+            var = tk.StringVar(value=values[0])
+            box = ttk.Combobox(ops_bar, textvariable=var, values=values, width=9, state="readonly")
+            box.pack(side="left", padx=(0, 6), pady=2)
+            box.bind("<<ComboboxSelected>>", lambda _e: self._ops_apply_filters())
+            self.ops_filter[col] = var
+        self.lbl_ops_total = ttk.Label(ops_bar, text="0 operações")
+        self.lbl_ops_total.pack(side="left", padx=10)
+
         cols = ("time", "symbol", "account", "direction", "stake", "gale", "status", "profit")
-        self.ops_tree = ttk.Treeview(self.tab_ops, columns=cols, show="headings", height=16)
+        self.ops_tree = ttk.Treeview(self.tab_ops, columns=cols, show="headings", height=UI_OPS_ROWS)
         for c in cols:
             self.ops_tree.heading(c, text=c.upper())
             self.ops_tree.column(c, width=130 if c in ("time", "symbol") else 110, anchor="w")
         self.ops_tree.column("profit", width=120, anchor="e")
         self.ops_tree.pack(side="left", fill="both", expand=True)
 
-        ops_scroll = ttk.Scrollbar(self.tab_ops, orient="vertical", command=self.ops_tree.yview)
-        self.ops_tree.configure(yscrollcommand=ops_scroll.set)
-        ops_scroll.pack(side="right", fill="y")
+        self.ops_scroll = ttk.Scrollbar(self.tab_ops, orient="vertical", command=self._ops_on_scroll)
+        self.ops_scroll.pack(side="right", fill="y")
+
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.ops_tree.bind(seq, self._ops_on_wheel)
+        self.ops_tree.bind("<Double-1>", self._ops_show_steps)
 
         self.tab_log = ttk.Frame(self.nb)
         self.nb.add(self.tab_log, text="Logs Geral")
-        self.txt_log = ScrolledText(self.tab_log, height=18)
+        self.txt_log = LogView(self.tab_log, "geral")
         self.txt_log.pack(fill="both", expand=True)
 
+        self.tab_metrics = ttk.Frame(self.nb)
+        self.nb.add(self.tab_metrics, text="Métricas")
+
+        mcols = ("stage", "key", "n", "mean", "p50", "p90", "p99", "max")
+        mhead = {"stage": "ETAPA", "key": "CHAVE", "n": "N", "mean": "MÉDIA ms",
+                 "p50": "P50 ms", "p90": "P90 ms", "p99": "P99 ms", "max": "MAX ms"}
+        self.metrics_tree = ttk.Treeview(self.tab_metrics, columns=mcols, show="headings", height=16)
+        for c in mcols:
+            self.metrics_tree.heading(c, text=mhead[c])
+            self.metrics_tree.column(c, width=150 if c in ("stage", "key") else 90, anchor="w" if c in ("stage", "key") else "e")
+        self.metrics_tree.pack(side="left", fill="both", expand=True)
+
+        metrics_scroll = ttk.Scrollbar(self.tab_metrics, orient="vertical", command=self.metrics_tree.yview)
+        self.metrics_tree.configure(yscrollcommand=metrics_scroll.set)
+        metrics_scroll.pack(side="right", fill="y")
+
+        self.tab_stats = ttk.Frame(self.nb)
+        self.nb.add(self.tab_stats, text="Estatísticas")
+
+        scols = ("symbol", "n", *(f"par{w}" for w in STATS_WINDOWS), *(f"unif{w}" for w in STATS_WINDOWS),
+                 "run", "max_run", "win_rate", "wl")
+        shead = {"symbol": "SÍMBOLO", "n": "TICKS", "run": "SEQUÊNCIA", "max_run": "SEQ MÁX",
+                 "win_rate": "ACERTO %", "wl": "W/L"}
+        shead.update({f"par{w}": f"PAR% {w}" for w in STATS_WINDOWS})
+        shead.update({f"unif{w}": f"UNIF% {w}" for w in STATS_WINDOWS})
+        self.stats_tree = ttk.Treeview(self.tab_stats, columns=scols, show="headings", height=12)
+        for c in scols:
+            self.stats_tree.heading(c, text=shead[c])
+            self.stats_tree.column(c, width=110 if c in ("symbol", "run", "win_rate") else 80, anchor="w" if c == "symbol" else "e")
+        for sym in ALLOWED_SYMBOLS:
+            self.stats_tree.insert("", "end", iid=sym, values=(sym,))
+        self.stats_tree.pack(fill="both", expand=True)
+
+        rcols = ("name", "hits", "rate", "signals")
+        rhead = {"name": "REGRA", "hits": "CASOU", "rate": "CASOU/TICK %", "signals": "SINAIS"}
+        self.rules_tree = ttk.Treeview(self.tab_stats, columns=rcols, show="headings", height=4)
+        for c in rcols:
+            self.rules_tree.heading(c, text=rhead[c])
+            self.rules_tree.column(c, width=260 if c == "name" else 110, anchor="w" if c == "name" else "e")
+        self.rules_tree.pack(fill="x", pady=(6, 0))
+
         self.market_text = {}
+        self._tab_symbol = {}  # id da aba -> símbolo
         for sym in ALLOWED_SYMBOLS:
             t = ttk.Frame(self.nb)
             self.nb.add(t, text=sym)
-            txt = ScrolledText(t, height=18)
+            txt = LogView(t, sym)
             txt.pack(fill="both", expand=True)
             self.market_text[sym] = txt
+            self._tab_symbol[str(t)] = sym
+
+        # só a aba de mercado visível recebe linhas formatadas; o loop ainda não existe aqui
+        self.engine.hub.display_symbols = set()
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+        self._ui_lbl_shown = None
+        self._ops_reload()
+
+    # ---------- tabela de operações (janela sobre o diário) ----------
+    def _ops_reload(self):
+        try:
+            self._ops_total = self.ops_view.count()
+        except Exception:
+            return
+        last = max(0, self._ops_total - UI_OPS_ROWS)
+        if self._ops_follow or self._ops_offset > last:
+            self._ops_offset = last
+
+        if self._ops_offset == last:
+            rows = self.ops_view.tail(UI_OPS_ROWS)
+        else:
+            rows = self.ops_view.page(self._ops_offset, UI_OPS_ROWS)
+        self.ops_tree.delete(*self.ops_tree.get_children())
+        for op_id, t, symbol, account, direction, stake, gale, status, profit in rows:
+            vals = (t, symbol, account, direction, f"{stake:.2f}", str(gale), status,
+                    "" if profit is None else f"{profit:.2f}")
+            self.ops_tree.insert("", "end", iid=op_id, values=vals)
+
+        if self._ops_total:
+            self.ops_scroll.set(self._ops_offset / self._ops_total,
+                                min(1.0, (self._ops_offset + UI_OPS_ROWS) / self._ops_total))
+        else:
+            self.ops_scroll.set(0.0, 1.0)
+        self.lbl_ops_total.config(text=f"{self._ops_total} operações")
+
+    def _ops_scroll_to(self, offset: int):
+        last = max(0, self._ops_total - UI_OPS_ROWS)
+        self._ops_offset = min(max(0, int(offset)), last)
+        self._ops_follow = self._ops_offset >= last
+        self._ops_reload()
+
+    def _ops_on_scroll(self, *args):
+        if args[0] == "moveto":
+            self._ops_scroll_to(float(args[1]) * self._ops_total)
+        elif args[0] == "scroll":
+            step = UI_OPS_ROWS if args[2] == "pages" else 1
+            self._ops_scroll_to(self._ops_offset + int(args[1]) * step)
+
+    def _ops_on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or (event.delta or 0) > 0:
+            self._ops_scroll_to(self._ops_offset - 3)
+        else:
+            self._ops_scroll_to(self._ops_offset + 3)
+        return "break"
+
+    def _ops_apply_filters(self):
+        self.ops_view.set_filters(**{
+            col: (None if var.get() in ("TODOS", "TODAS") else var.get())
+            for col, var in self.ops_filter.items()
+        })
+        self._ops_follow = True
+        self._ops_reload()
+
+    def _ops_show_steps(self, _event):
+        op_id = self.ops_tree.focus()
+        if not op_id:
+            return
+        steps = self.ops_view.steps(op_id)
+        if not steps:
+            return
+        lines = [
+            f"gale {gale}: contrato {cid} | stake {stake:.2f} | {status} | {profit:.2f} | {t}"
+            for gale, cid, stake, status, profit, t in steps
+        ]
+        messagebox.showinfo("Passos da operação", "\n".join(lines))
 
-        self._op_items = {}
+    def _on_tab_changed(self, _event=None):
+        sym = self._tab_symbol.get(self.nb.select())
+        symbols = {sym} if sym else set()
+        if self.engine.loop is not None:
+            self.engine.loop.call_soon_threadsafe(self.engine.hub.set_display_symbols, symbols)
+        else:
+            self.engine.hub.set_display_symbols(symbols)
 
     def _start_async_loop(self):
         self.engine.loop = asyncio.new_event_loop()
@@ -1104,32 +649,14 @@ class App(tk.Tk):
             demo_token = self.demo_token.get()
             real_token = self.real_token.get()
 
-            vm = self.virtual_mode.get()
-            vwin = int((self.vwin.get().strip() or "0"))
-            vloss = int((self.vloss.get().strip() or "0"))
-            trig = self.trigger_mode.get()
-            stake = float(self.stake.get().strip().replace(",", "."))
-            gale = int((self.gale.get().strip() or "0"))
-            mult = float(self.mult.get().strip().replace(",", "."))
-            stop_win = float((self.stop_win.get().strip() or "0").replace(",", "."))
-
-            if stake <= 0:
-                raise ValueError("Stake deve ser > 0")
-            if stop_win < 0:
-                raise ValueError("Stop Win deve ser >= 0")
-
-            self.engine.set_config(
-                virtual_mode=vm,
-                vwin_target=vwin,
-                vloss_target=vloss,
-                trigger_mode=trig,
-                stake=round2(stake),
-                max_gale=gale,
-                mult=mult,
-                stop_win=round2(stop_win),
-            )
+            # valida aqui (erro vira messagebox); aplica no loop, que é quem lê a config
+            kwargs = engine_kwargs_from_config(self._file_config())
+
+            async def _configure_and_start():
+                self.engine.set_config(**kwargs)
+                await self.engine.start(demo_token, real_token)
 
-            fut = asyncio.run_coroutine_threadsafe(self.engine.start(demo_token, real_token), self.engine.loop)
+            fut = asyncio.run_coroutine_threadsafe(_configure_and_start(), self.engine.loop)
 
             def _done(f):
                 try:
@@ -1148,72 +675,86 @@ class App(tk.Tk):
         self._save_config()
 
     def on_reset(self):
-        self.engine.reset_counters_and_views()
+        # estatísticas, histogramas e contadores são mexidos pelo loop: o reset roda lá também
+        if self.engine.loop is not None:
+            self.engine.loop.call_soon_threadsafe(self.engine.reset_counters_and_views)
+        else:
+            self.engine.reset_counters_and_views()
         self._save_config()
 
     def on_close(self):
         try:
             self._save_config()
             self.on_stop()
+            for view in (self.txt_log, *self.market_text.values()):
+                view.close()
+            self.ops_view.close()
+            self.engine.journal.close()
         except Exception:
             pass
         self.destroy()
 
     def _poll_ui_queue(self):
+        """
+        Pump em lote: drena a fila dentro de UI_FRAME_BUDGET e agrupa por widget.
+        - linhas de log viram UM append por LogView (um insert e um see("end"))
+        - eventos de estado (UI_LATEST_ONLY): só o último do frame é aplicado
+        - a tabela de operações relê a janela do diário no máximo uma vez por frame
+        Se sobrar backlog o próximo frame é agendado imediatamente.
+        """
+        t0 = time.perf_counter()
+        lines = {}   # LogView -> [linhas]
+        latest = {}  # kind -> item
+        ordered = []
+        n = 0
         try:
-            while True:
+            while n < UI_MAX_BATCH:
                 item = self.ui_queue.get_nowait()
-                self._handle_ui_event(item)
+                n += 1
+                kind = item[0]
+                if kind == "log_general":
+                    lines.setdefault(self.txt_log, []).append(item[1])
+                elif kind in ("log_market", "log_market_exec"):
+                    txt = self.market_text.get(item[1]["symbol"])
+                    if txt is not None:
+                        lines.setdefault(txt, []).append(item[1]["line"])
+                elif kind == "log_market_tail":
+                    txt = self.market_text.get(item[1]["symbol"])
+                    if txt is not None:
+                        lines.setdefault(txt, []).extend(item[1]["lines"])
+                elif kind in UI_LATEST_ONLY:
+                    latest[kind] = item
+                elif kind == "ui_reset_views":
+                    # o que veio antes do reset seria apagado de qualquer jeito
+                    lines.clear()
+                    ordered = [item]
+                else:
+                    ordered.append(item)
+                if (n & 255) == 0 and time.perf_counter() - t0 > UI_FRAME_BUDGET:
+                    break
         except queue.Empty:
             pass
-        self.after(60, self._poll_ui_queue)
+
+        for item in ordered:
+            self._handle_ui_event(item)
+        for view, batch in lines.items():
+            view.append(batch)
+        for item in latest.values():
+            self._handle_ui_event(item)
+
+        backlog = self.ui_queue.qsize()
+        frame_ms = (time.perf_counter() - t0) * 1000.0
+        shown = (backlog, round(frame_ms / 5) * 5)  # evita reconfigurar o label a cada frame
+        if shown != self._ui_lbl_shown:
+            self._ui_lbl_shown = shown
+            self.lbl_ui.config(text=f"UI: backlog {backlog} | frame {frame_ms:.0f}ms")
+        self.after(1 if backlog else UI_FRAME_MS, self._poll_ui_queue)
 
     def _handle_ui_event(self, item):
         kind = item[0]
 
-        if kind == "log_general":
-            line = item[1]
-            self.txt_log.insert("end", line + "\n")
-            self.txt_log.see("end")
-
-        elif kind == "log_market":
-            payload = item[1]
-            sym = payload["symbol"]
-            line = payload["line"]
-            txt = self.market_text.get(sym)
-            if txt:
-                txt.insert("end", line + "\n")
-                txt.see("end")
-
-        elif kind == "log_market_exec":
-            payload = item[1]
-            sym = payload["symbol"]
-            line = payload["line"]
-            txt = self.market_text.get(sym)
-            if txt:
-                txt.insert("end", line + "\n")
-                txt.see("end")
-
-        elif kind == "op_add":
-            p = item[1]
-            iid = p["id"]
-            vals = (p["time"], p["symbol"], p["account"], p["direction"],
-                    f"{p['stake']:.2f}", str(p["gale"]), p["status"], p["profit"])
-            tree_iid = self.ops_tree.insert("", "end", values=vals)
-            self._op_items[iid] = tree_iid
-            self.ops_tree.yview_moveto(1.0)
-
-        elif kind == "op_update":
-            p = item[1]
-            iid = p["id"]
-            tree_iid = self._op_items.get(iid)
-            if tree_iid:
-                cur = list(self.ops_tree.item(tree_iid, "values"))
-                cur[5] = str(p.get("gale", cur[5]))
-                cur[6] = p.get("status", cur[6])
-                cur[7] = p.get("profit", cur[7])
-                self.ops_tree.item(tree_iid, values=tuple(cur))
-                self.ops_tree.yview_moveto(1.0)
+        if kind == "ui_ops":
+            self._ops_reload()
 
         elif kind == "ui_balance":
             p = item[1]
@@ -1250,13 +791,81 @@ class App(tk.Tk):
             armed = p.get("armed", False)
             self.lbl_virtual.config(text=f"Virtual streak (DEMO): W={vwin} L={vloss} | armado REAL: {'sim' if armed else 'não'}")
 
+        elif kind == "ui_sched":
+            p = item[1]
+            self.lbl_sched.config(
+                text=f"Sinais abertos: {p.get('open', 0)} | stake aberto: {p.get('open_stake', 0.0):.2f} | "
+                     f"fila: {p.get('queued', 0)} | descartados: {p.get('dropped', 0)} | coalescidos: {p.get('coalesced', 0)} | "
+                     f"filtrados: {p.get('filtered', 0)}"
+            )
+
+        elif kind == "ui_shards":
+            parts = [
+                f"{sh['name']}: {'ok' if sh['up'] else 'caiu'} ({sh['symbols']} símb., {sh['drops']} quedas)"
+                for sh in item[1]
+            ]
+            self.lbl_shards.config(text=" | ".join(parts) if parts else "PUBLIC: --")
+
+        elif kind == "ui_metrics":
+            # linhas por (etapa, chave): atualiza no lugar para não perder a rolagem
+            seen = set()
+            for i, r in enumerate(item[1]):
+                iid = f"{r['stage']}|{r['key']}"
+                seen.add(iid)
+                vals = (r["stage"], r["key"], r["n"], f"{r['mean_ms']:.2f}", f"{r['p50_ms']:.2f}",
+                        f"{r['p90_ms']:.2f}", f"{r['p99_ms']:.2f}", f"{r['max_ms']:.2f}")
+                if self.metrics_tree.exists(iid):
+                    self.metrics_tree.item(iid, values=vals)
+                else:
+                    self.metrics_tree.insert("", i, iid=iid, values=vals)
+            for iid in self.metrics_tree.get_children():
+                if iid not in seen:
+                    self.metrics_tree.delete(iid)
+
+        elif kind == "ui_stats":
+            for r in item[1]:
+                if not self.stats_tree.exists(r["symbol"]):
+                    continue
+                rate = r["win_rate"]
+                vals = (
+                    r["symbol"], r["n"],
+                    *(f"{r['even'][w] * 100:.1f}" for w in STATS_WINDOWS),
+                    *(f"{r['uniform'][w] * 100:.1f}" for w in STATS_WINDOWS),
+                    f"{r['run_parity']} x{r['run_len']}" if r["run_parity"] else "-",
+                    r["max_run"],
+                    "-" if rate is None else f"{rate * 100:.1f} ({r['signals']})",
+                    f"{r['wins']}/{r['losses']}",
+                )
+                self.stats_tree.item(r["symbol"], values=vals)
+
+        elif kind == "ui_rules":
+            rows = item[1]
+            if len(self.rules_tree.get_children()) != len(rows):
+                self.rules_tree.delete(*self.rules_tree.get_children())
+                for i in range(len(rows)):
+                    self.rules_tree.insert("", "end", iid=str(i))
+            for i, r in enumerate(rows):
+                rate = r["hits"] / r["ticks"] * 100.0 if r["ticks"] else 0.0
+                self.rules_tree.item(str(i), values=(r["name"], r["hits"], f"{rate:.2f}", r["signals"]))
+
+        elif kind == "ui_lanes":
+            p = item[1]
+            ordem, ticks, saldo = p["ordem"], p["ticks"], p["saldo"]
+            self.lbl_lanes.config(
+                text=f"Lanes: ordem {ordem['n']} | ticks {ticks['n']} (colapsados {ticks['collapsed']}, "
+                     f"prof. máx {ticks['depth_max']}, atraso máx {ticks['lag_max_ms']:.1f}ms) | "
+                     f"saldo {saldo['n']} (coalescidos {saldo['collapsed']})"
+            )
+
         elif kind == "ui_reset_views":
-            self.txt_log.delete("1.0", "end")
+            self.txt_log.clear()
             for txt in self.market_text.values():
-                txt.delete("1.0", "end")
-            for iid in self.ops_tree.get_children():
-                self.ops_tree.delete(iid)
-            self._op_items.clear()
+                txt.clear()
+            # o diário continua inteiro; a tabela passa a mostrar só o que vier depois
+            self.ops_view.floor = self.ops_view.max_n()
+            self._ops_offset = 0
+            self._ops_follow = True
+            self._ops_reload()
 
     def run(self):
         self.mainloop()
@@ -0,0 +1,2108 @@
+"""
+Engine do bot Par/Ímpar sem dependência de UI: cliente WS da Deriv, decoder de ticks,
+scheduler de sinais e execução (martingale / modo virtual).
+
+- MarketDataHub: feed PUBLIC (shards, subscribe, decode único por tick), compartilhável
+- TradingEngine: contas DEMO/REAL, config, scheduler e contadores de UMA estratégia;
+  sem hub passado, cria um só para si
+
+Usado pela janela Tk (par_impar_decoder_gui.py) e pelo modo headless (par_impar_headless.py);
+eventos para quem exibe saem em ui_queue como (canal, payload).
+"""
+import json
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import websockets
+
+# backend JSON do caminho quente (frames do WS): orjson > ujson > stdlib
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        json_dumps = json.dumps
+        JSON_BACKEND = "json"
+
+from par_impar_journal import TradeJournal
+from par_impar_metrics import LatencyMetrics
+from par_impar_money import round2
+from par_impar_recorder import TickRecorder
+from par_impar_rules import RuleSet, default_rules
+from par_impar_shm import RING_NAME, TickRing
+from par_impar_stats import ParityStats, SignalOutcomes
+
+APP_ID = 122601
+# DERIV_WS_URL no ambiente aponta o bot para outro servidor (ex.: par_impar_mock_server.py)
+DERIV_WS_URL = os.environ.get("DERIV_WS_URL") or f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}"
+
+ALLOWED_SYMBOLS = [
+    "R_10", "R_25", "R_50", "R_75", "R_100",
+    "1HZ10V", "1HZ25V", "1HZ50V", "1HZ75V", "1HZ100V","RDBULL","RDBEAR"
+]
+
+CURRENCY = "USD"
+# padrões do scheduler e do feed: set_config, campos da UI e config sem a chave
+DEFAULT_MAX_PER_SYMBOL = 1
+DEFAULT_MAX_PER_ACCOUNT = 1  # uma sequência por conta, como antes do scheduler; concorrência é opt-in
+DEFAULT_MAX_EXPOSURE = 0.0  # stake aberto total (0 desativa)
+DEFAULT_QUEUE_MAX = 12      # 0 = sem fila (descarta quando cheio)
+DEFAULT_QUEUE_POLICY = "COALESCER"
+# sinal na fila mais velho que isso é descartado: o contrato é de 1 tick e o tick seguinte chega
+# em ~1s nos 1HZ (2s nos R_), então o padrão fica abaixo de um intervalo de tick
+DEFAULT_SIGNAL_MAX_AGE = 0.5
+DEFAULT_PUBLIC_CONNECTIONS = 2
+# segundos, contados da resposta, até um proposal id pré-cotado ser descartado. A resposta da
+# proposal não traz validade da cotação, então o prazo é nosso: cobre um passo de gale (contrato
+# de 1 tick liquida em 2-4s) e, se o servidor já tiver invalidado o id, o buy volta erro e
+# _open_contract cai numa proposal nova; o price do buy (= stake) limita o custo de um id velho
+PREQUOTE_TTL = 8.0
+# erros do buy DIRETO em que o servidor recusou a forma com parameters: só nesses vale
+# tentar proposal+buy. ContractCreationFailure fica de fora: a API o usa também para recusas de
+# negócio (mercado fechado, limites de stake, duração indisponível) que falhariam de novo
+DIRETO_FALLBACK_CODES = ("InputValidationFailed",)
+EARLY_SETTLE_MAX = 64     # resultados finais que chegaram antes do waiter (buy ainda em voo)
+EARLY_SETTLE_TTL = 30.0   # segundos até um desses ser descartado
+CONFIG_FILE = "par_impar_config.json"
+TICKS_DIR = "ticks"  # gravação binária dos ticks (par_impar_recorder)
+MARKET_TAIL = 200    # ticks guardados (sem formatar) por símbolo fora de exibição
+PARSE_QUEUE_MAX = 5000  # frames de tick aguardando a thread de parse (cheia -> descarta)
+METRICS_FILE = "par_impar_metrics.json"
+JOURNAL_FILE = "par_impar_journal.sqlite3"  # diário de operações (par_impar_journal)
+METRICS_UI_INTERVAL = 2.0     # segundos entre atualizações da aba Métricas
+METRICS_DUMP_INTERVAL = 30.0  # segundos entre dumps do METRICS_FILE
+UNIFORM_FILTER_WINDOW = 100   # janela (ticks, uma de STATS_WINDOWS) do filtro "uniforme mín %"
+
+
+def utc_ts(ts=None):
+    dt = datetime.now(timezone.utc) if ts is None else datetime.fromtimestamp(ts, timezone.utc)
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def named_path(path: str, name: str) -> str:
+    """
+    Arquivo por engine: par_impar_journal.sqlite3 -> par_impar_journal.<nome>.sqlite3 (sem nome, o próprio path).
+    """
+    if not name:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
+
+
+# tabela de 256 entradas: dígito ASCII -> "P"/"I", qualquer outro caractere é removido
+_PARITY_TABLE = {
+    i: (("P" if (i - 48) % 2 == 0 else "I") if 48 <= i <= 57 else None)
+    for i in range(256)
+}
+
+
+class TickDecoder:
+    """
+    Caminho rápido do tick: formatter em cache por pip_size e paridade via
+    str.translate, sem listas intermediárias. Resultado idêntico ao caminho antigo
+    (formatar + lista de dígitos + all()), conferido em test_par_impar_decoder.py.
+    """
+    def __init__(self):
+        self._formatters = {}
+
+    def formatter(self, pip_size):
+        fmt = self._formatters.get(pip_size)
+        if fmt is None:
+            try:
+                pip = int(pip_size) if pip_size is not None else None
+            except Exception:
+                pip = None
+            fmt = "{:.2f}".format if pip is None else f"{{:.{pip}f}}".format
+            self._formatters[pip_size] = fmt
+        return fmt
+
+    def decode(self, quote, pip_size):
+        """
+        Retorna (price_str, parities, last_digit, uniform):
+        parities é uma string "PIP..." (um caractere por dígito), uniform é "PAR"/"IMPAR"/None.
+        """
+        price_str = self.formatter(pip_size)(float(quote))
+        parities = price_str.translate(_PARITY_TABLE)
+        if not parities:
+            return price_str, parities, None, None
+
+        ch = price_str[-1]
+        if not ("0" <= ch <= "9"):
+            ch = next(c for c in reversed(price_str) if "0" <= c <= "9")
+        last_digit = ord(ch) - 48
+
+        if "I" not in parities:
+            uniform = "PAR"
+        elif "P" not in parities:
+            uniform = "IMPAR"
+        else:
+            uniform = None
+        return price_str, parities, last_digit, uniform
+
+
+@dataclass
+class SignalPlan:
+    symbol: str
+    direction: str  # "PAR" ou "IMPAR"
+    account: str    # "DEMO" ou "REAL"
+    base_stake: float
+    max_gale: int
+    mult: float
+    seq: int = 0    # ordem de despacho (contagem virtual segue essa ordem)
+    t_tick: float = 0.0  # perf_counter do recebimento do tick que gerou o sinal
+    t_plan: float = 0.0  # perf_counter da criação do plano
+
+
+class DerivWSClient:
+    """
+    Cliente WS robusto:
+    - connect_forever mantém conexão viva e chama callbacks
+    - request() espera resposta (req_id); várias requisições podem estar em voo
+    - send_only() envia sem esperar ack (ideal para subscribe que às vezes não responde)
+    - reconexão incremental: reautoriza com o token em cache e refaz só as próprias subscriptions
+    - despacho por prioridade: respostas a req_id e updates de contrato na hora; ticks num slot
+      por símbolo (o mais novo vence) e balance num slot único, entregues depois dos waiters
+    """
+    def __init__(self, url: str, name: str, ui_queue: queue.Queue):
+        self.url = url
+        self.name = name
+        self.ui_queue = ui_queue
+
+        self.ws = None
+        self.req_id = 0
+        self.pending = {}
+
+        self._send_lock = None
+        self._connected = None
+
+        # estado para retomar após queda (só desta conexão)
+        self.auth_token = None
+        self.subscriptions = {}  # chave estável -> payload do subscribe
+
+        # latência: histogramas (opcional) e instantes da última mensagem recebida/decodificada
+        self.metrics = None
+        self.last_recv = 0.0
+        self.last_parsed = 0.0
+
+        # fila de parse opcional: frames sem req_id (ticks) são decodificados numa thread
+        # e entregues ao loop em lote; respostas com req_id continuam no caminho direto
+        self.parse_queue_max = 0
+        self.parse_hook = None  # roda na thread do parser com o dict (ex.: pré-decodificar o tick)
+        self.parse_dropped = 0
+        self._parse_q = None
+
+        # lanes de baixa prioridade: symbol -> (data, t_recv, t_parsed, t_slot) e o último balance
+        self._tick_slots = {}
+        self._balance_slot = None
+        self._flush_scheduled = False
+        self._order_since_flush = False
+        self.tick_arrival_hook = None  # vê TODO tick na chegada, mesmo os colapsados (gravação)
+        self.lane_stats = {
+            lane: {"n": 0, "collapsed": 0, "depth_max": 0, "lag_max_ms": 0.0}
+            for lane in ("ordem", "ticks", "saldo")
+        }
+
+        self.stop_flag = False
+        self.on_message_callbacks = []
+        self.on_disconnect_callbacks = []
+        self.on_connect_callbacks = []
+
+    def add_message_callback(self, cb):
+        self.on_message_callbacks.append(cb)
+
+    def add_disconnect_callback(self, cb):
+        self.on_disconnect_callbacks.append(cb)
+
+    def add_connect_callback(self, cb):
+        self.on_connect_callbacks.append(cb)
+
+    def remember_subscription(self, payload: dict):
+        sub = {k: v for k, v in payload.items() if k != "req_id"}
+        self.subscriptions[json.dumps(sub, sort_keys=True)] = sub
+
+    def _ensure_async_primitives(self):
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        if self._connected is None:
+            self._connected = asyncio.Event()
+
+    def _start_parse_lane(self, loop):
+        if self.parse_queue_max <= 0 or self._parse_q is not None:
+            return
+        self._parse_q = queue.Queue(maxsize=self.parse_queue_max)
+        threading.Thread(
+            target=self._parse_worker, args=(loop, self._parse_q), name=f"parse-{self.name}", daemon=True
+        ).start()
+
+    def _parse_worker(self, loop, q: queue.Queue):
+        while not self.stop_flag:
+            try:
+                item = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                raw, t_recv = item
+                try:
+                    data = json_loads(raw)
+                except Exception:
+                    data = None
+                if data is not None:
+                    t_parsed = time.perf_counter()
+                    if self.parse_hook is not None:
+                        try:
+                            self.parse_hook(data)
+                        except Exception:
+                            pass
+                    batch.append((t_recv, t_parsed, data))
+                if len(batch) >= 256:
+                    break
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    loop.call_soon_threadsafe(self._dispatch_batch, batch)
+                except RuntimeError:
+                    break  # loop encerrado
+
+    def _dispatch_batch(self, batch):
+        for t_recv, t_parsed, data in batch:
+            if self.stop_flag:
+                return
+            self.last_recv = t_recv
+            self.last_parsed = t_parsed
+            self._dispatch(data)
+
+    def _ui_log(self, text: str):
+        self.ui_queue.put(("log_general", f"{utc_ts()} | {text}"))
+
+    def _clear_connection_state(self):
+        try:
+            if self._connected is not None:
+                self._connected.clear()
+        except Exception:
+            pass
+        self.ws = None
+
+        # quebra futures pendentes
+        if self.pending:
+            for rid, fut in list(self.pending.items()):
+                try:
+                    if not fut.done():
+                        fut.set_exception(ConnectionError(f"[{self.name}] conexão caiu (req_id={rid})"))
+                except Exception:
+                    pass
+            self.pending.clear()
+
+    async def close(self):
+        try:
+            if self.ws is not None:
+                await self.ws.close()
+        except Exception:
+            pass
+        self._clear_connection_state()
+
+    def stop(self):
+        self.stop_flag = True
+        self._clear_connection_state()
+
+    def _run_callbacks(self, data: dict):
+        for cb in self.on_message_callbacks:
+            try:
+                cb(data)
+            except Exception as e:
+                self._ui_log(f"[{self.name}] Erro callback: {e}")
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._order_since_flush = False
+            # call_soon entra na fila depois dos waiters já acordados por set_result
+            asyncio.get_running_loop().call_soon(self._flush_lanes)
+
+    def _dispatch(self, data: dict):
+        rid = data.get("req_id")
+        if rid is not None and rid in self.pending:
+            fut = self.pending.pop(rid)
+            if not fut.done():
+                fut.set_result(data)
+            self._order_since_flush = True
+
+        msg_type = data.get("msg_type")
+        if msg_type == "tick":
+            if self.tick_arrival_hook is not None:
+                try:
+                    self.tick_arrival_hook(data)
+                except Exception:
+                    pass
+            symbol = (data.get("tick") or {}).get("symbol")
+            st = self.lane_stats["ticks"]
+            if symbol in self._tick_slots:
+                st["collapsed"] += 1
+            self._tick_slots[symbol] = (data, self.last_recv, self.last_parsed, time.perf_counter())
+            st["depth_max"] = max(st["depth_max"], len(self._tick_slots))
+            self._schedule_flush()
+        elif msg_type == "balance" and data.get("subscription"):
+            st = self.lane_stats["saldo"]
+            if self._balance_slot is not None:
+                st["collapsed"] += 1
+            self._balance_slot = (data, time.perf_counter())
+            self._schedule_flush()
+        else:
+            self.lane_stats["ordem"]["n"] += 1
+            self._order_since_flush = True
+            self._run_callbacks(data)
+
+    def _flush_lanes(self):
+        if self._order_since_flush:
+            # chegou resposta/contrato depois do agendamento: os waiters que ela acordou
+            # estão na fila do loop atrás deste flush -> vai para o fim da fila uma vez
+            self._order_since_flush = False
+            asyncio.get_running_loop().call_soon(self._flush_lanes)
+            return
+        self._flush_scheduled = False
+        if self.stop_flag:
+            self._tick_slots.clear()
+            self._balance_slot = None
+            return
+
+        now = time.perf_counter()
+        if self._balance_slot is not None:
+            (data, t_slot), self._balance_slot = self._balance_slot, None
+            self._lane_delivered("saldo", (now - t_slot) * 1000.0)
+            self._run_callbacks(data)
+
+        slots, self._tick_slots = self._tick_slots, {}
+        for data, t_recv, t_parsed, t_slot in slots.values():
+            self._lane_delivered("ticks", (now - t_slot) * 1000.0)
+            self.last_recv = t_recv
+            self.last_parsed = t_parsed
+            self._run_callbacks(data)
+
+    def _lane_delivered(self, lane: str, lag_ms: float):
+        st = self.lane_stats[lane]
+        st["n"] += 1
+        if lag_ms > st["lag_max_ms"]:
+            st["lag_max_ms"] = lag_ms
+        if self.metrics is not None:
+            self.metrics.record(f"lane.{lane}", lag_ms, self.name)
+
+    async def _resume(self, ws):
+        """
+        Retoma a sessão numa conexão nova antes de liberar request()/send_only():
+        reautoriza com o token em cache e reenvia só as subscriptions desta conexão.
+        """
+        if self.auth_token:
+            await ws.send(json_dumps({"authorize": self.auth_token}))
+            deadline = time.time() + 15
+            while True:
+                remaining = max(deadline - time.time(), 0.01)
+                raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                self.last_recv = time.perf_counter()
+                data = json_loads(raw)
+                self.last_parsed = time.perf_counter()
+                if data.get("msg_type") == "authorize":
+                    if data.get("error"):
+                        self._ui_log(f"[{self.name}] ERRO reauthorize: {data['error'].get('message')}")
+                    break
+                self._dispatch(data)
+
+        for payload in list(self.subscriptions.values()):
+            await ws.send(json_dumps(payload))
+
+    async def connect_forever(self):
+        self._ensure_async_primitives()
+        self._start_parse_lane(asyncio.get_running_loop())
+        lane = self._parse_q
+        backoff = 1.0
+        while not self.stop_flag:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as ws:
+                    if self.stop_flag:
+                        try:
+                            await ws.close()
+                        except Exception:
+                            pass
+                        break
+
+                    self.ws = ws
+                    if self.auth_token or self.subscriptions:
+                        await self._resume(ws)
+                    self._connected.set()
+                    self._ui_log(f"[{self.name}] Conectado.")
+                    # conexão saudável: a próxima queda tenta de novo na hora
+                    backoff = 0.0
+
+                    for cb in self.on_connect_callbacks:
+                        try:
+                            cb(self.name)
+                        except Exception:
+                            pass
+
+                    async for msg in ws:
+                        if self.stop_flag:
+                            break
+                        t_recv = time.perf_counter()
+                        if lane is not None and isinstance(msg, str) and "req_id" not in msg:
+                            try:
+                                lane.put_nowait((msg, t_recv))
+                            except queue.Full:
+                                self.parse_dropped += 1
+                            continue
+                        data = json_loads(msg)
+                        self.last_recv = t_recv
+                        self.last_parsed = time.perf_counter()
+                        self._dispatch(data)
+
+                    if not self.stop_flag:
+                        raise ConnectionError("conexão fechada pelo servidor")
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._clear_connection_state()
+
+                for cb in self.on_disconnect_callbacks:
+                    try:
+                        cb(self.name, e)
+                    except Exception:
+                        pass
+
+                if self.stop_flag:
+                    break
+
+                self._ui_log(f"[{self.name}] Reconectando... ({e})")
+                await asyncio.sleep(backoff)
+                backoff = min(max(backoff * 1.7, 0.5), 20.0)
+
+        self._clear_connection_state()
+
+    async def _wait_connected_and_open(self, deadline_ts: float):
+        self._ensure_async_primitives()
+        while True:
+            remaining = deadline_ts - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"[{self.name}] timeout aguardando conexão")
+
+            if not self._connected.is_set():
+                try:
+                    await asyncio.wait_for(self._connected.wait(), timeout=remaining)
+                except Exception:
+                    continue
+
+            ws = self.ws
+            if ws is None or getattr(ws, "closed", False):
+                self._clear_connection_state()
+                await asyncio.sleep(0.05)
+                continue
+            return ws
+
+    async def subscribe(self, payload: dict, timeout=25):
+        """
+        send_only() que fica registrado para ser refeito após reconexão.
+        """
+        self.remember_subscription(payload)
+        await self.send_only(payload, timeout=timeout)
+
+    async def send_only(self, payload: dict, timeout=25):
+        """
+        Envia sem esperar resposta. Útil para subscribe de ticks.
+        """
+        self._ensure_async_primitives()
+        deadline = time.time() + float(timeout)
+        async with self._send_lock:
+            ws = await self._wait_connected_and_open(deadline)
+            try:
+                await ws.send(json_dumps(payload))
+            except Exception:
+                self._clear_connection_state()
+                # tenta uma vez mais dentro do deadline
+                ws = await self._wait_connected_and_open(deadline)
+                await ws.send(json_dumps(payload))
+
+    async def request(self, payload: dict, timeout=25, retry=True):
+        """
+        Multiplexado: várias requisições em voo na mesma conexão.
+        - lock só em volta da escrita no socket
+        - timeout por requisição (não derruba a conexão nem os outros pendentes)
+        - cancelamento remove o future pendente
+        - falha no send sempre reenvia; queda DEPOIS do send só reenvia com retry=True.
+          O buy (não idempotente) passa retry=False e recebe o ConnectionError: o servidor
+          pode já ter executado. Proposal sem subscribe é só cotação e reenvia normalmente
+        """
+        self._ensure_async_primitives()
+        deadline = time.time() + float(timeout)
+        loop = asyncio.get_running_loop()
+        t_enter = time.perf_counter()
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"[{self.name}] timeout total aguardando conexão/resposta")
+
+            async with self._send_lock:
+                ws = await self._wait_connected_and_open(deadline)
+
+                self.req_id += 1
+                rid = self.req_id
+                payload["req_id"] = rid
+
+                fut = loop.create_future()
+                self.pending[rid] = fut
+
+                try:
+                    await ws.send(json_dumps(payload))
+                    sent = True
+                except Exception:
+                    self.pending.pop(rid, None)
+                    self._clear_connection_state()
+                    if fut.done():
+                        fut.exception()  # a queda pode ter falhado o future durante o send
+                    sent = False
+
+            if not sent:
+                await asyncio.sleep(0.15)
+                continue
+
+            # espera = lock de envio + conexão disponível + write; resposta = write -> req_id de volta
+            t_sent = time.perf_counter()
+            if self.metrics is not None:
+                self.metrics.record("ws.espera", (t_sent - t_enter) * 1000.0, self.name)
+
+            try:
+                remaining = max(deadline - time.time(), 0.0)
+                resp = await asyncio.wait_for(fut, timeout=remaining)
+                if self.metrics is not None:
+                    self.metrics.since("ws.resposta", t_sent, self.name)
+                return resp
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"[{self.name}] timeout aguardando resposta (req_id={rid})") from None
+            except ConnectionError:
+                if not retry:
+                    raise ConnectionError(f"[{self.name}] conexão caiu com a requisição em voo (req_id={rid})") from None
+                # conexão caiu com a requisição em voo: reenvia dentro do deadline
+                await asyncio.sleep(0.15)
+                continue
+            finally:
+                self.pending.pop(rid, None)
+
+
+class MarketDataHub:
+    """
+    Feed PUBLIC compartilhado: um pool de sockets (shards) para ALLOWED_SYMBOLS, cada tick
+    decodificado UMA vez (TickDecoder) e entregue a N TradingEngine.
+
+    - engines entram com attach() (depois de autorizar) e saem com detach(); o feed sobe no
+      primeiro attach e cai quando o último sai
+    - cada engine recebe on_market_tick(symbol, parities, last_digit, uniform, t_recv) e
+      decide o sinal com a própria config, contas e contadores
+    - log de mercado (abas), tail dos símbolos ocultos, gravação de ticks e saúde dos shards ficam aqui
+    """
+    def __init__(self, ui_queue: queue.Queue, metrics=None):
+        self.ui_queue = ui_queue
+        # tick.json / tick.decode / tick.fila e ws.* dos PUBLIC; um engine dono do hub passa o seu
+        self.metrics = metrics if metrics is not None else LatencyMetrics()
+
+        # config (vale no próximo start do feed)
+        self.public_connections = DEFAULT_PUBLIC_CONNECTIONS
+        self.parse_thread = False  # ticks do PUBLIC decodificados numa thread
+        self.record_ticks = False
+        self.shm_ring = False      # ticks decodificados também no ring de memória compartilhada
+
+        self.publics = []
+        self._shard_of = {}      # symbol -> cliente PUBLIC do shard
+        self._shard_health = {}  # nome do cliente -> {"up", "ticks", "last_tick", "drops"}
+
+        self.engines = []  # fan-out na ordem de attach
+        self.running = False
+        self._start_task = None  # start do feed em andamento/concluído (attach concorrente espera o mesmo)
+        self._stopping = False
+        self._connect_tasks = []
+        self._start_perf = None
+        self._down_since = {}
+
+        # decode de ticks; a linha de log só é montada para símbolos em exibição.
+        # Os demais guardam um tail compacto (ts, preço, paridades, dígito) que vira
+        # linhas quando a aba do símbolo é aberta (set_display_symbols)
+        self._decoder = TickDecoder()
+        self.display_symbols = set(ALLOWED_SYMBOLS)
+        self._market_tail = {sym: deque(maxlen=MARKET_TAIL) for sym in ALLOWED_SYMBOLS}
+        self._market_hidden = dict.fromkeys(ALLOWED_SYMBOLS, 0)  # ticks desde que saiu de exibição
+
+        # estatísticas de paridade por símbolo, O(1) por tick (compartilhadas pelos engines)
+        self.stats = {sym: ParityStats() for sym in ALLOWED_SYMBOLS}
+
+        # gravação de ticks e ring compartilhado (ligados por config, abertos no start e fechados no stop)
+        self.recorder = None
+        self.tick_ring = None
+
+        # subs/seen
+        self._tick_subscribed = set()
+        self._tick_seen_events = {}
+        self._tick_tasks = []
+
+    def ui(self, channel, msg):
+        self.ui_queue.put((channel, msg))
+
+    def configure(self, *, public_connections=DEFAULT_PUBLIC_CONNECTIONS, parse_thread=False, record_ticks=False, shm_ring=False):
+        self.public_connections = max(1, int(public_connections))
+        self.parse_thread = bool(parse_thread)
+        self.record_ticks = bool(record_ticks)
+        self.shm_ring = bool(shm_ring)
+
+    def _create_clients(self):
+        n = max(1, min(int(self.public_connections), len(ALLOWED_SYMBOLS)))
+        names = ["PUBLIC"] if n == 1 else [f"PUBLIC-{i + 1}" for i in range(n)]
+        self.publics = [DerivWSClient(DERIV_WS_URL, name, self.ui_queue) for name in names]
+        self._shard_of = {sym: self.publics[i % n] for i, sym in enumerate(ALLOWED_SYMBOLS)}
+        self._shard_health = {
+            c.name: {"up": False, "ticks": 0, "last_tick": None, "drops": 0} for c in self.publics
+        }
+
+        for public in self.publics:
+            public.metrics = self.metrics
+            public.add_message_callback(self._on_public_msg)
+            public.add_disconnect_callback(self._on_disconnect)
+            public.add_connect_callback(self._on_connect)
+            public.tick_arrival_hook = self._on_tick_arrival
+            if self.parse_thread:
+                public.parse_queue_max = PARSE_QUEUE_MAX
+                public.parse_hook = self._make_predecoder()
+
+    def _make_predecoder(self):
+        """
+        Hook da thread de parse: decodifica o tick fora do loop (TickDecoder próprio da thread).
+        """
+        decoder = TickDecoder()
+
+        def predecode(data):
+            if data.get("msg_type") != "tick":
+                return
+            tick = data.get("tick") or {}
+            quote = tick.get("quote")
+            if quote is None:
+                return
+            t0 = time.perf_counter()
+            decoded = decoder.decode(quote, tick.get("pip_size"))
+            data["_decoded"] = (decoded, (time.perf_counter() - t0) * 1000.0)
+
+        return predecode
+
+    # ---------- ciclo de vida ----------
+    async def attach(self, engine):
+        """
+        Registra o engine no fan-out e espera o feed ter o primeiro símbolo vivo
+        (sobe o feed se for o primeiro). Erro no start do feed sobe para o engine.
+        """
+        if engine not in self.engines:
+            self.engines.append(engine)
+        if self._start_task is None:
+            self._start_task = asyncio.create_task(self._start())
+        await asyncio.shield(self._start_task)
+
+    async def detach(self, engine):
+        if engine in self.engines:
+            self.engines.remove(engine)
+        if not self.engines:
+            await self.stop()
+
+    async def _start(self):
+        self._start_perf = time.perf_counter()
+        self._tick_subscribed = set()
+        self._tick_seen_events = {}
+        self._down_since = {}
+
+        # clientes novos a cada start: stop() deixa os antigos com stop_flag
+        # e o tamanho do pool pode ter mudado
+        self._create_clients()
+        self._ui_shards()
+        self.ui("log_general", f"{utc_ts()} | [PUBLIC] JSON: {JSON_BACKEND} | parser em thread: {'sim' if self.parse_thread else 'não'} | engines: {len(self.engines)}.")
+
+        if self.record_ticks and self.recorder is None:
+            self.recorder = TickRecorder(TICKS_DIR, ALLOWED_SYMBOLS)
+            self.ui("log_general", f"{utc_ts()} | [PUBLIC] Gravando ticks em '{TICKS_DIR}/'.")
+
+        if self.shm_ring and self.tick_ring is None:
+            try:
+                self.tick_ring = TickRing(ALLOWED_SYMBOLS)
+                self.ui("log_general", f"{utc_ts()} | [PUBLIC] Ticks em memória compartilhada '{RING_NAME}' ({self.tick_ring.capacity} slots).")
+            except (RuntimeError, OSError) as e:
+                self.ui("log_general", f"{utc_ts()} | [PUBLIC] ERRO ao abrir o ring '{RING_NAME}': {e}")
+
+        self.running = True
+        self._connect_tasks = [asyncio.create_task(c.connect_forever()) for c in self.publics]
+        try:
+            await self._subscribe_ticks_robust()
+        except BaseException:
+            # o próximo attach tenta do zero
+            self._start_task = None
+            await self._stop_clients()
+            raise
+
+    async def _stop_clients(self):
+        self.running = False
+        for c in self.publics:
+            c.stop()
+        try:
+            await asyncio.gather(*(c.close() for c in self.publics), return_exceptions=True)
+        except Exception:
+            pass
+
+        tasks = self._connect_tasks + self._tick_tasks
+        for t in tasks:
+            try:
+                t.cancel()
+            except Exception:
+                pass
+        if tasks:
+            try:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            except Exception:
+                pass
+        self._connect_tasks = []
+        self._tick_tasks = []
+
+    async def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        try:
+            task, self._start_task = self._start_task, None
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            await self._stop_clients()
+
+            if self.recorder is not None:
+                recorder, self.recorder = self.recorder, None
+                await asyncio.get_running_loop().run_in_executor(None, recorder.close)
+
+            if self.tick_ring is not None:
+                ring, self.tick_ring = self.tick_ring, None
+                ring.close()
+        finally:
+            self._stopping = False
+
+    # ---------- subscribe ----------
+    async def _subscribe_symbol_until_live(self, sym: str, deadline: float):
+        """
+        Reenvia o subscribe do símbolo com backoff exponencial próprio até o
+        primeiro tick chegar (não depende de ack/req_id do subscribe).
+        """
+        ev = self._tick_seen_events[sym]
+        public = self._shard_of[sym]
+        wait = 3.0
+        # o primeiro envio já saiu no subscribe em lote do shard
+        resend = False
+        try:
+            while not ev.is_set():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                if resend:
+                    # já lembrado por símbolo no lote: só reenvia
+                    await public.send_only({"ticks": sym, "subscribe": 1}, timeout=min(35.0, remaining))
+                resend = True
+                try:
+                    await asyncio.wait_for(ev.wait(), timeout=min(wait, max(deadline - time.time(), 0.01)))
+                except asyncio.TimeoutError:
+                    wait = min(wait * 2, 20.0)
+        except Exception:
+            return False
+        self._tick_subscribed.add(sym)
+        return True
+
+    async def _report_ticks_live(self, pending):
+        await asyncio.gather(*pending, return_exceptions=True)
+        self.ui("log_general", f"{utc_ts()} | [PUBLIC] Ticks ativos ({len(self._tick_subscribed)}/{len(ALLOWED_SYMBOLS)}).")
+
+    async def _subscribe_ticks_robust(self):
+        """
+        Subscribe por evento: um subscribe em lote por shard PUBLIC e uma task
+        por símbolo esperando o primeiro tick, cada uma com seu retry.
+        Retorna assim que o PRIMEIRO símbolo está vivo; os demais seguem em background.
+        """
+        for sym in ALLOWED_SYMBOLS:
+            if sym not in self._tick_seen_events:
+                self._tick_seen_events[sym] = asyncio.Event()
+
+        # 1 subscribe em lote por shard (ticks aceita lista de símbolos); para a reconexão fica
+        # lembrada UMA entrada por símbolo, nunca o lote junto (seria subscribe duplicado)
+        bulk = []
+        for public in self.publics:
+            syms = [s for s in ALLOWED_SYMBOLS if self._shard_of[s] is public and s not in self._tick_subscribed]
+            if syms:
+                for sym in syms:
+                    public.remember_subscription({"ticks": sym, "subscribe": 1})
+                bulk.append(public.send_only({"ticks": syms, "subscribe": 1}, timeout=35))
+        await asyncio.gather(*bulk, return_exceptions=True)
+
+        deadline = time.time() + 45.0
+        pending = {
+            asyncio.create_task(self._subscribe_symbol_until_live(sym, deadline))
+            for sym in ALLOWED_SYMBOLS
+            if sym not in self._tick_subscribed
+        }
+        self._tick_tasks = list(pending)
+
+        while pending and not self._tick_subscribed:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+        # se faltar algum, não derruba o feed — ele segue com os que chegaram
+        if len(self._tick_subscribed) == 0:
+            raise TimeoutError("[PUBLIC] Nenhum tick chegou após subscribe (rede instável).")
+
+        ms = (time.perf_counter() - self._start_perf) * 1000.0
+        self.ui("log_general", f"{utc_ts()} | [PUBLIC] Primeiro símbolo vivo em {ms:.0f}ms após start.")
+
+        if pending:
+            asyncio.create_task(self._report_ticks_live(pending))
+        else:
+            await self._report_ticks_live(pending)
+
+    # ---------- conexões ----------
+    def _on_disconnect(self, who: str, exc: Exception):
+        """
+        Queda de um shard: só ele reconecta (o próprio connect_forever faz isso).
+        """
+        health = self._shard_health.get(who)
+        if health is not None and health["up"]:
+            health["up"] = False
+            health["drops"] += 1
+            self._ui_shards()
+
+        if not self.running or self._stopping:
+            return
+        if who not in self._down_since:
+            self._down_since[who] = time.time()
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] {who} caiu ({exc}) -> reconectando só essa conexão.")
+
+    def _on_connect(self, who: str):
+        health = self._shard_health.get(who)
+        if health is not None:
+            health["up"] = True
+            self._ui_shards()
+
+        down_since = self._down_since.pop(who, None)
+        if down_since is None or not self.running:
+            return
+        self.ui("log_general", f"{utc_ts()} | [{who}] Recuperado em {(time.time() - down_since) * 1000:.0f}ms (sessão mantida).")
+
+    def _ui_shards(self):
+        shards = []
+        for public in self.publics:
+            h = self._shard_health[public.name]
+            shards.append({
+                "name": public.name,
+                "up": h["up"],
+                "symbols": sum(1 for c in self._shard_of.values() if c is public),
+                "drops": h["drops"],
+            })
+        self.ui("ui_shards", shards)
+
+    # ---------- ticks ----------
+    def _on_tick_arrival(self, data):
+        """
+        Chamado para todo tick na chegada (antes do slot colapsar bursts): a gravação fica completa.
+        """
+        if self.recorder is None:
+            return
+        tick = data.get("tick") or {}
+        if tick.get("symbol") in ALLOWED_SYMBOLS and tick.get("quote") is not None:
+            self.recorder.record(tick.get("epoch") or time.time(), tick["symbol"], tick["quote"], tick.get("pip_size"))
+
+    def _on_public_msg(self, data):
+        if not self.running:
+            return
+        if data.get("msg_type") != "tick":
+            return
+
+        tick = data.get("tick", {})
+        symbol = tick.get("symbol")
+        quote = tick.get("quote")
+        pip_size = tick.get("pip_size")
+
+        if symbol in self._tick_seen_events:
+            # ✅ marca que o símbolo está vivo (resolve subscribe sem ack)
+            try:
+                self._tick_seen_events[symbol].set()
+            except Exception:
+                pass
+
+        if symbol not in ALLOWED_SYMBOLS or quote is None:
+            return
+
+        public = self._shard_of[symbol]
+        t_recv = public.last_recv
+        self.metrics.record("tick.json", (public.last_parsed - t_recv) * 1000.0, symbol)
+
+        health = self._shard_health[public.name]
+        health["ticks"] += 1
+        health["last_tick"] = time.time()
+
+        pre = data.get("_decoded")
+        if pre is None:
+            price_str, parities, last_digit, uniform = self._decoder.decode(quote, pip_size)
+            self.metrics.since("tick.decode", public.last_parsed, symbol)
+        else:
+            # já decodificado na thread de parse; tick.fila = espera até o loop pegar o lote
+            (price_str, parities, last_digit, uniform), decode_ms = pre
+            self.metrics.record("tick.decode", decode_ms, symbol)
+            self.metrics.since("tick.fila", public.last_parsed, symbol)
+
+        if self.tick_ring is not None:
+            self.tick_ring.publish(symbol, tick.get("epoch"), quote, last_digit, uniform, pip_size)
+        self.stats[symbol].update(last_digit, uniform)
+
+        if symbol in self.display_symbols:
+            self.ui("log_market", {"symbol": symbol, "line": self._market_line(None, price_str, parities, last_digit)})
+        else:
+            self._market_tail[symbol].append((time.time(), price_str, parities, last_digit))
+            self._market_hidden[symbol] += 1
+
+        for engine in self.engines:
+            try:
+                engine.on_market_tick(symbol, parities, last_digit, uniform, t_recv)
+            except Exception as e:
+                self.ui("log_general", f"{utc_ts()} | [PUBLIC] ERRO no engine {engine.name or '-'}: {repr(e)}")
+
+    @staticmethod
+    def _market_line(ts, price_str, parities, last_digit):
+        seq_str = "/".join(parities) if parities else "-"
+        last_parity = None if last_digit is None else ("PAR" if last_digit % 2 == 0 else "IMPAR")
+        return f"{utc_ts(ts)} | {price_str} ----> {seq_str} - digito {last_digit} - {last_parity}"
+
+    def set_display_symbols(self, symbols):
+        """
+        Símbolos com aba visível (chamado no loop, via call_soon_threadsafe pela UI).
+        Quem entra em exibição recebe primeiro o tail acumulado enquanto estava oculto.
+        """
+        symbols = set(symbols) & set(ALLOWED_SYMBOLS)
+        for sym in symbols - self.display_symbols:
+            tail = self._market_tail[sym]
+            omitted = self._market_hidden[sym] - len(tail)
+            lines = [self._market_line(*t) for t in tail]
+            if omitted > 0:
+                lines.insert(0, f"{utc_ts()} | ... {omitted} ticks omitidos enquanto a aba estava oculta")
+            tail.clear()
+            self._market_hidden[sym] = 0
+            if lines:
+                self.ui("log_market_tail", {"symbol": sym, "lines": lines})
+        self.display_symbols = symbols
+
+
+class TradingEngine:
+    def __init__(self, ui_queue: queue.Queue, hub=None, name: str = ""):
+        self.ui_queue = ui_queue
+        # vários engines no mesmo processo: o nome separa diário e métricas em arquivos próprios
+        self.name = name
+
+        self.demo = None
+        self.real = None
+
+        self.running = False
+        self.loop = None
+
+        # tokens (persistidos)
+        self._last_demo_token = ""
+        self._last_real_token = ""
+
+        # config
+        self.virtual_mode = False
+        self.vwin_target = 0
+        self.vloss_target = 0
+        self.vwin_streak = 0
+        self.vloss_streak = 0
+        self._armed_real_next = False
+
+        self.trigger_mode = "SEQUENCIA"
+        self.rules = RuleSet(default_rules(self.trigger_mode), ALLOWED_SYMBOLS)
+        self.stake = 1.0
+        self.max_gale = 0
+        self.mult = 2.0
+        self.stop_win = 0.0
+        self.exec_mode = "DIRETO"  # DIRETO (buy com parameters) ou PROPOSTA (proposal + buy)
+
+        # scheduler: sinais simultâneos com limites
+        self.max_per_symbol = DEFAULT_MAX_PER_SYMBOL
+        self.max_per_account = DEFAULT_MAX_PER_ACCOUNT
+        self.max_exposure = DEFAULT_MAX_EXPOSURE
+        self.queue_max = DEFAULT_QUEUE_MAX
+        self.queue_policy = DEFAULT_QUEUE_POLICY  # COALESCER (1 por símbolo, o mais novo vence) ou FIFO
+        self.signal_max_age = DEFAULT_SIGNAL_MAX_AGE  # segundos
+
+        self._open_by_symbol = {}
+        self._open_by_account = {}
+        self._open_stake = 0.0
+        self._signal_queue = deque()  # (symbol, direction, ts, t_tick)
+        self.signals_dropped = 0
+        self.signals_coalesced = 0
+
+        # filtro de sinal pela taxa de cotações uniformes (hub.stats) e acerto por símbolo
+        self.min_uniform_pct = 0.0  # 0 desativa
+        self.signals_filtered = 0
+        self.signal_stats = {sym: SignalOutcomes() for sym in ALLOWED_SYMBOLS}
+
+        # resultados virtuais aplicados na ordem de despacho (DEMO pode voltar fora de ordem)
+        self._dispatch_seq = 0
+        self._vnext = 0
+        self._vresults = {}
+
+        # latência até o buy confirmado, por modo de execução
+        self.exec_latency = {}
+        # histogramas por etapa (tick -> sinal -> buy -> liquidação), dump periódico em METRICS_FILE
+        self.metrics = LatencyMetrics()
+        self.metrics_file = named_path(METRICS_FILE, name)
+        self._metrics_task = None
+
+        # feed PUBLIC: compartilhado quando passado (vários engines, um decode por tick);
+        # senão um hub só deste engine, com as mesmas métricas
+        self._owns_hub = hub is None
+        self.hub = hub if hub is not None else MarketDataHub(ui_queue, metrics=self.metrics)
+
+        # proposals pré-cotadas para o próximo gale:
+        # (account, symbol, direction, stake) -> (task -> proposal_id | None, expira_em)
+        self._prequotes = {}
+
+        # real stats
+        self.real_balance = None
+        self.real_balance_start = None
+        self.real_wins = 0
+        self.real_losses = 0
+        self.real_profit = 0.0
+
+        # subs/seen
+        self._balance_subscribed = False
+        self._balance_seen = asyncio.Event() if asyncio.get_event_loop_policy() else None  # placeholder
+
+        # settlement por stream (contract_id -> future com o resultado final); só existe
+        # enquanto _wait_settlement espera. is_sold que chega com um buy em voo (antes do waiter)
+        # fica em _early_settled (limitado por tamanho e TTL); o resto (duplicado/tardio) é ignorado
+        self._settlements = {}
+        self._early_settled = OrderedDict()  # contract_id -> (resultado, expira_em)
+        self._buys_pending = 0
+
+        # restart control
+        self._restart_in_progress = False
+        self._stopping = False
+        self._down_since = {}  # nome do cliente -> time.time() da queda
+
+        # contratos em aberto: contract_id -> cliente (para retomar o stream após reconexão)
+        self._inflight = {}
+
+        # diário de operações; a UI relê a janela visível quando um lote é confirmado
+        self.journal = TradeJournal(
+            named_path(JOURNAL_FILE, name),
+            on_commit=lambda: self.ui("ui_ops", None),
+            on_error=lambda msg: self.ui("log_general", f"{utc_ts()} | [DIÁRIO] ERRO ao gravar {msg}"),
+        )
+
+        # tasks
+        self._connect_tasks = []
+
+        # latência start -> primeiro símbolo vivo / primeiro sinal
+        self._start_perf = None
+        self._first_signal_pending = False
+
+        self._create_clients()
+
+    def _create_clients(self):
+        self.demo = DerivWSClient(DERIV_WS_URL, "DEMO", self.ui_queue)
+        self.real = DerivWSClient(DERIV_WS_URL, "REAL", self.ui_queue)
+
+        self.real.add_message_callback(self._on_real_msg)
+        self.demo.add_message_callback(self._on_contract_msg)
+        self.real.add_message_callback(self._on_contract_msg)
+
+        for client in self._all_clients():
+            client.metrics = self.metrics
+            client.add_disconnect_callback(self._on_any_disconnect)
+            client.add_connect_callback(self._on_any_connect)
+
+    def _all_clients(self):
+        return [self.demo, self.real]
+
+    def ui(self, channel, msg):
+        self.ui_queue.put((channel, msg))
+
+    def log_market_exec(self, symbol: str, line: str):
+        self.ui("log_market_exec", {"symbol": symbol, "line": line})
+
+    def set_config(
+        self,
+        *,
+        virtual_mode,
+        vwin_target,
+        vloss_target,
+        trigger_mode,
+        stake,
+        max_gale,
+        mult,
+        stop_win,
+        exec_mode="DIRETO",
+        parse_thread=False,
+        record_ticks=False,
+        shm_ring=False,
+        public_connections=DEFAULT_PUBLIC_CONNECTIONS,
+        max_per_symbol=DEFAULT_MAX_PER_SYMBOL,
+        max_per_account=DEFAULT_MAX_PER_ACCOUNT,
+        max_exposure=DEFAULT_MAX_EXPOSURE,
+        queue_max=DEFAULT_QUEUE_MAX,
+        queue_policy=DEFAULT_QUEUE_POLICY,
+        signal_max_age=DEFAULT_SIGNAL_MAX_AGE,
+        min_uniform_pct=0.0,
+        rules=None,
+    ):
+        self.virtual_mode = bool(virtual_mode)
+        self.vwin_target = int(vwin_target)
+        self.vloss_target = int(vloss_target)
+        self.trigger_mode = trigger_mode
+        # sem "rules" na config vale o gatilho fixo (uniforme + SEQUENCIA/REVERSAO)
+        self.rules = RuleSet(rules or default_rules(trigger_mode), ALLOWED_SYMBOLS)
+        self.stake = float(stake)
+        self.max_gale = int(max_gale)
+        self.mult = float(mult)
+        self.stop_win = float(stop_win)
+        self.exec_mode = exec_mode
+        self.max_per_symbol = max(1, int(max_per_symbol))
+        self.max_per_account = max(1, int(max_per_account))
+        self.max_exposure = float(max_exposure)
+        self.queue_max = max(0, int(queue_max))
+        self.queue_policy = queue_policy
+        self.signal_max_age = float(signal_max_age)
+        self.min_uniform_pct = max(0.0, float(min_uniform_pct))
+        if self._owns_hub:
+            # hub compartilhado é configurado por quem o criou
+            self.hub.configure(
+                public_connections=public_connections,
+                parse_thread=parse_thread,
+                record_ticks=record_ticks,
+                shm_ring=shm_ring,
+            )
+
+        if not self.virtual_mode:
+            self.vwin_streak = 0
+            self.vloss_streak = 0
+            self._armed_real_next = False
+            self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
+
+    async def authorize(self, client: DerivWSClient, token: str, label: str):
+        if not token.strip():
+            self.ui("log_general", f"{utc_ts()} | [{label}] Token vazio (não autorizado).")
+            return False
+        resp = await client.request({"authorize": token.strip()}, timeout=45)
+        if resp.get("error"):
+            self.ui("log_general", f"{utc_ts()} | [{label}] ERRO authorize: {resp['error'].get('message')}")
+            return False
+        client.auth_token = token.strip()
+        self.ui("log_general", f"{utc_ts()} | [{label}] Autorizado.")
+        return True
+
+    async def _subscribe_real_balance(self):
+        if self._balance_subscribed:
+            return
+        payload = {"balance": 1, "subscribe": 1}
+        resp = await self.real.request(payload, timeout=45)
+        if resp.get("error"):
+            self.ui("log_general", f"{utc_ts()} | [REAL] ERRO balance: {resp['error'].get('message')}")
+            return
+        self.real.remember_subscription(payload)
+        self._balance_subscribed = True
+        self.ui("log_general", f"{utc_ts()} | [REAL] Balance subscribe ok.")
+
+    async def _start_internal(self):
+        self._start_perf = time.perf_counter()
+        self._first_signal_pending = True
+        self._connect_tasks = [asyncio.create_task(c.connect_forever()) for c in self._all_clients()]
+
+        # tempo para estabilizar
+        await asyncio.sleep(1.0)
+
+        ok_demo = await self.authorize(self.demo, self._last_demo_token, "DEMO")
+        ok_real = await self.authorize(self.real, self._last_real_token, "REAL")
+
+        if self.virtual_mode and not ok_demo:
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] Modo virtual ligado mas DEMO não autorizou (token/instabilidade).")
+        if not ok_real:
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] REAL não autorizou (saldo/real pode falhar).")
+
+        # ticks só depois de autorizar: o feed (compartilhado ou não) espera o primeiro símbolo vivo
+        await self.hub.attach(self)
+
+        if ok_real:
+            await self._subscribe_real_balance()
+
+        self.ui("log_general", f"{utc_ts()} | [ENGINE] Rodando. Regras: {', '.join(self.rules.names())}")
+        self._ui_rules()
+
+    async def start(self, demo_token: str, real_token: str):
+        if self.running:
+            return
+
+        self.running = True
+        self._last_demo_token = demo_token or ""
+        self._last_real_token = real_token or ""
+
+        # clientes novos a cada start: stop() deixa os antigos com stop_flag
+        self._balance_subscribed = False
+        self._create_clients()
+
+        if self._metrics_task is None:
+            self._metrics_task = asyncio.create_task(self._metrics_loop())
+
+        try:
+            await self._start_internal()
+        except Exception as e:
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] ERRO no start: {repr(e)}")
+            await self._reboot_all(reason=f"start falhou: {repr(e)}")
+
+    async def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        try:
+            self.running = False
+
+            clients = self._all_clients()
+            for c in clients:
+                c.stop()
+
+            try:
+                await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+            except Exception:
+                pass
+
+            self._clear_prequotes()
+
+            tasks = self._connect_tasks
+            for t in tasks:
+                try:
+                    t.cancel()
+                except Exception:
+                    pass
+            if tasks:
+                try:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                except Exception:
+                    pass
+            self._connect_tasks = []
+
+            # último engine a sair derruba o feed PUBLIC
+            await self.hub.detach(self)
+
+            if self._metrics_task is not None:
+                self._metrics_task.cancel()
+                self._metrics_task = None
+                await self._dump_metrics()
+
+            # grava o que está na fila do diário; escritas tardias (sinais terminando) reabrem a thread
+            await asyncio.get_running_loop().run_in_executor(None, self.journal.close)
+
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] Parado.")
+        finally:
+            self._stopping = False
+
+    def reset_counters_and_views(self):
+        self.real_wins = 0
+        self.real_losses = 0
+        self.real_profit = 0.0
+        self.real_balance_start = None
+
+        self.vwin_streak = 0
+        self.vloss_streak = 0
+        self._armed_real_next = False
+        # resultados de sinais já despachados não contam mais para a sequência virtual
+        self._vnext = self._dispatch_seq
+        self._vresults.clear()
+
+        self.signals_dropped = 0
+        self.signals_coalesced = 0
+        self.signals_filtered = 0
+        self._ui_sched()
+        self.rules.reset_counters()
+        self._ui_rules()
+
+        for outcomes in self.signal_stats.values():
+            outcomes.reset()
+        if self._owns_hub:
+            for stats in self.hub.stats.values():
+                stats.reset()
+        self._ui_stats()
+
+        self.metrics.reset()
+        self.ui("ui_metrics", [])
+
+        self.ui("ui_pl", {
+            "wins": 0, "losses": 0, "profit": 0.0,
+            "balance": self.real_balance,
+            "start": self.real_balance_start,
+        })
+        self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
+        self.ui("ui_reset_views", {"ok": True})
+
+    async def _reboot_all(self, reason: str):
+        if self._restart_in_progress:
+            return
+        self._restart_in_progress = True
+        try:
+            self.ui("log_general", f"{utc_ts()} | [REBOOT] {reason}")
+            self.ui("log_general", f"{utc_ts()} | [REBOOT] Fechando e abrindo novamente (limpo)...")
+
+            self.reset_counters_and_views()
+
+            await self.stop()
+
+            # limpa estado interno (contadores de abertos caem quando as tasks antigas terminam)
+            self._signal_queue.clear()
+            self._balance_subscribed = False
+            self._settlements = {}
+            self._early_settled.clear()
+            self._inflight = {}
+            self._clear_prequotes()
+            self._down_since = {}
+            self.real_balance = None
+            self.real_balance_start = None
+
+            # recria clientes do zero
+            self._create_clients()
+
+            # reinicia
+            self.running = True
+            await self._start_internal()
+
+        except Exception as e:
+            self.ui("log_general", f"{utc_ts()} | [REBOOT] Falha: {repr(e)}")
+            self.running = False
+        finally:
+            self._restart_in_progress = False
+
+    def _on_any_disconnect(self, who: str, exc: Exception):
+        """
+        Queda de uma conexão: só ela reconecta (o próprio connect_forever faz isso);
+        as outras, os contadores e o P/L da sessão ficam intactos.
+        """
+        if not self.running:
+            return
+        if self._stopping or self._restart_in_progress:
+            return
+        if who not in self._down_since:
+            self._down_since[who] = time.time()
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] {who} caiu ({exc}) -> reconectando só essa conexão.")
+
+    def _on_any_connect(self, who: str):
+        down_since = self._down_since.pop(who, None)
+        if down_since is None or not self.running:
+            return
+        self.ui("log_general", f"{utc_ts()} | [{who}] Recuperado em {(time.time() - down_since) * 1000:.0f}ms (sessão mantida).")
+
+        # o stream proposal_open_contract morreu com a conexão antiga: retoma por contract_id
+        for contract_id, client in list(self._inflight.items()):
+            if client.name == who:
+                payload = {"proposal_open_contract": 1, "contract_id": contract_id, "subscribe": 1}
+                asyncio.create_task(self._send_quiet(client, payload))
+
+    def _ui_lanes(self):
+        totals = {lane: {"n": 0, "collapsed": 0, "depth_max": 0, "lag_max_ms": 0.0} for lane in ("ordem", "ticks", "saldo")}
+        for client in (*self._all_clients(), *self.hub.publics):
+            for lane, st in client.lane_stats.items():
+                t = totals[lane]
+                t["n"] += st["n"]
+                t["collapsed"] += st["collapsed"]
+                t["depth_max"] = max(t["depth_max"], st["depth_max"])
+                t["lag_max_ms"] = max(t["lag_max_ms"], st["lag_max_ms"])
+        self.ui("ui_lanes", totals)
+
+    def stats_snapshot(self) -> list[dict]:
+        """
+        Por símbolo: estatísticas de paridade do feed + acerto dos sinais deste engine.
+        """
+        return [
+            {"symbol": sym, **self.hub.stats[sym].snapshot(), **self.signal_stats[sym].snapshot()}
+            for sym in ALLOWED_SYMBOLS
+        ]
+
+    def _ui_stats(self):
+        self.ui("ui_stats", self.stats_snapshot())
+
+    def _ui_rules(self):
+        self.ui("ui_rules", self.rules.snapshot())
+
+    async def _dump_metrics(self):
+        rows = self.metrics.snapshot()
+        if not rows:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.metrics.dump_json, self.metrics_file, rows)
+        except Exception as e:
+            self.ui("log_general", f"{utc_ts()} | [MÉTRICAS] ERRO ao gravar {self.metrics_file}: {e}")
+
+    async def _metrics_loop(self):
+        """
+        Aba Métricas a cada METRICS_UI_INTERVAL e dump JSON a cada METRICS_DUMP_INTERVAL.
+        """
+        last_dump = time.time()
+        while True:
+            await asyncio.sleep(METRICS_UI_INTERVAL)
+            self.ui("ui_metrics", self.metrics.snapshot())
+            self._ui_lanes()
+            self._ui_stats()
+            self._ui_rules()
+            if time.time() - last_dump >= METRICS_DUMP_INTERVAL:
+                last_dump = time.time()
+                await self._dump_metrics()
+
+    def _on_real_msg(self, data):
+        if data.get("msg_type") == "balance":
+            bal = data.get("balance", {}).get("balance")
+            if bal is not None:
+                try:
+                    bal = float(bal)
+                    self.real_balance = bal
+                    if self.real_balance_start is None:
+                        self.real_balance_start = bal
+                    self.ui("ui_balance", {"balance": bal, "start": self.real_balance_start})
+                except Exception:
+                    pass
+
+    def on_market_tick(self, symbol: str, parities, last_digit, uniform, t_recv: float):
+        """
+        Tick já decodificado pelo MarketDataHub (uma vez para todos os engines).
+        `uniform` é a paridade comum a todos os dígitos do preço, ou None.
+        As regras avançam em todo tick (estado incremental), a direção sai da primeira que casar.
+        """
+        if not self.running:
+            return
+
+        stats = self.hub.stats.get(symbol)
+        direction = self.rules.evaluate(symbol, last_digit, uniform, stats, time.time())
+        if direction is None:
+            return
+
+        if self.min_uniform_pct > 0 and stats is not None and stats.uniform_rate(UNIFORM_FILTER_WINDOW) * 100.0 < self.min_uniform_pct:
+            self.signals_filtered += 1
+            return
+
+        self._submit_signal(symbol, direction, t_recv)
+
+    # ---------- scheduler ----------
+    def _ui_sched(self):
+        self.ui("ui_sched", {
+            "open": sum(self._open_by_account.values()),
+            "open_stake": round2(self._open_stake),
+            "queued": len(self._signal_queue),
+            "dropped": self.signals_dropped,
+            "coalesced": self.signals_coalesced,
+            "filtered": self.signals_filtered,
+        })
+
+    def _next_account(self):
+        if self.virtual_mode:
+            return "REAL" if self._armed_real_next else "DEMO"
+        return "REAL"
+
+    def _try_dispatch(self, symbol: str, direction: str, t_tick: float):
+        account = self._next_account()
+        stake = round2(self.stake)
+
+        if self._open_by_symbol.get(symbol, 0) >= self.max_per_symbol:
+            return False
+        if self._open_by_account.get(account, 0) >= self.max_per_account:
+            return False
+        if self.max_exposure > 0 and self._open_stake + stake > self.max_exposure + 1e-9:
+            return False
+
+        if self.virtual_mode and account == "REAL":
+            # o gatilho vale para UM sinal: consome já no despacho
+            self._armed_real_next = False
+
+        plan = SignalPlan(
+            symbol=symbol,
+            direction=direction,
+            account=account,
+            base_stake=stake,
+            max_gale=int(self.max_gale),
+            mult=float(self.mult),
+            seq=self._dispatch_seq,
+            t_tick=t_tick,
+        )
+        plan.t_plan = self.metrics.since("tick→sinal", t_tick, symbol, account)
+        self._dispatch_seq += 1
+
+        self._open_by_symbol[symbol] = self._open_by_symbol.get(symbol, 0) + 1
+        self._open_by_account[account] = self._open_by_account.get(account, 0) + 1
+        self._open_stake += stake
+
+        if self._first_signal_pending:
+            self._first_signal_pending = False
+            ms = (time.perf_counter() - self._start_perf) * 1000.0
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] Primeiro sinal em {ms:.0f}ms após start.")
+
+        asyncio.create_task(self._execute_signal(plan))
+        return True
+
+    def _submit_signal(self, symbol: str, direction: str, t_tick: float):
+        if not self._signal_queue and self._try_dispatch(symbol, direction, t_tick):
+            self._ui_sched()
+            return
+
+        if self.queue_max <= 0:
+            self.signals_dropped += 1
+        elif self.queue_policy == "COALESCER" and any(q[0] == symbol for q in self._signal_queue):
+            self._signal_queue = deque(q for q in self._signal_queue if q[0] != symbol)
+            self._signal_queue.append((symbol, direction, time.time(), t_tick))
+            self.signals_coalesced += 1
+        elif len(self._signal_queue) >= self.queue_max:
+            self.signals_dropped += 1
+        else:
+            self._signal_queue.append((symbol, direction, time.time(), t_tick))
+
+        self._drain_signal_queue()
+
+    def _drain_signal_queue(self):
+        if self.running:
+            now = time.time()
+            waiting = deque()
+            for symbol, direction, ts, t_tick in self._signal_queue:
+                if now - ts > self.signal_max_age:
+                    self.signals_dropped += 1
+                elif not self._try_dispatch(symbol, direction, t_tick):
+                    waiting.append((symbol, direction, ts, t_tick))
+            self._signal_queue = waiting
+        self._ui_sched()
+
+    def _release_slot(self, plan: SignalPlan, open_stake: float):
+        self._open_by_symbol[plan.symbol] = max(0, self._open_by_symbol.get(plan.symbol, 0) - 1)
+        self._open_by_account[plan.account] = max(0, self._open_by_account.get(plan.account, 0) - 1)
+        self._open_stake = max(0.0, self._open_stake - open_stake)
+        self._drain_signal_queue()
+
+    def _contract_params(self, symbol: str, direction: str, stake: float):
+        contract_type = "DIGITEVEN" if direction == "PAR" else "DIGITODD"
+        return {
+            "amount": stake,
+            "basis": "stake",
+            "contract_type": contract_type,
+            "currency": CURRENCY,
+            "duration": 1,
+            "duration_unit": "t",
+            "symbol": symbol,
+        }
+
+    async def _quote(self, client: DerivWSClient, symbol: str, direction: str, stake: float):
+        """
+        Proposal com o que o pré-cotado precisa guardar: id, subscription (se o servidor abriu
+        uma) e até quando o id é usado (PREQUOTE_TTL a partir da resposta).
+        """
+        payload = {"proposal": 1, **self._contract_params(symbol, direction, stake)}
+        t0 = time.perf_counter()
+        resp = await client.request(payload, timeout=45)
+        self.metrics.since("proposal", t0, symbol, client.name)
+        if resp.get("error"):
+            return None, resp["error"].get("message")
+        pid = resp.get("proposal", {}).get("id")
+        if not pid:
+            return None, "Proposal sem id"
+        return {
+            "id": pid,
+            "subscription_id": (resp.get("subscription") or {}).get("id"),
+            "expires_at": time.time() + PREQUOTE_TTL,
+        }, None
+
+    async def _proposal(self, client: DerivWSClient, symbol: str, direction: str, stake: float):
+        quote, err = await self._quote(client, symbol, direction, stake)
+        if err:
+            return None, err
+        return quote["id"], None
+
+    def _settlement_future(self, contract_id):
+        fut = self._settlements.get(contract_id)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._settlements[contract_id] = fut
+            early = self._early_settled.pop(contract_id, None)
+            if early is not None and early[1] > time.time():
+                fut.set_result(early[0])
+        return fut
+
+    def _stash_early_settlement(self, contract_id, settled: dict):
+        now = time.time()
+        early = self._early_settled
+        while early and next(iter(early.values()))[1] <= now:
+            early.popitem(last=False)
+        while len(early) >= EARLY_SETTLE_MAX:
+            early.popitem(last=False)
+        early[contract_id] = (settled, now + EARLY_SETTLE_TTL)
+
+    def _on_contract_msg(self, data):
+        """
+        Updates do stream proposal_open_contract (buy com subscribe=1).
+        Resolve o future do contract_id quando is_sold chega.
+        """
+        if data.get("msg_type") != "proposal_open_contract":
+            return
+        poc = data.get("proposal_open_contract") or {}
+        contract_id = poc.get("contract_id")
+        if not contract_id or not poc.get("is_sold"):
+            return
+
+        settled = {
+            "status": poc.get("status"),  # won/lost
+            "profit": float(poc.get("profit", 0.0) or 0.0),
+            "subscription_id": (data.get("subscription") or {}).get("id"),
+        }
+        fut = self._settlements.get(contract_id)
+        if fut is not None:
+            if not fut.done():
+                fut.set_result(settled)
+        elif self._buys_pending:
+            # o update final pode chegar antes do _wait_settlement registrar o waiter
+            self._stash_early_settlement(contract_id, settled)
+
+    async def _send_quiet(self, client: DerivWSClient, payload: dict):
+        try:
+            await client.send_only(payload, timeout=10)
+        except Exception:
+            pass
+
+    async def _wait_settlement(self, client: DerivWSClient, contract_id, timeout=35):
+        fut = self._settlement_future(contract_id)
+        self._inflight[contract_id] = client
+        try:
+            settled = await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+        except asyncio.TimeoutError:
+            # stream não entregou: uma consulta direta antes de desistir
+            t0 = time.perf_counter()
+            msg = await client.request({"proposal_open_contract": 1, "contract_id": contract_id}, timeout=45)
+            self.metrics.since("liquidação.consulta", t0, client.name)
+            if msg.get("error"):
+                return None, msg["error"].get("message")
+            poc = msg.get("proposal_open_contract", {})
+            if not poc.get("is_sold"):
+                return None, "Timeout aguardando resultado"
+            settled = {"status": poc.get("status"), "profit": float(poc.get("profit", 0.0) or 0.0)}
+        finally:
+            self._settlements.pop(contract_id, None)
+            self._inflight.pop(contract_id, None)
+
+        sid = settled.get("subscription_id")
+        if sid:
+            asyncio.create_task(self._send_quiet(client, {"forget": sid}))
+        return {"status": settled["status"], "profit": settled["profit"]}, None
+
+    def _forget_quote(self, client: DerivWSClient, quote):
+        sid = quote.get("subscription_id") if quote else None
+        if sid:
+            asyncio.create_task(self._send_quiet(client, {"forget": sid}))
+
+    @staticmethod
+    def _prequote_expiry(entry) -> float:
+        task, deadline, _ = entry
+        if task.done() and not task.cancelled() and task.result():
+            return task.result()["expires_at"]
+        return deadline  # em voo (ou falhou): prazo contado do envio
+
+    def _drop_prequote(self, entry):
+        task, _, client = entry
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            self._forget_quote(client, task.result())
+
+    def _evict_stale_prequotes(self):
+        now = time.time()
+        for key, entry in list(self._prequotes.items()):
+            if self._prequote_expiry(entry) <= now:
+                self._prequotes.pop(key, None)
+                self._drop_prequote(entry)
+
+    def _discard_prequote(self, account: str, symbol: str, direction: str, stake: float):
+        entry = self._prequotes.pop((account, symbol, direction, stake), None)
+        if entry is not None:
+            self._drop_prequote(entry)
+
+    def _clear_prequotes(self):
+        # conexões já fechadas: o servidor encerrou as subscriptions junto, só cancela as em voo
+        for task, _, _ in self._prequotes.values():
+            if not task.done():
+                task.cancel()
+        self._prequotes = {}
+
+    async def _prequote(self, client: DerivWSClient, symbol: str, direction: str, stake: float):
+        try:
+            quote, _ = await self._quote(client, symbol, direction, stake)
+            return quote
+        except Exception:
+            return None
+
+    def _start_prequote(self, client: DerivWSClient, plan: SignalPlan, stake: float):
+        self._evict_stale_prequotes()
+        key = (plan.account, plan.symbol, plan.direction, stake)
+        if key in self._prequotes:
+            return
+        task = asyncio.create_task(self._prequote(client, plan.symbol, plan.direction, stake))
+        self._prequotes[key] = (task, time.time() + PREQUOTE_TTL, client)
+
+    async def _take_prequote(self, account: str, symbol: str, direction: str, stake: float):
+        """
+        Cotação pré-cotada ainda no prazo (dict de _quote) ou None. Quem usa o id manda o
+        forget da subscription depois do buy.
+        """
+        self._evict_stale_prequotes()
+        entry = self._prequotes.pop((account, symbol, direction, stake), None)
+        if entry is None:
+            return None
+        # se a cotação ainda está em voo, esperar por ela ainda é mais rápido que uma nova
+        quote = await entry[0]
+        if quote is not None and quote["expires_at"] <= time.time():
+            self._forget_quote(entry[2], quote)
+            return None
+        return quote
+
+    async def _buy(self, client: DerivWSClient, payload: dict):
+        # subscribe=1 no buy: o servidor empurra proposal_open_contract até a venda.
+        # Sem reenvio: se a conexão cair depois do send o buy pode ter sido executado, e o
+        # ConnectionError sobe sem fallback para outra ordem
+        self._buys_pending += 1
+        try:
+            buy_resp = await client.request({**payload, "subscribe": 1}, timeout=45, retry=False)
+        finally:
+            self._buys_pending -= 1
+        err = buy_resp.get("error")
+        if err:
+            return None, err.get("message"), err.get("code")
+
+        contract_id = buy_resp.get("buy", {}).get("contract_id")
+        if not contract_id:
+            return None, "Buy sem contract_id", None
+        return contract_id, None, None
+
+    def _record_exec_latency(self, account: str, symbol: str, mode: str, t0: float):
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.metrics.record(f"buy.{mode}", ms, symbol, account)
+        st = self.exec_latency.setdefault(mode, {"n": 0, "sum_ms": 0.0, "min_ms": ms, "max_ms": ms})
+        st["n"] += 1
+        st["sum_ms"] += ms
+        st["min_ms"] = min(st["min_ms"], ms)
+        st["max_ms"] = max(st["max_ms"], ms)
+        self.ui("log_general", f"{utc_ts()} | [{account}] BUY {mode} {ms:.0f}ms (média {st['sum_ms'] / st['n']:.0f}ms n={st['n']})")
+
+    async def _open_contract(self, client: DerivWSClient, plan: SignalPlan, stake: float):
+        """
+        Coloca a ordem conforme exec_mode.
+        - DIRETO: um único buy com parameters (sem round trip de proposal)
+        - PROPOSTA: proposal + buy; também é o fallback quando o servidor rejeita a forma
+          com parameters do DIRETO (DIRETO_FALLBACK_CODES; os demais erros voltam direto)
+          (usa a proposal pré-cotada do gale quando houver)
+        """
+        if self.exec_mode == "DIRETO":
+            t0 = time.perf_counter()
+            params = self._contract_params(plan.symbol, plan.direction, stake)
+            contract_id, err, code = await self._buy(client, {"buy": 1, "price": stake, "parameters": params})
+            if not err:
+                self._record_exec_latency(plan.account, plan.symbol, "DIRETO", t0)
+                return contract_id, None
+            if code not in DIRETO_FALLBACK_CODES:
+                return None, err
+            self.ui("log_general", f"{utc_ts()} | [{plan.account}] BUY DIRETO rejeitado {plan.symbol}: {err} -> proposal+buy")
+
+        t0 = time.perf_counter()
+        quote = await self._take_prequote(plan.account, plan.symbol, plan.direction, stake)
+        if quote:
+            try:
+                contract_id, err, _ = await self._buy(client, {"buy": quote["id"], "price": stake})
+            finally:
+                self._forget_quote(client, quote)
+            if not err:
+                self._record_exec_latency(plan.account, plan.symbol, "PRE-COTADO", t0)
+                return contract_id, None
+            # id expirado/recusado: segue com uma proposal nova
+
+        pid, perr = await self._proposal(client, plan.symbol, plan.direction, stake)
+        if perr:
+            return None, f"PROPOSAL: {perr}"
+        contract_id, err, _ = await self._buy(client, {"buy": pid, "price": stake})
+        if not err:
+            self._record_exec_latency(plan.account, plan.symbol, "PROPOSTA", t0)
+        return contract_id, err
+
+    def _growth_value(self):
+        if self.real_balance is not None and self.real_balance_start is not None:
+            return float(self.real_balance - self.real_balance_start)
+        return None
+
+    async def _check_stop_win_and_maybe_stop(self):
+        if not self.running:
+            return
+        if self.stop_win <= 0:
+            return
+
+        growth = self._growth_value()
+        metric = growth if growth is not None else float(self.real_profit)
+        if metric >= float(self.stop_win):
+            self.ui("log_general", f"{utc_ts()} | [STOP WIN] Alvo atingido: {metric:.2f} >= {self.stop_win:.2f}. Parando engine.")
+            await self.stop()
+
+    async def _execute_signal(self, plan: SignalPlan):
+        open_stake = plan.base_stake
+        final_status = None
+        signal_id = None
+        prequoted = None
+        try:
+            if not self.running:
+                return
+
+            client = self.real if plan.account == "REAL" else self.demo
+
+            signal_id = f"{int(time.time()*1000)}-{plan.seq}"
+            open_line = f"{utc_ts()} | EXEC OPEN | {plan.account} | {plan.symbol} | {plan.direction} | stake={round2(plan.base_stake):.2f} | gale_max={plan.max_gale} | mult={plan.mult}"
+            self.log_market_exec(plan.symbol, open_line)
+
+            self.journal.add_op({
+                "id": signal_id,
+                "time": utc_ts(),
+                "symbol": plan.symbol,
+                "account": plan.account,
+                "direction": plan.direction,
+                "stake": round2(plan.base_stake),
+                "gale": 0,
+                "status": "OPEN",
+                "profit": None,
+            })
+
+            total_profit = 0.0
+            current_stake = round2(plan.base_stake)
+            used_gale = 0
+
+            while True:
+                if not self.running:
+                    final_status = "STOP"
+                    break
+
+                contract_id, berr = await self._open_contract(client, plan, current_stake)
+                if berr:
+                    self.ui("log_general", f"{utc_ts()} | [{plan.account}] BUY ERRO {plan.symbol}: {berr}")
+                    final_status = "ERROR"
+                    break
+
+                t_bought = time.perf_counter()
+                if used_gale == 0:
+                    self.metrics.record("sinal→buy", (t_bought - plan.t_plan) * 1000.0, plan.symbol, plan.account)
+                    self.metrics.record("tick→buy", (t_bought - plan.t_tick) * 1000.0, plan.symbol, plan.account)
+
+                if self.exec_mode == "PROPOSTA" and used_gale < plan.max_gale:
+                    # o stake do próximo gale já é conhecido: cota enquanto o contrato corre
+                    prequoted = round2(current_stake * plan.mult)
+                    self._start_prequote(client, plan, prequoted)
+
+                result, werr = await self._wait_settlement(client, contract_id)
+                self.metrics.since("buy→liquidação", t_bought, plan.symbol, plan.account)
+                if werr:
+                    self.ui("log_general", f"{utc_ts()} | [{plan.account}] WAIT ERRO {plan.symbol}: {werr}")
+                    final_status = "ERROR"
+                    break
+
+                status = result.get("status")
+                profit = float(result.get("profit", 0.0))
+                total_profit += profit
+
+                step_status = "WIN" if status == "won" else "LOSS"
+                self.journal.add_step(signal_id, used_gale, contract_id, current_stake, step_status, round2(profit), utc_ts())
+                self.journal.update_op(signal_id, gale=used_gale, status=step_status, profit=round2(total_profit))
+
+                if status == "won":
+                    final_status = "WIN"
+                    break
+
+                if used_gale >= plan.max_gale:
+                    final_status = "LOSS"
+                    break
+
+                next_stake = round2(current_stake * plan.mult)
+                if self.max_exposure > 0 and self._open_stake - open_stake + next_stake > self.max_exposure + 1e-9:
+                    # o teto vale para a escada inteira, não só para o despacho
+                    self.ui("log_general", f"{utc_ts()} | [{plan.account}] GALE bloqueado por exposição {plan.symbol}: "
+                                           f"stake={next_stake:.2f} aberto={self._open_stake - open_stake:.2f} teto={self.max_exposure:.2f}")
+                    final_status = "STOP"
+                    break
+
+                used_gale += 1
+                current_stake = next_stake
+                self._open_stake += current_stake - open_stake
+                open_stake = current_stake
+                self.ui("log_general", f"{utc_ts()} | [{plan.account}] GALE {used_gale}/{plan.max_gale} {plan.symbol} {plan.direction} stake={current_stake:.2f}")
+
+            if final_status in ("ERROR", "STOP"):
+                self.journal.update_op(signal_id, status=final_status)
+
+            close_line = f"{utc_ts()} | EXEC CLOSE | {plan.account} | {plan.symbol} | {plan.direction} | result={final_status} | profit_total={round2(total_profit):.2f} | gales_used={used_gale}"
+            self.log_market_exec(plan.symbol, close_line)
+
+            if plan.account == "REAL":
+                if final_status == "WIN":
+                    self.real_wins += 1
+                elif final_status == "LOSS":
+                    self.real_losses += 1
+                self.real_profit = round2(self.real_profit + total_profit)
+                self.ui("ui_pl", {
+                    "wins": self.real_wins,
+                    "losses": self.real_losses,
+                    "profit": self.real_profit,
+                    "balance": self.real_balance,
+                    "start": self.real_balance_start,
+                })
+                await self._check_stop_win_and_maybe_stop()
+
+        except Exception as e:
+            self.ui("log_general", f"{utc_ts()} | [ENGINE] Erro execução: {repr(e)}")
+            if final_status not in ("WIN", "LOSS"):
+                # timeout/queda no buy, proposal ou consulta: a linha não pode ficar OPEN
+                final_status = "ERROR"
+                if signal_id is not None:
+                    self.journal.update_op(signal_id, status="ERROR")
+        finally:
+            if prequoted is not None:
+                # sequência acabou antes do gale cotado (ou com ele já usado: no-op)
+                self._discard_prequote(plan.account, plan.symbol, plan.direction, prequoted)
+            if final_status in ("WIN", "LOSS"):
+                self.signal_stats[plan.symbol].record(final_status == "WIN")
+            self._record_virtual_result(plan, final_status)
+            self._release_slot(plan, open_stake)
+
+    def _record_virtual_result(self, plan: SignalPlan, final_status):
+        if plan.seq < self._vnext:
+            return
+        self._vresults[plan.seq] = (plan.account, final_status)
+        while self._vnext in self._vresults:
+            account, status = self._vresults.pop(self._vnext)
+            self._vnext += 1
+            self._apply_virtual_result(account, status)
+
+    def _apply_virtual_result(self, account: str, final_status):
+        if not (self.virtual_mode and self.running):
+            return
+        if account == "DEMO":
+            if final_status == "WIN":
+                self.vwin_streak += 1
+                self.vloss_streak = 0
+            elif final_status == "LOSS":
+                self.vloss_streak += 1
+                self.vwin_streak = 0
+
+            armed = False
+            if self.vwin_target > 0 and self.vwin_streak >= self.vwin_target:
+                armed = True
+            if self.vloss_target > 0 and self.vloss_streak >= self.vloss_target:
+                armed = True
+
+            if armed:
+                self._armed_real_next = True
+                self.ui("log_general", f"{utc_ts()} | [VIRTUAL] Gatilho atingido -> PRÓXIMO sinal em REAL.")
+
+            self.ui("ui_virtual_state", {"vwin": self.vwin_streak, "vloss": self.vloss_streak, "armed": self._armed_real_next})
+        else:
+            self._armed_real_next = False
+            self.vwin_streak = 0
+            self.vloss_streak = 0
+            self.ui("ui_virtual_state", {"vwin": 0, "vloss": 0, "armed": False})
+            self.ui("log_general", f"{utc_ts()} | [VIRTUAL] Sinal REAL finalizado -> volta para DEMO.")
+
+
+def load_config(path: str = CONFIG_FILE) -> dict:
+    """
+    Config salva pela UI (par_impar_config.json); ausente ou inválida -> {}.
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+            if isinstance(cfg, dict):
+                return cfg
+    except Exception:
+        pass
+    return {}
+
+
+def engine_kwargs_from_config(cfg: dict) -> dict:
+    """
+    Converte a config salva (strings como digitadas na UI) nos kwargs de TradingEngine.set_config.
+    Levanta ValueError com a mesma mensagem que a UI mostra.
+    """
+    def num(key, default, cast):
+        raw = str(cfg.get(key, "") or "").strip().replace(",", ".")
+        return cast(raw or default)
+
+    stake = num("stake", "", float)
+    stop_win = num("stop_win", "0", float)
+    max_symbol = num("max_symbol", DEFAULT_MAX_PER_SYMBOL, int)
+    max_account = num("max_account", DEFAULT_MAX_PER_ACCOUNT, int)
+    max_exposure = num("max_exposure", DEFAULT_MAX_EXPOSURE, float)
+    queue_max = num("queue_max", DEFAULT_QUEUE_MAX, int)
+    signal_max_age = num("signal_max_age", DEFAULT_SIGNAL_MAX_AGE, float)
+    min_uniform = num("min_uniform", "0", float)
+    public_connections = num("public_connections", DEFAULT_PUBLIC_CONNECTIONS, int)
+
+    if stake <= 0:
+        raise ValueError("Stake deve ser > 0")
+    if stop_win < 0:
+        raise ValueError("Stop Win deve ser >= 0")
+    if max_symbol < 1 or max_account < 1:
+        raise ValueError("Simultâneos deve ser >= 1")
+    if max_exposure < 0 or queue_max < 0:
+        raise ValueError("Exposição máx e Fila devem ser >= 0")
+    if signal_max_age <= 0:
+        raise ValueError("Idade máx do sinal deve ser > 0")
+    if public_connections < 1:
+        raise ValueError("Conexões PUBLIC deve ser >= 1")
+    if not 0 <= min_uniform <= 100:
+        raise ValueError("Uniforme mín % deve estar entre 0 e 100")
+    rules = cfg.get("rules") or None
+    if rules is not None:
+        try:
+            RuleSet(rules, ALLOWED_SYMBOLS)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Regras inválidas: {e}") from None
+
+    return {
+        "virtual_mode": bool(cfg.get("virtual_mode", True)),
+        "vwin_target": num("vwin", "0", int),
+        "vloss_target": num("vloss", "0", int),
+        "trigger_mode": cfg.get("trigger_mode", "SEQUENCIA"),
+        "stake": round2(stake),
+        "max_gale": num("gale", "0", int),
+        "mult": num("mult", "", float),
+        "stop_win": round2(stop_win),
+        "exec_mode": cfg.get("exec_mode", "DIRETO"),
+        "parse_thread": bool(cfg.get("parse_thread", False)),
+        "record_ticks": bool(cfg.get("record_ticks", False)),
+        "shm_ring": bool(cfg.get("shm_ring", False)),
+        "public_connections": public_connections,
+        "max_per_symbol": max_symbol,
+        "max_per_account": max_account,
+        "max_exposure": round2(max_exposure),
+        "queue_max": queue_max,
+        "queue_policy": cfg.get("queue_policy", DEFAULT_QUEUE_POLICY),
+        "signal_max_age": signal_max_age,
+        "min_uniform_pct": min_uniform,
+        "rules": rules,
+    }
@@ -0,0 +1,441 @@
+"""
+Modo headless: TradingEngine no loop asyncio principal, sem tkinter, configurado pelo
+par_impar_config.json (o mesmo que a janela salva).
+
+API HTTP local (só stdlib, asyncio.start_server):
+
+- GET  /status   rodando?, P/L, sequências virtuais, saldo, scheduler, shards, lanes e
+                 estatísticas por símbolo (paridade em janelas, sequências, acerto)
+- GET  /metrics  histogramas de latência (as mesmas linhas da aba Métricas)
+- GET  /events   stream SSE com os eventos do engine; ?channels=log_general,ui_pl filtra
+- POST /start    inicia; corpo JSON opcional sobrescreve chaves da config (só nesta execução)
+- POST /stop     para
+- POST /reset    zera contadores (como o botão Resetar)
+
+Várias estratégias num processo: "strategies" na config é uma lista de overrides com "name",
+ex. [{"name": "rev", "trigger_mode": "REVERSAO", "mult": "2.5"}, {"name": "seq", "gale": "1"}].
+Cada uma vira um TradingEngine (contas, contadores, diário e métricas próprios) sobre UM
+MarketDataHub: um feed PUBLIC e um decode por tick para todas. Nesse modo ?engine=<nome>
+escolhe a estratégia (sem ele, /start, /stop e /reset valem para todas) e os eventos SSE
+de cada uma saem como "<nome>:<canal>".
+
+Com --api-token (ou PAR_IMPAR_API_TOKEN) toda requisição precisa de "Authorization: Bearer <token>".
+
+    python par_impar_headless.py --port 8787 --autostart
+    curl -s localhost:8787/status
+    curl -N localhost:8787/events?channels=log_general
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import queue
+import signal
+from urllib.parse import parse_qs, urlsplit
+
+from par_impar_engine import (
+    CONFIG_FILE,
+    MarketDataHub,
+    TradingEngine,
+    engine_kwargs_from_config,
+    load_config,
+    utc_ts,
+)
+
+API_HOST = "127.0.0.1"
+API_PORT = 8787
+PUMP_INTERVAL = 0.05     # s entre drenagens das filas (threads do engine também publicam nelas)
+EVENTS_QUEUE_MAX = 1000  # eventos pendentes por cliente SSE; cliente lento perde eventos
+EVENTS_KEEPALIVE = 15.0  # s sem eventos -> comentário SSE para manter a conexão
+MAX_BODY = 64 * 1024
+# eventos de estado: o último de cada canal é o que /status devolve
+STATE_CHANNELS = ("ui_pl", "ui_virtual_state", "ui_balance", "ui_sched", "ui_shards", "ui_lanes", "ui_stats", "ui_rules")
+
+HTTP_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+}
+
+
+def _to_json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _strategy_names(cfg: dict):
+    names = []
+    for i, strategy in enumerate(cfg.get("strategies") or []):
+        name = str((strategy or {}).get("name") or f"s{i + 1}")
+        if name in names:
+            raise ValueError(f"estratégia repetida: {name}")
+        names.append(name)
+    return names
+
+
+class HeadlessRunner:
+    def __init__(self, config_path: str = CONFIG_FILE, api_token: str = "", quiet: bool = False):
+        self.config_path = config_path
+        self.api_token = api_token or ""
+        self.quiet = quiet
+
+        # um engine sem nome (como na janela) ou um por estratégia sobre um hub compartilhado
+        names = _strategy_names(load_config(config_path))
+        self.engines = {}
+        self._queues = []  # (nome da origem, fila); "" = feed / engine único
+        if names:
+            hub_queue = queue.Queue()
+            self.hub = MarketDataHub(hub_queue)
+            self._queues.append(("", hub_queue))
+            for name in names:
+                q = queue.Queue()
+                self.engines[name] = TradingEngine(q, hub=self.hub, name=name)
+                self._queues.append((name, q))
+        else:
+            q = queue.Queue()
+            self.engines[""] = TradingEngine(q)
+            self.hub = self.engines[""].hub
+            self._queues.append(("", q))
+        self.hub.display_symbols = set()  # sem abas: ticks só vão para o tail
+
+        self.states = {name: {} for name, _ in self._queues}
+        self._subscribers = {}  # asyncio.Queue -> canais (None = todos)
+        self._start_tasks = {}
+        self._pump_task = None
+        self._clients = set()  # tasks de conexão em andamento (encerradas no shutdown)
+
+    def _log(self, text: str):
+        self._queues[0][1].put(("log_general", f"{utc_ts()} | {text}"))
+
+    def _select(self, query: dict):
+        """
+        Engines alvo de um comando: ?engine=<nome> ou todos.
+        """
+        name = (query.get("engine") or [None])[0]
+        if name is None:
+            return list(self.engines.items())
+        if name not in self.engines:
+            raise KeyError(name)
+        return [(name, self.engines[name])]
+
+    # ---------- eventos do engine ----------
+    def _handle_event(self, source: str, channel, payload):
+        state = self.states[source]
+        if channel in STATE_CHANNELS:
+            state[channel] = payload
+        elif channel == "ui_reset_views":
+            state.pop("ui_balance", None)
+        elif channel == "ui_ops":
+            return  # só avisa que o diário mudou; quem quiser lê o SQLite
+
+        if not self.quiet:
+            prefix = f"[{source}] " if source else ""
+            if channel == "log_general":
+                print(f"{prefix}{payload}", flush=True)
+            elif channel == "log_market_exec":
+                print(f"{prefix}[{payload.get('symbol')}] {payload.get('line')}", flush=True)
+
+        event = f"{source}:{channel}" if source else channel
+        for q, channels in self._subscribers.items():
+            if channels is not None and channel not in channels:
+                continue
+            try:
+                q.put_nowait((event, payload))
+            except asyncio.QueueFull:
+                pass
+
+    def drain(self):
+        for source, q in self._queues:
+            while True:
+                try:
+                    channel, payload = q.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._handle_event(source, channel, payload)
+                except Exception:
+                    pass
+
+    async def _pump(self):
+        while True:
+            self.drain()
+            await asyncio.sleep(PUMP_INTERVAL)
+
+    # ---------- comandos ----------
+    def start(self, overrides=None, targets=None):
+        """
+        Config do arquivo (+ overrides da estratégia + overrides da chamada) -> set_config
+        e agenda engine.start(). Devolve os nomes iniciados; ValueError (config inválida)
+        sobe para quem chamou antes de iniciar qualquer um.
+        """
+        cfg = load_config(self.config_path)
+        strategies = {
+            name: strategy or {}
+            for name, strategy in zip(_strategy_names(cfg), cfg.pop("strategies", None) or [])
+        }
+        if targets is None:
+            targets = list(self.engines.items())
+
+        plans = []
+        for name, engine in targets:
+            task = self._start_tasks.get(name)
+            if engine.running or (task is not None and not task.done()):
+                continue
+            merged = {**cfg, **strategies.get(name, {}), **(overrides or {})}
+            merged.pop("name", None)
+            plans.append((name, engine, merged, engine_kwargs_from_config(merged)))
+        if not plans:
+            return []
+
+        if not self.hub.running and "" not in self.engines:
+            # hub compartilhado: shards/parser/gravação vêm da config base
+            base = engine_kwargs_from_config({**cfg, **(overrides or {})})
+            self.hub.configure(
+                public_connections=base["public_connections"],
+                parse_thread=base["parse_thread"],
+                record_ticks=base["record_ticks"],
+                shm_ring=base["shm_ring"],
+            )
+
+        for name, engine, merged, kwargs in plans:
+            engine.set_config(**kwargs)
+
+            def _done(t, engine=engine):
+                if not t.cancelled() and t.exception() is not None:
+                    engine.ui("log_general", f"{utc_ts()} | [API] ERRO start(): {repr(t.exception())}")
+
+            task = asyncio.create_task(engine.start(merged.get("demo_token", ""), merged.get("real_token", "")))
+            task.add_done_callback(_done)
+            self._start_tasks[name] = task
+        return [name for name, *_ in plans]
+
+    def _engine_status(self, name: str) -> dict:
+        e = self.engines[name]
+        state = self.states[name]
+        return {
+            "time": utc_ts(),
+            "running": e.running,
+            "virtual_mode": e.virtual_mode,
+            "pl": state.get("ui_pl", {
+                "wins": e.real_wins, "losses": e.real_losses, "profit": e.real_profit,
+                "balance": e.real_balance, "start": e.real_balance_start,
+            }),
+            "virtual": state.get("ui_virtual_state", {
+                "vwin": e.vwin_streak, "vloss": e.vloss_streak, "armed": e._armed_real_next,
+            }),
+            "balance": state.get("ui_balance"),
+            "sched": state.get("ui_sched"),
+            "shards": self.states[""].get("ui_shards"),
+            "lanes": state.get("ui_lanes"),
+            "stats": state.get("ui_stats"),
+            "rules": state.get("ui_rules", e.rules.snapshot()),
+        }
+
+    def status(self, targets) -> dict:
+        if "" in self.engines:
+            return self._engine_status("")
+        if len(targets) == 1:
+            return self._engine_status(targets[0][0])
+        return {
+            "time": utc_ts(),
+            "running": any(e.running for e in self.engines.values()),
+            "feed": {"running": self.hub.running, "shards": self.states[""].get("ui_shards")},
+            "engines": {name: self._engine_status(name) for name, _ in targets},
+        }
+
+    def metrics(self, targets) -> dict:
+        if "" in self.engines or len(targets) == 1:
+            return {"histograms": targets[0][1].metrics.snapshot()}
+        return {
+            "feed": self.hub.metrics.snapshot(),
+            "engines": {name: e.metrics.snapshot() for name, e in targets},
+        }
+
+    # ---------- HTTP ----------
+    def _authorized(self, headers: dict) -> bool:
+        if not self.api_token:
+            return True
+        auth = headers.get("authorization", "")
+        return auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].strip(), self.api_token)
+
+    async def _respond(self, writer, status: int, body=None):
+        data = _to_json(body if body is not None else {})
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode("ascii") + data
+        )
+        await writer.drain()
+
+    async def _events(self, writer, query: dict):
+        channels = None
+        if query.get("channels"):
+            channels = {c for c in query["channels"][0].split(",") if c}
+        q = asyncio.Queue(maxsize=EVENTS_QUEUE_MAX)
+        self._subscribers[q] = channels
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        # estado atual primeiro: quem conecta não espera o próximo evento para ter P/L
+        for source, state in self.states.items():
+            for channel in STATE_CHANNELS:
+                if channel in state and (channels is None or channel in channels):
+                    event = f"{source}:{channel}" if source else channel
+                    writer.write(f"event: {event}\ndata: ".encode("utf-8") + _to_json(state[channel]) + b"\n\n")
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    item = await asyncio.wait_for(q.get(), timeout=EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                else:
+                    if item is None:
+                        return  # shutdown
+                    event, payload = item
+                    writer.write(f"event: {event}\ndata: ".encode("utf-8") + _to_json(payload) + b"\n\n")
+                await writer.drain()
+        finally:
+            self._subscribers.pop(q, None)
+
+    async def _route(self, method: str, path: str, query: dict, body: bytes, writer):
+        if path not in ("/status", "/metrics", "/events", "/start", "/stop", "/reset"):
+            return await self._respond(writer, 404, {"ok": False, "error": "não encontrado"})
+        if method != ("GET" if path in ("/status", "/metrics", "/events") else "POST"):
+            return await self._respond(writer, 405, {"ok": False, "error": "método não permitido"})
+        try:
+            targets = self._select(query)
+        except KeyError as e:
+            return await self._respond(writer, 404, {"ok": False, "error": f"engine desconhecido: {e.args[0]}"})
+
+        if path == "/status":
+            return await self._respond(writer, 200, self.status(targets))
+        if path == "/metrics":
+            return await self._respond(writer, 200, self.metrics(targets))
+        if path == "/events":
+            return await self._events(writer, query)
+        if path == "/start":
+            try:
+                overrides = json.loads(body) if body.strip() else {}
+                if not isinstance(overrides, dict):
+                    raise ValueError("corpo deve ser um objeto JSON")
+                started = self.start(overrides, targets)
+            except ValueError as e:
+                return await self._respond(writer, 400, {"ok": False, "error": str(e)})
+            if not started:
+                return await self._respond(writer, 409, {"ok": False, "error": "já está rodando"})
+            return await self._respond(writer, 202, {"ok": True, "started": started})
+        if path == "/stop":
+            await asyncio.gather(*(e.stop() for _, e in targets))
+            return await self._respond(writer, 200, {"ok": True, "running": any(e.running for _, e in targets)})
+        # /reset
+        for _, e in targets:
+            e.reset_counters_and_views()
+        return await self._respond(writer, 200, {"ok": True})
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                k, _, v = line.partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            if not self._authorized(headers):
+                return await self._respond(writer, 401, {"ok": False, "error": "token inválido"})
+
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY:
+                return await self._respond(writer, 413, {"ok": False, "error": "corpo grande demais"})
+            body = await reader.readexactly(length) if length > 0 else b""
+
+            url = urlsplit(target)
+            await self._route(method.upper(), url.path, parse_qs(url.query), body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self._log(f"[API] ERRO: {repr(e)}")
+        finally:
+            self._clients.discard(task)
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    # ---------- ciclo de vida ----------
+    async def run(self, host: str = API_HOST, port: int = API_PORT, autostart: bool = False):
+        loop = asyncio.get_running_loop()
+        for engine in self.engines.values():
+            engine.loop = loop
+
+        stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C vira KeyboardInterrupt
+
+        self._pump_task = asyncio.create_task(self._pump())
+        server = await asyncio.start_server(self.handle_client, host, port)
+        names = ", ".join(n for n in self.engines if n)
+        self._log(f"[API] Ouvindo em http://{host}:{port}" + (f" | estratégias: {names}" if names else ""))
+
+        if autostart:
+            try:
+                self.start()
+            except ValueError as e:
+                self._log(f"[API] Config inválida: {e}")
+
+        try:
+            await stop_event.wait()
+        finally:
+            server.close()
+            # streams SSE terminam normalmente (task cancelada vira erro no asyncio.streams)
+            for q in self._subscribers:
+                while True:
+                    try:
+                        q.put_nowait(None)
+                        break
+                    except asyncio.QueueFull:
+                        q.get_nowait()
+            if self._clients:
+                await asyncio.wait(list(self._clients), timeout=2.0)
+            await asyncio.gather(*(e.stop() for e in self.engines.values() if e.running))
+            for engine in self.engines.values():
+                await loop.run_in_executor(None, engine.journal.close)
+            self._pump_task.cancel()
+            self.drain()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Par/Ímpar sem janela, com API HTTP local.")
+    ap.add_argument("--config", default=CONFIG_FILE, help="config salva pela janela (tokens e parâmetros)")
+    ap.add_argument("--host", default=API_HOST)
+    ap.add_argument("--port", type=int, default=API_PORT)
+    ap.add_argument("--autostart", action="store_true", help="inicia o(s) engine(s) sem esperar POST /start")
+    ap.add_argument("--api-token", default=os.environ.get("PAR_IMPAR_API_TOKEN", ""),
+                    help="exige Authorization: Bearer <token> (padrão: $PAR_IMPAR_API_TOKEN)")
+    ap.add_argument("--quiet", action="store_true", help="não imprime o log geral no stdout")
+    args = ap.parse_args()
+
+    runner = HeadlessRunner(args.config, api_token=args.api_token, quiet=args.quiet)
+    try:
+        asyncio.run(runner.run(args.host, args.port, autostart=args.autostart))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Diário de operações em SQLite (WAL): toda operação, cada passo de gale e o contract_id.
+
+- TradeJournal grava numa thread própria (o loop asyncio só enfileira), em lotes por transação;
+  on_commit() é chamado depois de cada lote confirmado. Lote com erro é refeito item a item:
+  só o item ruim se perde e vai para on_error(mensagem)
+- close() esvazia a fila e para a thread; a próxima escrita a sobe de novo (engine reiniciado)
+- JournalView é o lado de leitura (outra conexão, na thread da UI): contagem e página
+  filtradas por símbolo/conta/status usando os índices (coluna, n)
+"""
+import queue
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ops (
+    n INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    time TEXT,
+    symbol TEXT,
+    account TEXT,
+    direction TEXT,
+    stake REAL,
+    gale INTEGER,
+    status TEXT,
+    profit REAL
+);
+CREATE INDEX IF NOT EXISTS ops_symbol ON ops(symbol, n);
+CREATE INDEX IF NOT EXISTS ops_account ON ops(account, n);
+CREATE INDEX IF NOT EXISTS ops_status ON ops(status, n);
+CREATE TABLE IF NOT EXISTS steps (
+    op_id TEXT NOT NULL,
+    gale INTEGER NOT NULL,
+    contract_id INTEGER,
+    stake REAL,
+    status TEXT,
+    profit REAL,
+    time TEXT,
+    PRIMARY KEY (op_id, gale)
+);
+"""
+
+OP_COLUMNS = ("time", "symbol", "account", "direction", "stake", "gale", "status", "profit")
+FILTER_COLUMNS = ("symbol", "account", "status")
+
+
+def _connect(path: str):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TradeJournal:
+    """
+    Escrita sem custo no loop: add_op/update_op/add_step só fazem put_nowait.
+    """
+    def __init__(self, path: str, on_commit=None, on_error=None, flush_interval=0.25):
+        self.path = path
+        self.on_commit = on_commit
+        self.on_error = on_error
+        self.flush_interval = float(flush_interval)
+        self.errors = 0
+
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._q = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+            self._thread.start()
+
+    def _put(self, item):
+        self._q.put_nowait(item)
+        self._ensure_writer()
+
+    def add_op(self, op: dict):
+        self._put(("add", op))
+
+    def update_op(self, op_id: str, **fields):
+        self._put(("update", op_id, fields))
+
+    def add_step(self, op_id: str, gale: int, contract_id, stake: float, status: str, profit: float, time: str):
+        self._put(("step", (op_id, gale, contract_id, stake, status, profit, time)))
+
+    def _report(self, item, exc):
+        self.errors += 1
+        if self.on_error is not None:
+            try:
+                self.on_error(f"{item[0]} {item[1] if item[0] != 'step' else item[1][0]}: {exc}")
+            except Exception:
+                pass
+
+    def _apply(self, conn, item):
+        kind = item[0]
+        if kind == "add":
+            op = item[1]
+            conn.execute(
+                f"INSERT OR IGNORE INTO ops (id, {', '.join(OP_COLUMNS)}) VALUES (?{', ?' * len(OP_COLUMNS)})",
+                (op["id"], *(op.get(c) for c in OP_COLUMNS)),
+            )
+        elif kind == "update":
+            fields = {k: v for k, v in item[2].items() if k in OP_COLUMNS}
+            if fields:
+                sets = ", ".join(f"{k} = ?" for k in fields)
+                conn.execute(f"UPDATE ops SET {sets} WHERE id = ?", (*fields.values(), item[1]))
+        elif kind == "step":
+            conn.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)", item[1])
+
+    def _run(self):
+        conn = _connect(self.path)
+        try:
+            # estatísticas para o planner escolher o índice mais seletivo com filtros
+            # combinados (roda nesta thread, não trava a UI); refeitas ao fechar
+            conn.execute("ANALYZE")
+            while not (self._stop.is_set() and self._q.empty()):
+                try:
+                    batch = [self._q.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while True:
+                    try:
+                        batch.append(self._q.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    with conn:
+                        for item in batch:
+                            self._apply(conn, item)
+                except sqlite3.Error:
+                    # o lote voltou inteiro: refaz um por um para perder só o item ruim
+                    for item in batch:
+                        try:
+                            with conn:
+                                self._apply(conn, item)
+                        except sqlite3.Error as e:
+                            self._report(item, e)
+                if self.on_commit is not None:
+                    try:
+                        self.on_commit()
+                    except Exception:
+                        pass
+        finally:
+            try:
+                conn.execute("ANALYZE")
+            except sqlite3.Error:
+                pass
+            conn.close()
+
+    def close(self, timeout=5.0):
+        """
+        Grava o que está na fila e para a thread.
+        """
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join(timeout=timeout)
+        if not self._q.empty():
+            # escrita que entrou enquanto a thread saía: sobe outra para não perdê-la
+            self._ensure_writer()
+
+
+class JournalView:
+    """
+    Leitura paginada para a tabela virtualizada. `floor` esconde tudo até aquele n
+    (o Resetar da UI limpa a tela sem apagar o diário).
+    """
+    def __init__(self, path: str):
+        self.conn = _connect(path)
+        self.conn.executescript(SCHEMA)
+        self.filters = {}
+        self.floor = 0
+
+    def set_filters(self, **filters):
+        self.filters = {k: v for k, v in filters.items() if k in FILTER_COLUMNS and v}
+
+    def _where(self):
+        clauses = ["n > ?"]
+        args = [self.floor]
+        for col, val in self.filters.items():
+            clauses.append(f"{col} = ?")
+            args.append(val)
+        return " AND ".join(clauses), args
+
+    def max_n(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(n), 0) FROM ops").fetchone()[0]
+
+    def count(self) -> int:
+        where, args = self._where()
+        return self.conn.execute(f"SELECT COUNT(*) FROM ops WHERE {where}", args).fetchone()[0]
+
+    def tail(self, limit: int):
+        """
+        Última página sem OFFSET (custo constante, é o caso comum acompanhando o fim).
+        """
+        where, args = self._where()
+        rows = self.conn.execute(
+            f"SELECT id, {', '.join(OP_COLUMNS)} FROM ops WHERE {where} ORDER BY n DESC LIMIT ?",
+            (*args, int(limit)),
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def page(self, offset: int, limit: int):
+        where, args = self._where()
+        return self.conn.execute(
+            f"SELECT id, {', '.join(OP_COLUMNS)} FROM ops WHERE {where} ORDER BY n LIMIT ? OFFSET ?",
+            (*args, int(limit), max(0, int(offset))),
+        ).fetchall()
+
+    def steps(self, op_id: str):
+        return self.conn.execute(
+            "SELECT gale, contract_id, stake, status, profit, time FROM steps WHERE op_id = ? ORDER BY gale",
+            (op_id,),
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,124 @@
+"""
+Histogramas de latência estilo HDR (log-linear) por etapa do caminho tick -> sinal -> buy -> liquidação.
+
+- valores em microssegundos; até 64µs exatos, acima disso 32 sub-buckets por potência de 2 (~3% de erro)
+- record() é O(1) com dict esparso; nada é alocado por amostra além do contador
+- cada amostra entra no agregado da etapa ("*") e nas chaves pedidas (símbolo, conta, conexão)
+"""
+import json
+import os
+import time
+
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS       # 32
+LINEAR_MAX = 2 * SUB_COUNT      # 64µs: abaixo disso cada µs é um bucket
+
+
+def _bucket_of(us: int) -> int:
+    if us < LINEAR_MAX:
+        return us
+    shift = us.bit_length() - SUB_BITS - 1
+    return LINEAR_MAX + (shift - 1) * SUB_COUNT + ((us >> shift) - SUB_COUNT)
+
+
+def _bucket_high(b: int) -> int:
+    """
+    Maior valor (µs) que cai no bucket b.
+    """
+    if b < LINEAR_MAX:
+        return b
+    shift = (b - LINEAR_MAX) // SUB_COUNT + 1
+    mantissa = (b - LINEAR_MAX) % SUB_COUNT + SUB_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "n", "sum_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts = {}
+        self.n = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def record_ms(self, ms: float):
+        us = int(ms * 1000.0) if ms > 0 else 0
+        b = _bucket_of(us)
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.n += 1
+        self.sum_us += us
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile_ms(self, p: float) -> float:
+        if self.n == 0:
+            return 0.0
+        target = max(1, int(self.n * p / 100.0 + 0.999999))
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= target:
+                return min(_bucket_high(b), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self) -> dict:
+        return {
+            "n": self.n,
+            "mean_ms": round(self.sum_us / self.n / 1000.0, 3) if self.n else 0.0,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "p50_ms": self.percentile_ms(50),
+            "p90_ms": self.percentile_ms(90),
+            "p99_ms": self.percentile_ms(99),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+class LatencyMetrics:
+    """
+    Histogramas por (etapa, chave). A chave "*" é o agregado da etapa.
+    """
+    def __init__(self):
+        self.hists = {}
+        self.started_at = time.time()
+
+    def record(self, stage: str, ms: float, *keys):
+        for key in ("*", *keys):
+            h = self.hists.get((stage, key))
+            if h is None:
+                h = self.hists[(stage, key)] = LatencyHistogram()
+            h.record_ms(ms)
+
+    def since(self, stage: str, t0: float, *keys):
+        """
+        Registra time.perf_counter() - t0 e devolve o instante atual (para encadear etapas).
+        """
+        now = time.perf_counter()
+        self.record(stage, (now - t0) * 1000.0, *keys)
+        return now
+
+    def reset(self):
+        self.hists.clear()
+        self.started_at = time.time()
+
+    def snapshot(self) -> list[dict]:
+        rows = []
+        for (stage, key), h in sorted(self.hists.items()):
+            rows.append({"stage": stage, "key": key, **h.summary()})
+        return rows
+
+    def dump_json(self, path: str, rows=None):
+        """
+        Escrita atômica (tmp + replace): quem lê o arquivo nunca vê um JSON pela metade.
+        """
+        doc = {
+            "generated_at": time.time(),
+            "started_at": self.started_at,
+            "histograms": rows if rows is not None else self.snapshot(),
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
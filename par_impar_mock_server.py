@@ -0,0 +1,391 @@
+"""
+Servidor WebSocket local compatível com o subconjunto da API Deriv que o bot usa:
+authorize, ticks (string ou lista), balance, proposal, buy (proposal id ou parameters),
+proposal_open_contract (consulta ou subscribe) e forget.
+
+- ticks vêm de uma gravação (par_impar_recorder) ou de um random walk sintético com seed
+- o relógio dos ticks anda `speed` vezes mais rápido que o tempo real
+- respostas com latência + jitter configuráveis, perda de respostas (drop) e quedas de conexão
+- contratos DIGITEVEN/DIGITODD de 1 tick liquidam no próximo tick do símbolo
+
+Modo replay (engine real contra o servidor local):
+    python par_impar_mock_server.py --ticks ticks/ --speed 20 --latency 0.03 --jitter 0.02
+    DERIV_WS_URL=ws://127.0.0.1:8765 python par_impar_decoder_gui.py
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+
+import websockets
+
+from par_impar_engine import ALLOWED_SYMBOLS, TickDecoder
+from par_impar_money import round2
+from par_impar_recorder import replay_messages
+
+# pip_size por símbolo no gerador sintético (aproxima o que a Deriv publica)
+SYNTH_PIPS = {
+    "R_10": 3, "R_25": 3, "R_50": 4, "R_75": 4, "R_100": 2,
+    "1HZ10V": 2, "1HZ25V": 2, "1HZ50V": 2, "1HZ75V": 2, "1HZ100V": 2,
+    "RDBULL": 4, "RDBEAR": 4,
+}
+
+
+def synthetic_messages(symbols, seed=0, start_epoch=None):
+    """
+    Random walk infinito e determinístico; um tick por segundo por símbolo.
+    """
+    rng = random.Random(seed)
+    epoch = int(start_epoch if start_epoch is not None else time.time())
+    prices = {s: 1000.0 + 100.0 * i for i, s in enumerate(symbols)}
+    while True:
+        epoch += 1
+        for sym in symbols:
+            prices[sym] = max(1.0, prices[sym] * math.exp(rng.gauss(0.0, 0.0005)))
+            yield {
+                "msg_type": "tick",
+                "tick": {"symbol": sym, "epoch": epoch, "quote": prices[sym], "pip_size": SYNTH_PIPS.get(sym, 2)},
+            }
+
+
+class _Session:
+    def __init__(self, ws):
+        self.ws = ws
+        self.token = None
+        self.tick_subs = {}       # symbol -> (subscription id, req_id)
+        self.balance_sub = None   # (subscription id, req_id)
+        self.poc_subs = {}        # contract_id -> (subscription id, req_id)
+
+
+class MockDerivServer:
+    def __init__(
+        self,
+        source,
+        *,
+        speed=1.0,
+        latency=0.0,
+        jitter=0.0,
+        drop_rate=0.0,
+        disconnect_every=0.0,
+        payout=0.95,
+        start_balance=10000.0,
+        proposal_ttl=30.0,
+        seed=0,
+    ):
+        self.source = iter(source)
+        self.speed = float(speed)
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.drop_rate = float(drop_rate)
+        self.disconnect_every = float(disconnect_every)
+        self.payout = float(payout)
+        self.start_balance = float(start_balance)
+        self.proposal_ttl = float(proposal_ttl)
+        self.rng = random.Random(seed)
+
+        self.sessions = set()
+        self.balances = {}    # token -> saldo
+        self.proposals = {}   # id -> (params, expira_em)
+        self.contracts = {}   # contract_id -> dict
+        self.open_by_symbol = {}
+        self.last_tick = {}
+        self._ids = itertools.count(1000)
+        self._decoder = TickDecoder()
+
+        self.stats = {"ticks": 0, "requests": 0, "dropped": 0, "disconnects": 0, "contracts": 0}
+
+    # ---------- envio ----------
+    async def _send(self, session: _Session, msg: dict):
+        try:
+            await session.ws.send(json.dumps(msg))
+        except Exception:
+            pass
+
+    async def _reply_later(self, session: _Session, msg: dict):
+        delay = self.latency + (self.rng.uniform(0.0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._send(session, msg)
+
+    def _reply(self, session: _Session, req: dict, msg_type: str, body=None, error=None, subscription=None):
+        if self.drop_rate > 0 and self.rng.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            return
+        msg = {"echo_req": req, "msg_type": msg_type}
+        if "req_id" in req:
+            msg["req_id"] = req["req_id"]
+        if error is not None:
+            msg["error"] = {"code": error[0], "message": error[1]}
+        else:
+            msg[msg_type] = body
+        if subscription is not None:
+            msg["subscription"] = {"id": subscription}
+        asyncio.create_task(self._reply_later(session, msg))
+
+    def _new_id(self) -> str:
+        return f"mock-{next(self._ids)}"
+
+    # ---------- relógio de ticks ----------
+    async def _tick_clock(self):
+        prev_epoch = None
+        for msg in self.source:
+            tick = msg["tick"]
+            epoch = tick["epoch"]
+            if prev_epoch is not None and epoch > prev_epoch:
+                await asyncio.sleep((epoch - prev_epoch) / self.speed)
+            prev_epoch = epoch
+
+            sym = tick["symbol"]
+            self.last_tick[sym] = tick
+            self.stats["ticks"] += 1
+            self._settle_symbol(sym, tick)
+
+            for session in list(self.sessions):
+                sub = session.tick_subs.get(sym)
+                if sub is not None:
+                    out = {"msg_type": "tick", "tick": dict(tick, id=sub[0]), "subscription": {"id": sub[0]}}
+                    if sub[1] is not None:
+                        out["req_id"] = sub[1]
+                    asyncio.create_task(self._send(session, out))
+
+    def _settle_symbol(self, sym: str, tick: dict):
+        ids = self.open_by_symbol.pop(sym, None)
+        if not ids:
+            return
+        _, _, last_digit, _ = self._decoder.decode(tick["quote"], tick.get("pip_size"))
+        for cid in ids:
+            c = self.contracts[cid]
+            even = last_digit % 2 == 0
+            won = even if c["contract_type"] == "DIGITEVEN" else not even
+            c["is_sold"] = 1
+            c["status"] = "won" if won else "lost"
+            c["profit"] = round2(c["buy_price"] * self.payout) if won else -c["buy_price"]
+            c["exit_tick"] = tick["quote"]
+            if won:
+                self.balances[c["token"]] = round2(self.balances[c["token"]] + c["buy_price"] + c["profit"])
+            self._push_contract(c)
+            self._push_balance(c["token"])
+
+    def _poc_body(self, c: dict) -> dict:
+        return {
+            "contract_id": c["contract_id"],
+            "contract_type": c["contract_type"],
+            "underlying": c["symbol"],
+            "buy_price": c["buy_price"],
+            "is_sold": c["is_sold"],
+            "status": c["status"],
+            "profit": c["profit"],
+        }
+
+    def _push_contract(self, c: dict):
+        for session in list(self.sessions):
+            sub = session.poc_subs.pop(c["contract_id"], None)
+            if sub is not None:
+                req = {"proposal_open_contract": 1, "contract_id": c["contract_id"], "subscribe": 1}
+                if sub[1] is not None:
+                    req["req_id"] = sub[1]
+                self._reply(session, req, "proposal_open_contract", self._poc_body(c), subscription=sub[0])
+
+    def _push_balance(self, token: str):
+        for session in list(self.sessions):
+            if session.token == token and session.balance_sub is not None:
+                req = {"balance": 1, "subscribe": 1}
+                if session.balance_sub[1] is not None:
+                    req["req_id"] = session.balance_sub[1]
+                body = {"balance": self.balances[token], "currency": "USD"}
+                self._reply(session, req, "balance", body, subscription=session.balance_sub[0])
+
+    # ---------- requisições ----------
+    def _contract_params(self, p: dict):
+        ctype = p.get("contract_type")
+        sym = p.get("symbol")
+        if ctype not in ("DIGITEVEN", "DIGITODD"):
+            return None, ("ContractCreationFailure", f"contract_type não suportado: {ctype}")
+        if sym not in self.last_tick and sym not in ALLOWED_SYMBOLS:
+            return None, ("InvalidSymbol", f"símbolo inválido: {sym}")
+        try:
+            amount = round2(float(p.get("amount")))
+        except Exception:
+            return None, ("InputValidationFailed", "amount inválido")
+        return {"contract_type": ctype, "symbol": sym, "amount": amount}, None
+
+    def _handle(self, session: _Session, req: dict):
+        self.stats["requests"] += 1
+        rid = req.get("req_id")
+
+        if "authorize" in req:
+            token = str(req["authorize"])
+            session.token = token
+            bal = self.balances.setdefault(token, self.start_balance)
+            body = {"loginid": f"MOCK{abs(hash(token)) % 100000}", "balance": bal, "currency": "USD"}
+            self._reply(session, req, "authorize", body)
+
+        elif "ticks" in req:
+            syms = req["ticks"] if isinstance(req["ticks"], list) else [req["ticks"]]
+            for sym in syms:
+                if sym not in ALLOWED_SYMBOLS:
+                    self._reply(session, req, "tick", error=("InvalidSymbol", f"símbolo inválido: {sym}"))
+                    return
+            for sym in syms:
+                if req.get("subscribe") and sym not in session.tick_subs:
+                    session.tick_subs[sym] = (self._new_id(), rid)
+
+        elif "balance" in req:
+            if session.token is None:
+                self._reply(session, req, "balance", error=("AuthorizationRequired", "Please log in."))
+                return
+            sub = None
+            if req.get("subscribe"):
+                sub = self._new_id()
+                session.balance_sub = (sub, rid)
+            self._reply(session, req, "balance", {"balance": self.balances[session.token], "currency": "USD"}, subscription=sub)
+
+        elif "proposal_open_contract" in req:
+            c = self.contracts.get(req.get("contract_id"))
+            if c is None or c["token"] != session.token:
+                self._reply(session, req, "proposal_open_contract", error=("InvalidContractId", "contrato não encontrado"))
+                return
+            sub = None
+            if req.get("subscribe") and not c["is_sold"]:
+                sub = self._new_id()
+                session.poc_subs[c["contract_id"]] = (sub, rid)
+            self._reply(session, req, "proposal_open_contract", self._poc_body(c), subscription=sub)
+
+        elif "proposal" in req:
+            params, err = self._contract_params(req)
+            if err:
+                self._reply(session, req, "proposal", error=err)
+                return
+            pid = self._new_id()
+            self.proposals[pid] = (params, time.time() + self.proposal_ttl)
+            body = {"id": pid, "ask_price": params["amount"], "payout": round2(params["amount"] * (1 + self.payout))}
+            self._reply(session, req, "proposal", body)
+
+        elif "buy" in req:
+            self._handle_buy(session, req)
+
+        elif "forget" in req:
+            sid = req["forget"]
+            for cid, sub in list(session.poc_subs.items()):
+                if sub[0] == sid:
+                    session.poc_subs.pop(cid, None)
+            for sym, sub in list(session.tick_subs.items()):
+                if sub[0] == sid:
+                    session.tick_subs.pop(sym, None)
+            self._reply(session, req, "forget", 1)
+
+        else:
+            self._reply(session, req, "error", error=("UnrecognisedRequest", "requisição não suportada pelo mock"))
+
+    def _handle_buy(self, session: _Session, req: dict):
+        if session.token is None:
+            self._reply(session, req, "buy", error=("AuthorizationRequired", "Please log in."))
+            return
+
+        if req["buy"] == 1 and isinstance(req.get("parameters"), dict):
+            params, err = self._contract_params(req["parameters"])
+        else:
+            entry = self.proposals.pop(req["buy"], None)
+            if entry is None or entry[1] < time.time():
+                params, err = None, ("InvalidContractProposal", "proposal inexistente ou expirada")
+            else:
+                params, err = entry[0], None
+        if err:
+            self._reply(session, req, "buy", error=err)
+            return
+
+        price = params["amount"]
+        if self.balances[session.token] < price:
+            self._reply(session, req, "buy", error=("InsufficientBalance", "saldo insuficiente"))
+            return
+        self.balances[session.token] = round2(self.balances[session.token] - price)
+
+        cid = next(self._ids)
+        c = {
+            "contract_id": cid,
+            "token": session.token,
+            "symbol": params["symbol"],
+            "contract_type": params["contract_type"],
+            "buy_price": price,
+            "is_sold": 0,
+            "status": "open",
+            "profit": 0.0,
+        }
+        self.contracts[cid] = c
+        self.open_by_symbol.setdefault(params["symbol"], []).append(cid)
+        self.stats["contracts"] += 1
+
+        if req.get("subscribe"):
+            session.poc_subs[cid] = (self._new_id(), req.get("req_id"))
+        body = {"contract_id": cid, "buy_price": price, "balance_after": self.balances[session.token]}
+        self._reply(session, req, "buy", body)
+        self._push_balance(session.token)
+
+    # ---------- conexões ----------
+    async def _disconnect_later(self, session: _Session):
+        await asyncio.sleep(self.rng.expovariate(1.0 / self.disconnect_every))
+        self.stats["disconnects"] += 1
+        try:
+            await session.ws.close()
+        except Exception:
+            pass
+
+    async def _handler(self, ws):
+        session = _Session(ws)
+        self.sessions.add(session)
+        killer = asyncio.create_task(self._disconnect_later(session)) if self.disconnect_every > 0 else None
+        try:
+            async for raw in ws:
+                try:
+                    req = json.loads(raw)
+                except Exception:
+                    continue
+                self._handle(session, req)
+        except Exception:
+            pass
+        finally:
+            self.sessions.discard(session)
+            if killer is not None:
+                killer.cancel()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        async with websockets.serve(self._handler, host, port):
+            await self._tick_clock()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Servidor Deriv local para replay/carga do bot Par/Ímpar.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--ticks", default=None, help="diretório do gravador; sem ele usa ticks sintéticos")
+    ap.add_argument("--speed", type=float, default=1.0, help="multiplicador do relógio de ticks")
+    ap.add_argument("--latency", type=float, default=0.0, help="latência base das respostas (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="jitter uniforme adicional (s)")
+    ap.add_argument("--drop", type=float, default=0.0, help="probabilidade de perder uma resposta")
+    ap.add_argument("--disconnect-every", type=float, default=0.0, help="média de segundos até derrubar cada conexão")
+    ap.add_argument("--payout", type=float, default=0.95)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    if args.ticks:
+        source = replay_messages(args.ticks, ALLOWED_SYMBOLS)
+    else:
+        source = synthetic_messages(ALLOWED_SYMBOLS, seed=args.seed)
+
+    server = MockDerivServer(
+        source, speed=args.speed, latency=args.latency, jitter=args.jitter, drop_rate=args.drop,
+        disconnect_every=args.disconnect_every, payout=args.payout, seed=args.seed,
+    )
+    print(f"Mock Deriv em ws://{args.host}:{args.port} — use DERIV_WS_URL=ws://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print(f"stats: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
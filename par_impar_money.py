@@ -0,0 +1,10 @@
+"""
+Arredondamento de valores monetários, sem dependências (usado pelo engine e pelo backtester,
+que roda em workers de ProcessPool sem websockets/Tk).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def round2(x: float) -> float:
+    d = Decimal(str(x)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return float(d)
@@ -0,0 +1,197 @@
+"""
+Gravador append-only de ticks em binário de largura fixa + leitura via mmap.
+
+Layout: <base_dir>/<YYYY-MM-DD>/<SYMBOL>.bin (dia UTC do epoch do tick), registros
+de 16 bytes little-endian sem cabeçalho:
+
+    quote f64 | epoch u32 | symbol_id u16 | pip_size u8 | pad
+
+- record() só enfileira (não bloqueia o loop asyncio); uma thread agrupa e grava em lote
+- um registro parcial no fim do arquivo (queda no meio da escrita) é ignorado na leitura
+- open_ticks() devolve um np.memmap (zero-copy) quando o NumPy existe;
+  iter_ticks() é o caminho só com stdlib (mmap + struct.iter_unpack)
+"""
+import heapq
+import mmap
+import os
+import queue
+import struct
+import threading
+from datetime import datetime, timezone
+
+RECORD = struct.Struct("<dIHBx")
+RECORD_SIZE = RECORD.size  # 16
+
+try:
+    import numpy as np
+
+    RECORD_DTYPE = np.dtype([
+        ("quote", "<f8"),
+        ("epoch", "<u4"),
+        ("symbol_id", "<u2"),
+        ("pip_size", "u1"),
+        ("_pad", "V1"),
+    ])
+except ImportError:  # leitura via stdlib continua funcionando
+    np = None
+    RECORD_DTYPE = None
+
+
+def day_of(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d")
+
+
+def tick_path(base_dir: str, day: str, symbol: str) -> str:
+    return os.path.join(base_dir, day, f"{symbol}.bin")
+
+
+class TickRecorder:
+    """
+    Grava ticks do stream PUBLIC sem custo no loop: record() é um put_nowait numa fila
+    limitada (cheia -> descarta e conta em `dropped`).
+    """
+    def __init__(self, base_dir: str, symbols, flush_interval=0.5, max_pending=200_000):
+        self.base_dir = base_dir
+        self.symbol_ids = {sym: i for i, sym in enumerate(symbols)}
+        self.flush_interval = float(flush_interval)
+
+        self._q = queue.Queue(maxsize=max_pending)
+        self._files = {}  # path -> arquivo aberto em append
+        self.dropped = 0
+        self.written = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, epoch, symbol: str, quote, pip_size):
+        try:
+            pip = int(pip_size) if pip_size is not None else 2
+        except Exception:
+            pip = 2  # mesma formatação que o engine usa sem pip_size válido
+        try:
+            self._q.put_nowait((int(epoch), symbol, float(quote), pip))
+        except queue.Full:
+            self.dropped += 1
+
+    def _file_for(self, path: str):
+        f = self._files.get(path)
+        if f is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "ab")
+            self._files[path] = f
+        return f
+
+    def _write_batch(self, batch):
+        chunks = {}
+        days = {}
+        for epoch, symbol, quote, pip in batch:
+            key = (epoch // 86400, symbol)
+            buf = chunks.get(key)
+            if buf is None:
+                buf = chunks[key] = bytearray()
+            buf += RECORD.pack(quote, epoch, self.symbol_ids.get(symbol, 0xFFFF), pip)
+            if key[0] not in days:
+                days[key[0]] = day_of(epoch)
+
+        written_paths = set()
+        for (day_num, symbol), buf in chunks.items():
+            path = tick_path(self.base_dir, days[day_num], symbol)
+            written_paths.add(path)
+            f = self._file_for(path)
+            f.write(buf)
+            f.flush()
+        self.written += len(batch)
+
+        # arquivos de dias anteriores não recebem mais nada
+        if len(self._files) > 2 * max(1, len(self.symbol_ids)):
+            for path in list(self._files):
+                if path not in written_paths:
+                    self._files.pop(path).close()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._q.empty()):
+            try:
+                batch = [self._q.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception:
+                self.dropped += len(batch)
+
+        for f in self._files.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+
+def _whole_records(path: str) -> int:
+    return os.path.getsize(path) // RECORD_SIZE
+
+
+def open_ticks(path: str):
+    """
+    np.memmap (somente leitura, zero-copy) com os campos quote/epoch/symbol_id/pip_size.
+    """
+    if np is None:
+        raise RuntimeError("open_ticks precisa do numpy; use iter_ticks")
+    n = _whole_records(path)
+    if n == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n,))
+
+
+def iter_ticks(path: str):
+    """
+    (epoch, quote, pip_size) direto do mmap, só stdlib.
+    """
+    n = _whole_records(path)
+    if n == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)[: n * RECORD_SIZE]
+        try:
+            for quote, epoch, _, pip in RECORD.iter_unpack(view):
+                yield epoch, quote, pip
+        finally:
+            view.release()
+
+
+def symbol_files(base_dir: str, symbol: str):
+    """
+    Arquivos do símbolo em ordem cronológica (um por dia).
+    """
+    if not os.path.isdir(base_dir):
+        return []
+    days = sorted(d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d)))
+    paths = [tick_path(base_dir, d, symbol) for d in days]
+    return [p for p in paths if os.path.exists(p)]
+
+
+def replay_messages(base_dir: str, symbols):
+    """
+    Mensagens no formato do stream PUBLIC ({"msg_type": "tick", ...}) de todos os símbolos,
+    intercaladas por epoch. Serve para alimentar TradingEngine._on_public_msg diretamente.
+    """
+    def stream(symbol):
+        for path in symbol_files(base_dir, symbol):
+            for epoch, quote, pip in iter_ticks(path):
+                yield epoch, symbol, quote, pip
+
+    for epoch, symbol, quote, pip in heapq.merge(*(stream(s) for s in symbols)):
+        yield {
+            "msg_type": "tick",
+            "tick": {"symbol": symbol, "epoch": epoch, "quote": quote, "pip_size": pip},
+        }
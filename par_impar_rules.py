@@ -0,0 +1,265 @@
+"""
+Regras de sinal declaradas na config ("rules"), compiladas uma vez em pequenas máquinas de
+estado e avançadas a cada tick, sem reler histórico.
+
+    "rules": [
+      {"name": "uniforme", "when": [{"type": "uniform"}], "direction": "SEQUENCIA"},
+      {"name": "3 pares + 0/5", "symbols": ["R_10", "R_25"], "direction": "REVERSAO",
+       "when": [{"type": "run", "n": 3, "parity": "PAR"}, {"type": "digit_in", "digits": [0, 5]},
+                {"type": "time", "from": "08:00", "to": "17:00"}]}
+    ]
+
+Condições ("when" é um E de todas):
+- uniform        todos os dígitos da cotação com a mesma paridade ("parity": PAR/IMPAR/ANY)
+- run            últimos "n" dígitos finais com a mesma paridade ("parity": PAR/IMPAR/ANY)
+- digit_in       último dígito em "digits"
+- time           hora UTC entre "from" e "to" (HH:MM; from > to atravessa a meia-noite)
+- uniform_rate / par_rate   taxa (%) na janela "window" das estatísticas do feed, entre "min" e "max"
+- confirm        a condição "when" foi verdadeira em pelo menos "min" OUTROS símbolos
+                 ("symbols", padrão todos) nos últimos "within" segundos
+
+Direção: SEQUENCIA segue a paridade do último dígito, REVERSAO inverte, PAR/IMPAR fixas.
+Todas as condições de todas as regras avançam em todo tick (as com estado precisam ver a
+sequência inteira); custo por tick limitado a regras x condições (confirm: x símbolos).
+A primeira regra que casa gera o sinal; todas as que casam contam em `hits`.
+"""
+from par_impar_stats import STATS_WINDOWS
+
+PARITIES = ("PAR", "IMPAR")
+DIRECTIONS = ("SEQUENCIA", "REVERSAO", "PAR", "IMPAR")
+
+
+def _parity_of(digit: int) -> str:
+    return "PAR" if digit % 2 == 0 else "IMPAR"
+
+
+def _parity_arg(spec: dict):
+    parity = str(spec.get("parity", "ANY")).upper()
+    if parity == "ANY":
+        return None
+    if parity not in PARITIES:
+        raise ValueError(f"paridade inválida: {parity}")
+    return parity
+
+
+def _hhmm(value) -> int:
+    try:
+        h, m = str(value).split(":")
+        secs = int(h) * 3600 + int(m) * 60
+    except ValueError:
+        raise ValueError(f"horário inválido (HH:MM): {value}") from None
+    if not 0 <= secs < 86400:
+        raise ValueError(f"horário inválido (HH:MM): {value}")
+    return secs
+
+
+class UniformCond:
+    __slots__ = ("parity",)
+
+    def __init__(self, spec, symbols):
+        self.parity = _parity_arg(spec)
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        return uniform is not None and (self.parity is None or uniform == self.parity)
+
+
+class RunCond:
+    __slots__ = ("n", "parity", "_run_parity", "_run_len")
+
+    def __init__(self, spec, symbols):
+        self.n = int(spec.get("n", 0))
+        if self.n < 1:
+            raise ValueError("run precisa de n >= 1")
+        self.parity = _parity_arg(spec)
+        self._run_parity = dict.fromkeys(symbols)
+        self._run_len = dict.fromkeys(symbols, 0)
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        parity = _parity_of(last_digit)
+        if parity == self._run_parity.get(symbol):
+            run = self._run_len[symbol] + 1
+        else:
+            self._run_parity[symbol] = parity
+            run = 1
+        self._run_len[symbol] = run
+        return run >= self.n and (self.parity is None or parity == self.parity)
+
+
+class DigitInCond:
+    __slots__ = ("digits",)
+
+    def __init__(self, spec, symbols):
+        digits = spec.get("digits") or []
+        if not digits or any(not 0 <= int(d) <= 9 for d in digits):
+            raise ValueError("digit_in precisa de digits entre 0 e 9")
+        self.digits = frozenset(int(d) for d in digits)
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        return last_digit in self.digits
+
+
+class TimeCond:
+    __slots__ = ("start", "end")
+
+    def __init__(self, spec, symbols):
+        self.start = _hhmm(spec.get("from", "00:00"))
+        self.end = _hhmm(spec.get("to", "23:59"))
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        t = int(now) % 86400
+        if self.start <= self.end:
+            return self.start <= t <= self.end
+        return t >= self.start or t <= self.end
+
+
+class RateCond:
+    __slots__ = ("window", "low", "high", "uniform")
+
+    def __init__(self, spec, symbols, uniform):
+        self.window = int(spec.get("window", STATS_WINDOWS[1]))
+        if self.window not in STATS_WINDOWS:
+            raise ValueError(f"window deve ser uma de {STATS_WINDOWS}")
+        self.low = float(spec.get("min", 0)) / 100.0
+        self.high = float(spec.get("max", 100)) / 100.0
+        self.uniform = uniform
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        if stats is None:
+            return False
+        rate = stats.uniform_rate(self.window) if self.uniform else stats.even_rate(self.window)
+        return self.low <= rate <= self.high
+
+
+class ConfirmCond:
+    __slots__ = ("inner", "symbols", "within", "min", "_last_true")
+
+    def __init__(self, spec, symbols):
+        inner = spec.get("when")
+        if not isinstance(inner, dict) or inner.get("type") == "confirm":
+            raise ValueError("confirm precisa de uma condição 'when' (sem confirm aninhado)")
+        self.inner = _compile_cond(inner, symbols)
+        watched = spec.get("symbols") or list(symbols)
+        unknown = [s for s in watched if s not in symbols]
+        if unknown:
+            raise ValueError(f"símbolos desconhecidos em confirm: {', '.join(unknown)}")
+        self.symbols = tuple(watched)
+        self.within = float(spec.get("within", 2.0))
+        self.min = max(1, int(spec.get("min", 1)))
+        self._last_true = dict.fromkeys(symbols, float("-inf"))
+
+    def step(self, symbol, last_digit, uniform, stats, now):
+        if self.inner.step(symbol, last_digit, uniform, stats, now):
+            self._last_true[symbol] = now
+        since = now - self.within
+        confirmed = 0
+        for other in self.symbols:
+            if other != symbol and self._last_true[other] >= since:
+                confirmed += 1
+                if confirmed >= self.min:
+                    return True
+        return False
+
+
+CONDITIONS = {
+    "uniform": UniformCond,
+    "run": RunCond,
+    "digit_in": DigitInCond,
+    "time": TimeCond,
+    "uniform_rate": lambda spec, symbols: RateCond(spec, symbols, uniform=True),
+    "par_rate": lambda spec, symbols: RateCond(spec, symbols, uniform=False),
+    "confirm": ConfirmCond,
+}
+
+
+def _compile_cond(spec, symbols):
+    if not isinstance(spec, dict):
+        raise ValueError(f"condição inválida: {spec!r}")
+    kind = spec.get("type")
+    factory = CONDITIONS.get(kind)
+    if factory is None:
+        raise ValueError(f"tipo de condição desconhecido: {kind}")
+    return factory(spec, symbols)
+
+
+class Rule:
+    __slots__ = ("name", "conds", "symbols", "direction", "hits", "signals")
+
+    def __init__(self, spec: dict, symbols, index: int):
+        self.name = str(spec.get("name") or f"regra {index + 1}")
+        when = spec.get("when") or []
+        if isinstance(when, dict):
+            when = [when]
+        if not when:
+            raise ValueError(f"{self.name}: 'when' vazio")
+        try:
+            self.conds = tuple(_compile_cond(c, symbols) for c in when)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{self.name}: {e}") from None
+        only = spec.get("symbols")
+        if only:
+            unknown = [s for s in only if s not in symbols]
+            if unknown:
+                raise ValueError(f"{self.name}: símbolos desconhecidos: {', '.join(unknown)}")
+        self.symbols = frozenset(only) if only else None
+        self.direction = str(spec.get("direction", "SEQUENCIA")).upper()
+        if self.direction not in DIRECTIONS:
+            raise ValueError(f"{self.name}: direção inválida: {self.direction}")
+        self.hits = 0
+        self.signals = 0
+
+    def direction_for(self, last_digit: int) -> str:
+        if self.direction in PARITIES:
+            return self.direction
+        ref = _parity_of(last_digit)
+        if self.direction == "SEQUENCIA":
+            return ref
+        return "IMPAR" if ref == "PAR" else "PAR"
+
+
+class RuleSet:
+    def __init__(self, specs, symbols):
+        if not isinstance(specs, list) or not specs:
+            raise ValueError("rules deve ser uma lista não vazia")
+        symbols = list(symbols)
+        self.rules = [Rule(spec if isinstance(spec, dict) else {}, symbols, i) for i, spec in enumerate(specs)]
+        self.ticks = 0
+
+    def evaluate(self, symbol: str, last_digit, uniform, stats, now: float):
+        """
+        Avança todas as condições com o tick e devolve a direção do sinal (ou None).
+        """
+        if last_digit is None:
+            return None
+        self.ticks += 1
+        direction = None
+        for rule in self.rules:
+            ok = True
+            for cond in rule.conds:
+                if not cond.step(symbol, last_digit, uniform, stats, now):
+                    ok = False  # sem short-circuit: condições com estado precisam ver todo tick
+            if ok and (rule.symbols is None or symbol in rule.symbols):
+                rule.hits += 1
+                if direction is None:
+                    rule.signals += 1
+                    direction = rule.direction_for(last_digit)
+        return direction
+
+    def names(self):
+        return [r.name for r in self.rules]
+
+    def reset_counters(self):
+        self.ticks = 0
+        for rule in self.rules:
+            rule.hits = 0
+            rule.signals = 0
+
+    def snapshot(self) -> list[dict]:
+        return [{"name": r.name, "hits": r.hits, "signals": r.signals, "ticks": self.ticks} for r in self.rules]
+
+
+def default_rules(trigger_mode: str) -> list[dict]:
+    """
+    Regra equivalente ao gatilho fixo: cotação uniforme, SEQUENCIA ou REVERSAO.
+    """
+    mode = "REVERSAO" if str(trigger_mode).upper() == "REVERSAO" else "SEQUENCIA"
+    return [{"name": mode, "when": [{"type": "uniform"}], "direction": mode}]
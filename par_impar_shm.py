@@ -0,0 +1,273 @@
+"""
+Ring buffer de ticks decodificados em multiprocessing.shared_memory: um processo escreve
+(o feed PUBLIC do MarketDataHub), qualquer número de processos lê sem lock e sem socket.
+
+Layout (little-endian):
+
+    header 64 B: magic "PITK" | versão u16 | slot u16 | capacidade u32 | n_símbolos u16 | pad
+                 | head u64 (offset 16, último seq publicado) | pid do escritor u32 (offset 24)
+    símbolos:    n_símbolos x 16 B ASCII (symbol_id = índice)
+    slots:       capacidade x 32 B: seq u64 | quote f64 | epoch u32 | symbol_id u16
+                 | último dígito u8 (255 = nenhum) | paridade uniforme u8 (0 -, 1 PAR, 2 IMPAR)
+                 | pip_size u8 | pad
+
+- escritor único; o tick n vai no slot (n - 1) % capacidade. O seq do slot é zerado antes de
+  gravar os campos e recebe n depois (seqlock): o leitor confere o seq antes e depois de ler
+  e descarta o slot se mudou — leitura rasgada vira perda, nunca tick errado
+- o escritor nunca espera ninguém: leitor que ficou mais de `capacidade` ticks para trás
+  detecta o overrun pelo head, soma os perdidos em `lost` e pula para o mais antigo ainda válido
+"""
+import argparse
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+RING_NAME = "par_impar_ticks"
+RING_CAPACITY = 65536  # slots (2 MiB); ~1h de 12 símbolos a 1 tick/s
+MAGIC = b"PITK"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIH")
+HEAD = struct.Struct("<Q")          # offset 16
+WRITER_PID = struct.Struct("<I")    # offset 24
+HEAD_OFFSET = 16
+PID_OFFSET = 24
+HEADER_SIZE = 64
+SYMBOL_SIZE = 16
+
+SLOT_SIZE = 32
+SLOT_SEQ = struct.Struct("<Q")
+SLOT_BODY = struct.Struct("<dIHBBB")  # logo depois do seq
+NONE_U8 = 255
+UNIFORM_CODE = {None: 0, "PAR": 1, "IMPAR": 2}
+UNIFORM_NAME = (None, "PAR", "IMPAR")
+
+_created = set()  # segmentos criados (e registrados no resource_tracker) por este processo
+
+
+def _slots_offset(n_symbols: int) -> int:
+    end = HEADER_SIZE + n_symbols * SYMBOL_SIZE
+    return (end + 63) // 64 * 64
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _attach(name: str):
+    """
+    Abre sem registrar no resource_tracker: quem só lê não pode apagar o segmento ao sair.
+    Se o segmento é deste processo (TickRing aqui mesmo), o registro é o do escritor e fica:
+    tirá-lo faria o unlink() do escritor estourar KeyError no resource_tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name in _created:
+            return shm
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class TickRing:
+    """
+    Lado do escritor (um por nome). publish() custa três pack_into, sem alocação nem syscall.
+    Um segmento com o mesmo nome deixado por um processo morto é recriado; se o escritor
+    dele ainda está vivo, RuntimeError.
+    """
+    def __init__(self, symbols, name: str = RING_NAME, capacity: int = RING_CAPACITY):
+        self.name = name
+        self.capacity = int(capacity)
+        self.symbols = list(symbols)
+        self.symbol_ids = {sym: i for i, sym in enumerate(self.symbols)}
+        self._slots = _slots_offset(len(self.symbols))
+        size = self._slots + self.capacity * SLOT_SIZE
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            old = _attach(name)
+            try:
+                pid = WRITER_PID.unpack_from(old.buf, PID_OFFSET)[0] if old.size >= HEADER_SIZE else 0
+            finally:
+                old.close()
+            if pid != os.getpid() and _pid_alive(pid):
+                raise RuntimeError(f"ring '{name}' em uso pelo processo {pid}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created.add(name)
+
+        buf = self.shm.buf
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, SLOT_SIZE, self.capacity, len(self.symbols))
+        HEAD.pack_into(buf, HEAD_OFFSET, 0)
+        WRITER_PID.pack_into(buf, PID_OFFSET, os.getpid())
+        for i, sym in enumerate(self.symbols):
+            raw = sym.encode("ascii")[:SYMBOL_SIZE]
+            buf[HEADER_SIZE + i * SYMBOL_SIZE:HEADER_SIZE + i * SYMBOL_SIZE + len(raw)] = raw
+        self.seq = 0
+
+    def publish(self, symbol: str, epoch, quote, last_digit, uniform, pip_size):
+        sym_id = self.symbol_ids.get(symbol)
+        if sym_id is None:
+            return
+        self.seq += 1
+        seq = self.seq
+        off = self._slots + ((seq - 1) % self.capacity) * SLOT_SIZE
+        buf = self.shm.buf
+        SLOT_SEQ.pack_into(buf, off, 0)
+        SLOT_BODY.pack_into(
+            buf, off + 8,
+            float(quote),
+            int(epoch or 0) & 0xFFFFFFFF,
+            sym_id,
+            NONE_U8 if last_digit is None else int(last_digit),
+            UNIFORM_CODE.get(uniform, 0),
+            int(pip_size) & 0xFF if pip_size is not None else NONE_U8,
+        )
+        SLOT_SEQ.pack_into(buf, off, seq)
+        HEAD.pack_into(buf, HEAD_OFFSET, seq)
+
+    def close(self):
+        try:
+            self.shm.close()
+        finally:
+            _created.discard(self.name)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class TickRingReader:
+    """
+    Lado do leitor (qualquer processo). poll() devolve os ticks novos como tuplas
+    (seq, symbol, epoch, quote, last_digit, uniform, pip_size); `lost` acumula overruns.
+    from_start=True começa no mais antigo ainda no ring; senão só ticks publicados daqui em diante.
+    """
+    def __init__(self, name: str = RING_NAME, from_start: bool = False):
+        self.name = name
+        self.shm = _attach(name)
+        buf = self.shm.buf
+        magic, version, slot_size, capacity, n_symbols = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION or slot_size != SLOT_SIZE:
+            self.shm.close()
+            raise ValueError(f"'{name}' não é um ring de ticks (versão {VERSION})")
+        self.capacity = capacity
+        self.symbols = [
+            bytes(buf[HEADER_SIZE + i * SYMBOL_SIZE:HEADER_SIZE + (i + 1) * SYMBOL_SIZE]).rstrip(b"\0").decode("ascii")
+            for i in range(n_symbols)
+        ]
+        self._slots = _slots_offset(n_symbols)
+        head = self.head()
+        self.next_seq = max(1, head - capacity + 1) if from_start else head + 1
+        self.lost = 0
+
+    def head(self) -> int:
+        return HEAD.unpack_from(self.shm.buf, HEAD_OFFSET)[0]
+
+    def writer_pid(self) -> int:
+        return WRITER_PID.unpack_from(self.shm.buf, PID_OFFSET)[0]
+
+    def writer_alive(self) -> bool:
+        """
+        False quando o escritor morreu: um novo escritor cria OUTRO segmento, então é preciso reabrir.
+        """
+        return _pid_alive(self.writer_pid())
+
+    def poll(self, max_items: int = 4096):
+        buf = self.shm.buf
+        head = HEAD.unpack_from(buf, HEAD_OFFSET)[0]
+        out = []
+        n = self.next_seq
+        oldest = head - self.capacity + 1
+        if n < oldest:
+            self.lost += oldest - n
+            n = oldest
+        end = min(head, n + max_items - 1)
+        while n <= end:
+            off = self._slots + ((n - 1) % self.capacity) * SLOT_SIZE
+            s1 = SLOT_SEQ.unpack_from(buf, off)[0]
+            quote, epoch, sym_id, digit, uniform, pip = SLOT_BODY.unpack_from(buf, off + 8)
+            s2 = SLOT_SEQ.unpack_from(buf, off)[0]
+            if s1 != n or s2 != n:
+                # sobrescrito durante a leitura: o escritor já passou deste ponto
+                self.lost += 1
+            else:
+                out.append((
+                    n,
+                    self.symbols[sym_id] if sym_id < len(self.symbols) else str(sym_id),
+                    epoch,
+                    quote,
+                    None if digit == NONE_U8 else digit,
+                    UNIFORM_NAME[uniform] if uniform < len(UNIFORM_NAME) else None,
+                    None if pip == NONE_U8 else pip,
+                ))
+            n += 1
+        self.next_seq = n
+        return out
+
+    def close(self):
+        self.shm.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Acompanha o ring de ticks em memória compartilhada.")
+    ap.add_argument("--name", default=RING_NAME)
+    ap.add_argument("--from-start", action="store_true", help="começa pelo tick mais antigo no ring")
+    ap.add_argument("--interval", type=float, default=0.05, help="segundos entre polls")
+    args = ap.parse_args()
+
+    reader = TickRingReader(args.name, from_start=args.from_start)
+    print(f"ring '{args.name}': {reader.capacity} slots, {len(reader.symbols)} símbolos, escritor pid {reader.writer_pid()}")
+    lost = 0
+    last_check = time.time()
+    try:
+        while True:
+            if time.time() - last_check > 2.0:
+                last_check = time.time()
+                if not reader.writer_alive():
+                    print("... escritor saiu; aguardando um novo ring")
+                    reader.close()
+                    while True:
+                        time.sleep(1.0)
+                        try:
+                            reader = TickRingReader(args.name, from_start=True)
+                        except (FileNotFoundError, ValueError):
+                            continue
+                        if reader.writer_alive():
+                            break
+                        reader.close()
+                    lost = 0
+            for seq, symbol, epoch, quote, digit, uniform, pip in reader.poll():
+                fmt = f"{{:.{pip}f}}" if pip is not None else "{}"
+                print(f"{seq:>10} | {epoch} | {symbol:<8} | {fmt.format(quote)} | dígito {digit} | {uniform or '-'}")
+            if reader.lost != lost:
+                print(f"... {reader.lost - lost} ticks perdidos (leitor atrasado)")
+                lost = reader.lost
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Estatísticas por símbolo atualizadas em O(1) por tick, em memória de tamanho fixo.
+
+- janelas deslizantes (STATS_WINDOWS ticks): frequência de último dígito PAR e de cotações
+  uniformes (todos os dígitos com a mesma paridade). Um ring de bytes guarda os últimos
+  max(janelas) ticks e cada janela só mantém a contagem: entra o tick novo, sai o que
+  ficou w ticks para trás
+- sequência atual e máxima da paridade do último dígito
+- taxa de acerto dos últimos SIGNAL_WINDOW sinais (WIN/LOSS depois dos gales)
+"""
+STATS_WINDOWS = (20, 100, 500)
+SIGNAL_WINDOW = 50
+
+_EVEN = 1     # bit do ring: último dígito PAR
+_UNIFORM = 2  # bit do ring: cotação uniforme
+
+
+class ParityStats:
+    __slots__ = ("windows", "_index", "size", "_ring", "_pos", "n", "_even", "_uniform",
+                 "run_parity", "run_len", "max_run")
+
+    def __init__(self, windows=STATS_WINDOWS):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        self._index = {w: i for i, w in enumerate(self.windows)}
+        self.size = self.windows[-1]
+        self._ring = bytearray(self.size)
+        self._even = [0] * len(self.windows)
+        self._uniform = [0] * len(self.windows)
+        self.reset()
+
+    def reset(self):
+        self._ring[:] = bytes(self.size)
+        self._pos = 0
+        self.n = 0
+        for i in range(len(self.windows)):
+            self._even[i] = 0
+            self._uniform[i] = 0
+        self.run_parity = None
+        self.run_len = 0
+        self.max_run = 0
+
+    def update(self, last_digit, uniform):
+        if last_digit is None:
+            return
+        flags = (_EVEN if last_digit % 2 == 0 else 0) | (_UNIFORM if uniform is not None else 0)
+        ring = self._ring
+        pos = self._pos
+        n = self.n
+        even = self._even
+        unif = self._uniform
+        for i, w in enumerate(self.windows):
+            if n >= w:
+                old = ring[pos - w]  # índice negativo dá a volta no ring
+                even[i] -= old & _EVEN
+                unif[i] -= (old & _UNIFORM) >> 1
+            even[i] += flags & _EVEN
+            unif[i] += (flags & _UNIFORM) >> 1
+        ring[pos] = flags
+        pos += 1
+        self._pos = 0 if pos == self.size else pos
+        self.n = n + 1
+
+        parity = "PAR" if flags & _EVEN else "IMPAR"
+        if parity == self.run_parity:
+            self.run_len += 1
+        else:
+            self.run_parity = parity
+            self.run_len = 1
+        if self.run_len > self.max_run:
+            self.max_run = self.run_len
+
+    def even_rate(self, window: int) -> float:
+        seen = min(self.n, window)
+        return self._even[self._index[window]] / seen if seen else 0.0
+
+    def uniform_rate(self, window: int) -> float:
+        seen = min(self.n, window)
+        return self._uniform[self._index[window]] / seen if seen else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "n": self.n,
+            "even": {w: round(self.even_rate(w), 4) for w in self.windows},
+            "uniform": {w: round(self.uniform_rate(w), 4) for w in self.windows},
+            "run_parity": self.run_parity,
+            "run_len": self.run_len,
+            "max_run": self.max_run,
+        }
+
+
+class SignalOutcomes:
+    """
+    Acerto dos últimos `size` sinais do símbolo (ring de bytes) e totais desde o reset.
+    """
+    __slots__ = ("size", "_ring", "_pos", "n", "wins_window", "wins", "losses")
+
+    def __init__(self, size=SIGNAL_WINDOW):
+        self.size = int(size)
+        self._ring = bytearray(self.size)
+        self.reset()
+
+    def reset(self):
+        self._ring[:] = bytes(self.size)
+        self._pos = 0
+        self.n = 0
+        self.wins_window = 0
+        self.wins = 0
+        self.losses = 0
+
+    def record(self, win: bool):
+        bit = 1 if win else 0
+        if self.n >= self.size:
+            self.wins_window -= self._ring[self._pos]
+        self._ring[self._pos] = bit
+        self.wins_window += bit
+        self._pos = (self._pos + 1) % self.size
+        self.n += 1
+        if win:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    def samples(self) -> int:
+        return min(self.n, self.size)
+
+    def win_rate(self):
+        """
+        Acerto na janela (0..1) ou None sem nenhum sinal ainda.
+        """
+        seen = self.samples()
+        return self.wins_window / seen if seen else None
+
+    def snapshot(self) -> dict:
+        rate = self.win_rate()
+        return {
+            "signals": self.samples(),
+            "win_rate": None if rate is None else round(rate, 4),
+            "wins": self.wins,
+            "losses": self.losses,
+        }
@@ -0,0 +1,163 @@
+"""
+Otimizador de parâmetros (grid / busca aleatória) sobre o backtest vetorizado.
+
+- os ticks são decodificados UMA vez no processo principal e gravados como .npy
+- cada worker do ProcessPoolExecutor abre os arrays com mmap (page cache compartilhado,
+  nenhum worker copia o dataset)
+- as combinações saem em lotes e os resultados são impressos, ranqueados, à medida que chegam
+
+Modo virtual é ligado automaticamente quando vwin ou vloss > 0 (igual ao engine:
+com os dois em 0 nada é armado para REAL).
+
+Uso:
+    python par_impar_sweep.py R_10.csv R_25.csv --stake 0.35,1 --gale 0:3 --mult 2,2.2 \\
+        --mode SEQUENCIA,REVERSAO --vloss 0,2,3 --random 200 --workers 8
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from par_impar_backtest import BacktestParams, PreparedSeries, load_ticks_files, prepare, run_backtest
+
+_worker_series = None
+
+
+def parse_values(spec: str, cast):
+    """
+    "1,2,3" -> lista; "0:3" -> intervalo inteiro inclusivo (0,1,2,3).
+    """
+    if ":" in spec:
+        lo, hi = spec.split(":", 1)
+        return [cast(v) for v in range(int(lo), int(hi) + 1)]
+    return [cast(v) for v in spec.split(",") if v.strip()]
+
+
+def build_grid(stakes, gales, mults, modes, vwins, vlosses, payout):
+    for stake, gale, mult, mode, vwin, vloss in itertools.product(stakes, gales, mults, modes, vwins, vlosses):
+        yield BacktestParams(
+            stake=stake, max_gale=gale, mult=mult, trigger_mode=mode,
+            virtual_mode=(vwin > 0 or vloss > 0), vwin_target=vwin, vloss_target=vloss, payout=payout,
+        )
+
+
+def dump_prepared(prepared: list[PreparedSeries], directory: str):
+    """
+    Grava os arrays decodificados e devolve o manifesto que os workers usam para abrir via mmap.
+    """
+    manifest = []
+    for i, p in enumerate(prepared):
+        paths = {}
+        for field in ("epochs", "last_digit", "uniform"):
+            path = os.path.join(directory, f"{i}_{field}.npy")
+            np.save(path, getattr(p, field))
+            paths[field] = path
+        manifest.append((p.symbol, paths))
+    return manifest
+
+
+def _init_worker(manifest):
+    global _worker_series
+    _worker_series = [
+        PreparedSeries(
+            symbol,
+            np.load(paths["epochs"], mmap_mode="r"),
+            np.load(paths["last_digit"], mmap_mode="r"),
+            np.load(paths["uniform"], mmap_mode="r"),
+        )
+        for symbol, paths in manifest
+    ]
+
+
+def _run_batch(batch):
+    return [run_backtest(_worker_series, params) for params in batch]
+
+
+def rank_key(result, rank: str):
+    if rank == "ratio":
+        return result.profit / max(result.max_drawdown, 0.01)
+    return result.profit
+
+
+def format_result(r) -> str:
+    p = r.params
+    return (f"P/L={r.profit:9.2f} dd={r.max_drawdown:8.2f} acerto={r.hit_rate:6.1%} seq={r.sequences:6d} | "
+            f"stake={p.stake:.2f} gale={p.max_gale} mult={p.mult} modo={p.trigger_mode} "
+            f"vwin={p.vwin_target} vloss={p.vloss_target}")
+
+
+def sweep(prepared, grid, workers=None, batch_size=8, rank="profit", top=10, on_result=None):
+    """
+    Roda o grid no pool e devolve os `top` melhores. on_result(result, leaderboard) é chamado
+    a cada resultado que chega (leaderboard já ordenado).
+    """
+    grid = list(grid)
+    batches = [grid[i:i + batch_size] for i in range(0, len(grid), batch_size)]
+    leaderboard = []
+
+    with tempfile.TemporaryDirectory(prefix="parimpar_sweep_") as tmp:
+        manifest = dump_prepared(prepared, tmp)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(manifest,)) as pool:
+            futures = [pool.submit(_run_batch, b) for b in batches]
+            for fut in as_completed(futures):
+                for result in fut.result():
+                    leaderboard.append(result)
+                    leaderboard.sort(key=lambda r: rank_key(r, rank), reverse=True)
+                    del leaderboard[top:]
+                    if on_result is not None:
+                        on_result(result, leaderboard)
+
+    return leaderboard
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep de parâmetros Par/Ímpar em paralelo.")
+    ap.add_argument("files", nargs="+", help="CSV epoch,quote[,pip_size] ou .bin do gravador, por símbolo")
+    ap.add_argument("--stake", default="1")
+    ap.add_argument("--gale", default="0:2")
+    ap.add_argument("--mult", default="2")
+    ap.add_argument("--mode", default="SEQUENCIA,REVERSAO")
+    ap.add_argument("--vwin", default="0")
+    ap.add_argument("--vloss", default="0")
+    ap.add_argument("--payout", type=float, default=0.95)
+    ap.add_argument("--random", type=int, default=0, help="amostra N combinações do grid (0 = grid completo)")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--rank", choices=["profit", "ratio"], default="profit")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    grid = list(build_grid(
+        parse_values(args.stake, float), parse_values(args.gale, int), parse_values(args.mult, float),
+        [m.strip() for m in args.mode.split(",")], parse_values(args.vwin, int), parse_values(args.vloss, int),
+        args.payout,
+    ))
+    if 0 < args.random < len(grid):
+        grid = random.Random(args.seed).sample(grid, args.random)
+
+    t0 = time.perf_counter()
+    prepared = [prepare(series) for series in load_ticks_files(args.files)]
+    n_ticks = sum(len(p.uniform) for p in prepared)
+    print(f"{n_ticks} ticks decodificados em {time.perf_counter() - t0:.2f}s; {len(grid)} combinações")
+
+    done = [0]
+
+    def on_result(result, leaderboard):
+        done[0] += 1
+        best = leaderboard[0] is result
+        print(f"[{done[0]}/{len(grid)}]{' *' if best else '  '} {format_result(result)}")
+
+    t1 = time.perf_counter()
+    best = sweep(prepared, grid, workers=args.workers, rank=args.rank, top=args.top, on_result=on_result)
+    print(f"\nTop {len(best)} ({args.rank}) em {time.perf_counter() - t1:.2f}s:")
+    for r in best:
+        print(format_result(r))
+
+
+if __name__ == "__main__":
+    main()
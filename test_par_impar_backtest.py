@@ -0,0 +1,82 @@
+"""
+Backtester vetorizado sobre uma sequência de ticks montada à mão: paridade decodificada,
+ladder de gale com o filtro de um sinal por vez, P/L e a troca DEMO -> REAL do modo virtual.
+
+    python -m pytest -q test_par_impar_backtest.py
+"""
+import numpy as np
+import pytest
+
+from par_impar_backtest import BacktestParams, TickSeries, decode_parity, prepare, run_backtest
+
+
+def series(quotes, pip=2, symbol="R_10"):
+    quotes = np.asarray(quotes, dtype=np.float64)
+    return TickSeries(symbol, np.arange(len(quotes), dtype=np.int64), quotes, np.full(len(quotes), pip, dtype=np.int64))
+
+
+# índice: cotação -> último dígito, uniforme
+TICKS = [
+    2.46,  # 0: 6, PAR
+    1.23,  # 1: 3
+    1.28,  # 2: 8
+    3.57,  # 3: 7, IMPAR
+    1.21,  # 4: 1
+    2.22,  # 5: 2, PAR
+    1.35,  # 6: 5, IMPAR (durante o gale do 5)
+    1.27,  # 7: 7
+    4.44,  # 8: 4, PAR (ladder não cabe nos dados)
+]
+
+
+def test_decode_parity():
+    last, uniform = decode_parity(np.array(TICKS), np.full(len(TICKS), 2))
+    assert last.tolist() == [6, 3, 8, 7, 1, 2, 5, 7, 4]
+    assert uniform.tolist() == [1, 0, 0, -1, 0, 1, -1, 0, 1]
+
+    # zeros à esquerda do ponto contam; pip_size misto no mesmo array
+    quotes = np.array([0.05, 0.02, 1.111, 1.110, 20.0, 20.0])
+    pips = np.array([2, 2, 3, 3, 1, 0])
+    last, uniform = decode_parity(quotes, pips)
+    assert last.tolist() == [5, 2, 1, 0, 0, 0]
+    assert uniform.tolist() == [0, 1, -1, 0, 1, 1]
+
+
+def test_gale_ladder_and_busy_filter():
+    prepared = [prepare(series(TICKS))]
+    params = BacktestParams(stake=1.0, max_gale=1, mult=2.0, payout=0.95)
+    r = run_backtest(prepared, params)
+    # 0: LOSS 1, WIN 2 -> 1.90 - 1 = 0.90 | 3: WIN 0.95 | 5: LOSS 1, LOSS 2 -> -3 (o 6 cai no gale)
+    assert r.signals == 4
+    assert (r.sequences, r.wins, r.losses, r.demo_sequences) == (3, 2, 1, 0)
+    assert r.profit == pytest.approx(-1.15)
+    assert r.max_drawdown == pytest.approx(3.0)
+    assert r.hit_rate == pytest.approx(2 / 3)
+
+    # REVERSAO: 0 ganha no passo 0, 3 ganha no gale e termina no 5, então o 6 entra
+    r = run_backtest(prepared, BacktestParams(stake=1.0, max_gale=1, mult=2.0, payout=0.95, trigger_mode="REVERSAO"))
+    assert (r.sequences, r.wins, r.losses) == (3, 3, 0)
+    assert r.profit == pytest.approx(0.95 + 0.90 + 0.90)
+    assert r.max_drawdown == 0.0
+
+
+def outcome_ticks(outcomes):
+    # cada sequência: sinal PAR seguido do tick que liquida (par = WIN)
+    quotes = []
+    for won in outcomes:
+        quotes += [2.46, 1.22 if won else 1.23]
+    return [prepare(series(quotes))]
+
+
+def test_virtual_mode_arms_one_real_sequence():
+    prepared = outcome_ticks([True, True, False, True, True, True])
+
+    # vwin=2: W W -> arma, L em REAL (zera), W W -> arma, W em REAL
+    r = run_backtest(prepared, BacktestParams(virtual_mode=True, vwin_target=2))
+    assert (r.sequences, r.wins, r.losses, r.demo_sequences) == (2, 1, 1, 4)
+    assert r.profit == pytest.approx(-0.05)
+
+    # vloss=1: o L arma e só o sinal seguinte vai em REAL
+    r = run_backtest(prepared, BacktestParams(virtual_mode=True, vloss_target=1))
+    assert (r.sequences, r.wins, r.losses, r.demo_sequences) == (1, 1, 0, 5)
+    assert r.profit == pytest.approx(0.95)
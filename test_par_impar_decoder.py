@@ -0,0 +1,84 @@
+"""
+TickDecoder contra a implementação antiga (formatar + lista de dígitos + all()), mantida
+aqui só como oráculo: quotes e pip_sizes aleatórios, inclusive None, strings, negativos,
+inf e nan.
+
+    python -m pytest -q test_par_impar_decoder.py
+"""
+import math
+import random
+
+from par_impar_engine import TickDecoder
+
+
+# ---------- implementação antiga (oráculo) ----------
+def format_quote(quote: float, pip_size):
+    if pip_size is None:
+        return f"{quote:.2f}"
+    fmt = f"{{:.{pip_size}f}}"
+    return fmt.format(quote)
+
+
+def digits_parity_map(price_str: str):
+    digits = [ch for ch in price_str if ch.isdigit()]
+    if not digits:
+        return [], None, None
+    parities = []
+    for ch in digits:
+        n = int(ch)
+        parities.append("P" if (n % 2 == 0) else "I")
+    last_digit = int(digits[-1])
+    last_parity = "PAR" if (last_digit % 2 == 0) else "IMPAR"
+    return parities, last_digit, last_parity
+
+
+def all_same_parity(parities):
+    if not parities:
+        return None
+    if all(p == "P" for p in parities):
+        return "PAR"
+    if all(p == "I" for p in parities):
+        return "IMPAR"
+    return None
+
+
+def old_decode(quote, pip_size):
+    price_str = format_quote(float(quote), pip_size)
+    parities, last_digit, _ = digits_parity_map(price_str)
+    return price_str, "".join(parities), last_digit, all_same_parity(parities)
+
+
+# ---------- testes ----------
+PIP_SIZES = (None, 0, 1, 2, 3, 4, 5, "2", "3")
+
+
+def random_quote(rng):
+    kind = rng.random()
+    if kind < 0.6:
+        return round(rng.uniform(0, 20000), rng.randint(0, 6))
+    if kind < 0.75:
+        # só dígitos de uma paridade: exercita o caminho uniforme
+        digits = rng.choice(("02468", "13579"))
+        whole = "".join(rng.choice(digits) for _ in range(rng.randint(1, 5)))
+        frac = "".join(rng.choice(digits) for _ in range(rng.randint(1, 4)))
+        return float(f"{whole}.{frac}")
+    if kind < 0.9:
+        return -rng.uniform(0, 1000)
+    return rng.choice((0.0, -0.0, 1e-9, 123456789.123, math.inf, -math.inf, math.nan, "1234.56"))
+
+
+def test_decoder_matches_old_path_on_random_quotes():
+    rng = random.Random(9)
+    dec = TickDecoder()
+    for _ in range(50000):
+        quote = random_quote(rng)
+        pip = rng.choice(PIP_SIZES)
+        assert dec.decode(quote, pip) == old_decode(quote, pip), (quote, pip)
+
+
+def test_decoder_known_values():
+    dec = TickDecoder()
+    assert dec.decode(2468.24, 2) == ("2468.24", "PPPPPP", 4, "PAR")
+    assert dec.decode(1357.9, 1) == ("1357.9", "IIIII", 9, "IMPAR")
+    assert dec.decode(1234.5, 3) == ("1234.500", "IPIPIPP", 0, None)
+    assert dec.decode(math.nan, 2) == ("nan", "", None, None)
@@ -0,0 +1,53 @@
+"""
+TradeJournal: lote com um item ruim perde só esse item, close() grava a fila e a próxima
+escrita sobe a thread de novo.
+
+    python -m pytest -q test_par_impar_journal.py
+"""
+import sqlite3
+
+from par_impar_journal import TradeJournal
+
+
+def op(op_id, status="OPEN"):
+    return {"id": op_id, "time": "2024-01-01 00:00:00", "symbol": "R_10", "account": "DEMO",
+            "direction": "PAR", "stake": 1.0, "gale": 0, "status": status, "profit": None}
+
+
+def rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_bad_item_only_drops_itself(tmp_path):
+    path = str(tmp_path / "j.sqlite3")
+    errors = []
+    # flush longo: os quatro itens entram no mesmo lote
+    journal = TradeJournal(path, on_error=errors.append, flush_interval=0.5)
+    journal._q.put_nowait(("add", op("a")))
+    journal._q.put_nowait(("step", ("a", 0, 1, 1.0, "WIN", {"não": "grava"}, "t")))  # tipo inválido
+    journal._q.put_nowait(("update", "a", {"status": "WIN", "profit": 0.95}))
+    journal._q.put_nowait(("add", op("b")))
+    journal.close()
+
+    assert rows(path, "SELECT id, status, profit FROM ops ORDER BY n") == [("a", "WIN", 0.95), ("b", "OPEN", None)]
+    assert rows(path, "SELECT COUNT(*) FROM steps") == [(0,)]
+    assert journal.errors == 1
+    assert len(errors) == 1 and errors[0].startswith("step a")
+
+
+def test_close_flushes_and_later_writes_restart_the_writer(tmp_path):
+    path = str(tmp_path / "j.sqlite3")
+    journal = TradeJournal(path, flush_interval=5.0)
+    journal.add_op(op("a"))
+    journal.close(timeout=10.0)
+    assert rows(path, "SELECT id FROM ops") == [("a",)]
+    assert not journal._thread.is_alive()
+
+    # sinal terminando depois do stop() do engine
+    journal.update_op("a", status="STOP")
+    journal.close(timeout=10.0)
+    assert rows(path, "SELECT status FROM ops") == [("STOP",)]
@@ -0,0 +1,64 @@
+"""
+Gravador de ticks: ida e volta do registro de 16 bytes pela thread de escrita, arquivo por
+dia UTC, registro parcial no fim e replay intercalado por epoch.
+
+    python -m pytest -q test_par_impar_recorder.py
+"""
+import os
+
+import pytest
+
+from par_impar_recorder import RECORD_SIZE, TickRecorder, iter_ticks, open_ticks, replay_messages, symbol_files
+
+DAY1 = 1700006400  # 2023-11-15 00:00:00 UTC
+DAY2 = DAY1 + 86400
+
+TICKS = [
+    (DAY1 + 10, "R_10", 6543.21, 2),
+    (DAY1 + 11, "1HZ100V", 812.046, 3),
+    (DAY1 + 12, "R_10", 6543.2, None),   # sem pip_size -> 2, como o engine
+    (DAY2 - 1, "1HZ100V", 0.001, 3),
+    (DAY2, "R_10", 6544.0, 2),           # vira o dia
+]
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    base = str(tmp_path / "ticks")
+    rec = TickRecorder(base, ["R_10", "1HZ100V"], flush_interval=0.05)
+    for epoch, symbol, quote, pip in TICKS:
+        rec.record(epoch, symbol, quote, pip)
+    rec.close()
+    assert (rec.written, rec.dropped) == (len(TICKS), 0)
+    return base
+
+
+def test_roundtrip_through_writer_thread(recorded):
+    r10 = symbol_files(recorded, "R_10")
+    assert [os.path.relpath(p, recorded) for p in r10] == [
+        os.path.join("2023-11-15", "R_10.bin"), os.path.join("2023-11-16", "R_10.bin")]
+    assert os.path.getsize(r10[0]) == 2 * RECORD_SIZE
+
+    assert list(iter_ticks(r10[0])) == [(DAY1 + 10, 6543.21, 2), (DAY1 + 12, 6543.2, 2)]
+    assert list(iter_ticks(r10[1])) == [(DAY2, 6544.0, 2)]
+
+    ticks = open_ticks(symbol_files(recorded, "1HZ100V")[0])
+    assert ticks["quote"].tolist() == [812.046, 0.001]
+    assert ticks["epoch"].tolist() == [DAY1 + 11, DAY2 - 1]
+    assert ticks["pip_size"].tolist() == [3, 3]
+    assert ticks["symbol_id"].tolist() == [1, 1]
+
+
+def test_partial_record_is_ignored(recorded):
+    path = symbol_files(recorded, "R_10")[0]
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (RECORD_SIZE - 3))  # queda no meio da escrita
+    assert len(list(iter_ticks(path))) == 2
+    assert len(open_ticks(path)) == 2
+
+
+def test_replay_interleaves_by_epoch(recorded):
+    msgs = list(replay_messages(recorded, ["R_10", "1HZ100V"]))
+    assert [m["msg_type"] for m in msgs] == ["tick"] * len(TICKS)
+    assert [(m["tick"]["epoch"], m["tick"]["symbol"], m["tick"]["quote"]) for m in msgs] == \
+        [(epoch, symbol, quote) for epoch, symbol, quote, _ in TICKS]
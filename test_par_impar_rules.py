@@ -0,0 +1,135 @@
+"""
+RuleSet: erros de compilação da config, condições run / digit_in / time / confirm / taxas,
+direções e contadores hits/signals por regra.
+
+    python -m pytest -q test_par_impar_rules.py
+"""
+import pytest
+
+from par_impar_rules import RuleSet, default_rules
+from par_impar_stats import ParityStats
+
+
+SYMBOLS = ["R_10", "R_25", "R_50"]
+DAY = 86400 * 19000  # meia-noite UTC
+
+
+def hhmm(h, m=0):
+    return DAY + h * 3600 + m * 60
+
+
+@pytest.mark.parametrize("specs, message", [
+    ([], "rules deve ser uma lista não vazia"),
+    ({"name": "x"}, "rules deve ser uma lista não vazia"),
+    ([{"name": "a", "when": []}], "a: 'when' vazio"),
+    ([{"name": "a", "when": [{"type": "x"}]}], "a: tipo de condição desconhecido: x"),
+    ([{"name": "a", "when": [{"type": "run", "n": 0}]}], "a: run precisa de n >= 1"),
+    ([{"name": "a", "when": [{"type": "run", "n": 2, "parity": "X"}]}], "a: paridade inválida: X"),
+    ([{"name": "a", "when": [{"type": "digit_in", "digits": [3, 10]}]}], "a: digit_in precisa de digits entre 0 e 9"),
+    ([{"name": "a", "when": [{"type": "digit_in"}]}], "a: digit_in precisa de digits entre 0 e 9"),
+    ([{"name": "a", "when": [{"type": "time", "from": "25:00"}]}], "a: horário inválido (HH:MM): 25:00"),
+    ([{"name": "a", "when": [{"type": "time", "to": "8h"}]}], "a: horário inválido (HH:MM): 8h"),
+    ([{"name": "a", "when": [{"type": "par_rate", "window": 50}]}], "a: window deve ser uma de (20, 100, 500)"),
+    ([{"name": "a", "when": [{"type": "confirm", "when": {"type": "confirm"}}]}],
+     "a: confirm precisa de uma condição 'when' (sem confirm aninhado)"),
+    ([{"name": "a", "when": [{"type": "confirm", "when": {"type": "uniform"}, "symbols": ["R_99"]}]}],
+     "a: símbolos desconhecidos em confirm: R_99"),
+    ([{"name": "a", "symbols": ["R_99"], "when": [{"type": "uniform"}]}], "a: símbolos desconhecidos: R_99"),
+    ([{"name": "a", "when": [{"type": "uniform"}], "direction": "X"}], "a: direção inválida: X"),
+    ([{"when": [{"type": "uniform"}]}, {"when": ["uniform"]}], "regra 2: condição inválida: 'uniform'"),
+])
+def test_compile_errors(specs, message):
+    with pytest.raises(ValueError) as exc:
+        RuleSet(specs, SYMBOLS)
+    assert str(exc.value) == message
+
+
+def test_default_rules_follow_trigger_mode():
+    rules = RuleSet(default_rules("REVERSAO"), SYMBOLS)
+    assert rules.names() == ["REVERSAO"]
+    assert rules.evaluate("R_10", 4, "PAR", None, DAY) == "IMPAR"
+    assert rules.evaluate("R_10", 3, None, None, DAY) is None
+    assert rules.evaluate("R_10", None, "PAR", None, DAY) is None  # tick sem dígito não conta
+
+    rules = RuleSet(default_rules("qualquer"), SYMBOLS)
+    assert rules.evaluate("R_10", 3, "IMPAR", None, DAY) == "IMPAR"
+
+
+def test_run_and_digit_in():
+    rules = RuleSet([{"name": "3 pares + 0/5", "direction": "REVERSAO",
+                      "when": [{"type": "run", "n": 3, "parity": "PAR"}, {"type": "digit_in", "digits": [0, 5]}]}],
+                    SYMBOLS)
+    got = [rules.evaluate("R_10", d, None, None, DAY) for d in (2, 4, 0, 6, 0, 1, 2, 4, 0)]
+    # sequência par: 1, 2, 3, 4, 5, quebra, 1, 2, 3 -> casa no 3º e 5º (dígito 0), não no 4º (6)
+    assert got == [None, None, "IMPAR", None, "IMPAR", None, None, None, "IMPAR"]
+
+    # a sequência é por símbolo: R_25 começa do zero
+    assert rules.evaluate("R_25", 0, None, None, DAY) is None
+    assert rules.snapshot() == [{"name": "3 pares + 0/5", "hits": 3, "signals": 3, "ticks": 10}]
+
+
+def test_time_window():
+    day = RuleSet([{"when": [{"type": "time", "from": "08:00", "to": "17:00"}], "direction": "PAR"}], SYMBOLS)
+    night = RuleSet([{"when": [{"type": "time", "from": "22:00", "to": "02:30"}], "direction": "PAR"}], SYMBOLS)
+    cases = [
+        (hhmm(7, 59), None, None),
+        (hhmm(8), "PAR", None),
+        (hhmm(17), "PAR", None),
+        (hhmm(17, 1), None, None),
+        (hhmm(23), None, "PAR"),
+        (hhmm(0, 10) + 86400, None, "PAR"),  # dia seguinte
+        (hhmm(2, 30), None, "PAR"),
+        (hhmm(2, 31), None, None),
+    ]
+    for now, in_day, in_night in cases:
+        assert day.evaluate("R_10", 1, None, None, now) == in_day
+        assert night.evaluate("R_10", 1, None, None, now) == in_night
+
+
+def test_confirm_across_symbols():
+    rules = RuleSet([{"name": "confirmado", "symbols": ["R_10"], "direction": "SEQUENCIA",
+                      "when": [{"type": "uniform"},
+                               {"type": "confirm", "when": {"type": "uniform"}, "within": 2.0, "min": 2}]}],
+                    SYMBOLS)
+    t = float(DAY)
+    assert rules.evaluate("R_25", 2, "PAR", None, t) is None      # R_25 fora de "symbols": só alimenta o confirm
+    assert rules.evaluate("R_10", 2, "PAR", None, t + 0.5) is None  # 1 outro símbolo, precisa de 2
+    assert rules.evaluate("R_50", 7, "IMPAR", None, t + 1.0) is None
+    assert rules.evaluate("R_10", 4, "PAR", None, t + 1.5) == "PAR"
+    # R_25 saiu da janela de 2 s
+    assert rules.evaluate("R_10", 4, "PAR", None, t + 2.6) is None
+    # o próprio símbolo não conta como confirmação
+    assert rules.evaluate("R_50", 5, "IMPAR", None, t + 2.7) is None
+    assert rules.evaluate("R_10", 6, "PAR", None, t + 2.8) is None
+    assert rules.snapshot()[0]["signals"] == 1
+
+
+def test_rate_condition_reads_stats():
+    stats = ParityStats()
+    rules = RuleSet([{"when": [{"type": "par_rate", "window": 20, "min": 60}], "direction": "PAR"}], SYMBOLS)
+    assert rules.evaluate("R_10", 2, None, None, DAY) is None  # sem estatísticas não casa
+    for d in (2, 4, 1):
+        stats.update(d, None)
+    assert rules.evaluate("R_10", 1, None, stats, DAY) == "PAR"   # 2/3 par
+    stats.update(3, None)
+    assert rules.evaluate("R_10", 3, None, stats, DAY) is None    # 2/4 par
+
+
+def test_hit_and_signal_counters():
+    rules = RuleSet([
+        {"name": "uniforme", "when": [{"type": "uniform"}]},
+        {"name": "par fixo", "when": [{"type": "digit_in", "digits": [0, 2, 4, 6, 8]}], "direction": "PAR"},
+        {"name": "só R_25", "symbols": ["R_25"], "when": [{"type": "run", "n": 1}], "direction": "IMPAR"},
+    ], SYMBOLS)
+    assert rules.evaluate("R_10", 2, "PAR", None, DAY) == "PAR"     # casam 1 e 2; sinal é da 1ª
+    assert rules.evaluate("R_10", 4, None, None, DAY) == "PAR"      # só a 2
+    assert rules.evaluate("R_25", 3, None, None, DAY) == "IMPAR"    # só a 3
+    assert rules.evaluate("R_25", 8, "PAR", None, DAY) == "PAR"     # casam as três
+    assert rules.snapshot() == [
+        {"name": "uniforme", "hits": 2, "signals": 2, "ticks": 4},
+        {"name": "par fixo", "hits": 3, "signals": 1, "ticks": 4},
+        {"name": "só R_25", "hits": 2, "signals": 1, "ticks": 4},
+    ]
+
+    rules.reset_counters()
+    assert all(r["hits"] == r["signals"] == r["ticks"] == 0 for r in rules.snapshot())
@@ -0,0 +1,356 @@
+"""
+Scheduler de sinais do TradingEngine sem rede: limites por símbolo/conta, COALESCER x FIFO,
+idade máxima na fila, teto de exposição durante gales, sequência virtual com resultados
+DEMO fora de ordem e forget das cotações pré-cotadas descartadas.
+
+    python -m pytest -q test_par_impar_scheduler.py
+"""
+import asyncio
+import queue
+import time
+
+import pytest
+
+from par_impar_engine import PREQUOTE_TTL, SignalPlan, TradingEngine
+
+
+CONFIG = dict(
+    virtual_mode=False,
+    vwin_target=0,
+    vloss_target=0,
+    trigger_mode="SEQUENCIA",
+    stake=1.0,
+    max_gale=0,
+    mult=2.0,
+    stop_win=0.0,
+)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # diário e métricas vão para o cwd
+    monkeypatch.chdir(tmp_path)
+    e = TradingEngine(queue.Queue())
+    e.running = True
+    yield e
+    e.journal.close()
+
+
+def configure(e, **overrides):
+    e.set_config(**{**CONFIG, **overrides})
+
+
+def capture_plans(e):
+    """
+    Troca a execução por uma que só guarda o plano: os slots ficam ocupados até release().
+    """
+    plans = []
+
+    async def fake_execute(plan):
+        plans.append(plan)
+
+    e._execute_signal = fake_execute
+    return plans
+
+
+def release(e, plan):
+    e._release_slot(plan, plan.base_stake)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def idle(turns=5):
+    # deixa as tasks criadas pelo despacho rodarem até o próximo await delas
+    for _ in range(turns):
+        await asyncio.sleep(0)
+
+
+def test_per_symbol_limit(engine):
+    async def go():
+        configure(engine, max_per_symbol=1, max_per_account=5)
+        plans = capture_plans(engine)
+        engine._submit_signal("R_10", "PAR", 0.0)
+        engine._submit_signal("R_10", "IMPAR", 0.0)
+        await idle()
+        assert [p.symbol for p in plans] == ["R_10"]
+        assert [q[:2] for q in engine._signal_queue] == [("R_10", "IMPAR")]
+
+        # outro símbolo não passa na frente da fila, mas o dreno despacha o que couber
+        engine._submit_signal("R_25", "PAR", 0.0)
+        await idle()
+        assert [p.symbol for p in plans] == ["R_10", "R_25"]
+
+        release(engine, plans[0])
+        await idle()
+        assert [(p.symbol, p.direction) for p in plans[2:]] == [("R_10", "IMPAR")]
+        assert not engine._signal_queue
+    run(go())
+
+
+def test_per_account_limit(engine):
+    async def go():
+        configure(engine, max_per_symbol=1, max_per_account=2)
+        plans = capture_plans(engine)
+        for sym in ("R_10", "R_25", "R_50"):
+            engine._submit_signal(sym, "PAR", 0.0)
+        await idle()
+        assert [p.symbol for p in plans] == ["R_10", "R_25"]
+        assert all(p.account == "REAL" for p in plans)
+        assert engine._open_by_account["REAL"] == 2
+        assert [q[0] for q in engine._signal_queue] == ["R_50"]
+
+        release(engine, plans[1])
+        await idle()
+        assert plans[-1].symbol == "R_50"
+        assert engine._open_by_account["REAL"] == 2
+    run(go())
+
+
+def test_coalescer_keeps_newest_per_symbol(engine):
+    async def go():
+        configure(engine, max_per_account=1, queue_max=5, queue_policy="COALESCER")
+        capture_plans(engine)
+        engine._submit_signal("R_10", "PAR", 0.0)  # ocupa o único slot
+        engine._submit_signal("R_25", "PAR", 0.0)
+        engine._submit_signal("R_50", "PAR", 0.0)
+        engine._submit_signal("R_25", "IMPAR", 0.0)
+        await idle()
+        assert [q[:2] for q in engine._signal_queue] == [("R_50", "PAR"), ("R_25", "IMPAR")]
+        assert engine.signals_coalesced == 1
+        assert engine.signals_dropped == 0
+    run(go())
+
+
+def test_fifo_keeps_order_and_drops_when_full(engine):
+    async def go():
+        configure(engine, max_per_account=1, queue_max=2, queue_policy="FIFO")
+        capture_plans(engine)
+        engine._submit_signal("R_10", "PAR", 0.0)
+        engine._submit_signal("R_25", "PAR", 0.0)
+        engine._submit_signal("R_25", "IMPAR", 0.0)
+        engine._submit_signal("R_50", "PAR", 0.0)
+        await idle()
+        assert [q[:2] for q in engine._signal_queue] == [("R_25", "PAR"), ("R_25", "IMPAR")]
+        assert engine.signals_coalesced == 0
+        assert engine.signals_dropped == 1
+    run(go())
+
+
+def test_queued_signal_older_than_max_age_is_dropped(engine):
+    async def go():
+        configure(engine, max_per_account=1, signal_max_age=0.5)
+        plans = capture_plans(engine)
+        engine._submit_signal("R_10", "PAR", 0.0)
+        engine._submit_signal("R_25", "PAR", 0.0)
+        await idle()
+        symbol, direction, ts, t_tick = engine._signal_queue[0]
+        engine._signal_queue[0] = (symbol, direction, ts - 0.6, t_tick)
+
+        release(engine, plans[0])
+        await idle()
+        assert len(plans) == 1
+        assert not engine._signal_queue
+        assert engine.signals_dropped == 1
+    run(go())
+
+
+def test_exposure_cap_counts_gale_stake(engine):
+    async def go():
+        configure(engine, max_per_symbol=1, max_per_account=5, max_exposure=3.0, max_gale=1, mult=2.0)
+        settle = {}
+
+        async def open_contract(client, plan, stake):
+            return f"{plan.symbol}-{stake:.2f}", None
+
+        async def wait_settlement(client, contract_id):
+            fut = settle[contract_id] = asyncio.get_running_loop().create_future()
+            return await fut, None
+
+        engine._open_contract = open_contract
+        engine._wait_settlement = wait_settlement
+
+        engine._submit_signal("R_10", "PAR", 0.0)
+        await idle()
+        assert engine._open_stake == pytest.approx(1.0)
+
+        # LOSS no stake 1 -> gale com stake 2: a exposição aberta passa a ser 2
+        settle.pop("R_10-1.00").set_result({"status": "lost", "profit": -1.0})
+        await idle()
+        assert "R_10-2.00" in settle
+        assert engine._open_stake == pytest.approx(2.0)
+
+        engine._submit_signal("R_25", "PAR", 0.0)  # 2 + 1 = 3 cabe
+        engine._submit_signal("R_50", "PAR", 0.0)  # 3 + 1 = 4 não cabe
+        await idle()
+        assert engine._open_stake == pytest.approx(3.0)
+        assert [q[0] for q in engine._signal_queue] == ["R_50"]
+
+        # o fim do gale libera o stake 2 inteiro e o R_50 sai da fila
+        settle.pop("R_10-2.00").set_result({"status": "won", "profit": 1.9})
+        await idle()
+        assert not engine._signal_queue
+        assert engine._open_stake == pytest.approx(2.0)
+        assert "R_50-1.00" in settle
+
+        for key in list(settle):
+            settle.pop(key).set_result({"status": "won", "profit": 0.95})
+        await idle()
+        assert engine._open_stake == pytest.approx(0.0)
+        assert sum(engine._open_by_account.values()) == 0
+    run(go())
+
+
+def test_virtual_streak_applies_demo_results_in_dispatch_order(engine):
+    configure(engine, virtual_mode=True, vwin_target=2)
+
+    def plan(seq):
+        return SignalPlan(symbol="R_10", direction="PAR", account="DEMO", base_stake=1.0, max_gale=0, mult=2.0, seq=seq)
+
+    engine._dispatch_seq = 3
+    # despachados 0, 1, 2 = WIN, LOSS, WIN; chegam 0, 2, 1
+    engine._record_virtual_result(plan(0), "WIN")
+    assert engine.vwin_streak == 1
+    engine._record_virtual_result(plan(2), "WIN")
+    assert engine.vwin_streak == 1  # o 2 espera o 1
+    assert not engine._armed_real_next
+    engine._record_virtual_result(plan(1), "LOSS")
+    assert (engine.vwin_streak, engine.vloss_streak) == (1, 0)
+    assert not engine._armed_real_next
+    assert engine._vnext == 3 and not engine._vresults
+
+
+def test_virtual_streak_arms_real_after_late_result(engine):
+    configure(engine, virtual_mode=True, vwin_target=2)
+
+    def plan(seq):
+        return SignalPlan(symbol="R_25", direction="IMPAR", account="DEMO", base_stake=1.0, max_gale=0, mult=2.0, seq=seq)
+
+    engine._record_virtual_result(plan(1), "WIN")
+    assert not engine._armed_real_next
+    engine._record_virtual_result(plan(0), "WIN")
+    assert engine.vwin_streak == 2
+    assert engine._armed_real_next
+    assert engine._next_account() == "REAL"
+
+
+def test_exposure_cap_blocks_gale_step(engine):
+    async def go():
+        configure(engine, max_per_symbol=1, max_per_account=5, max_exposure=3.0, max_gale=2, mult=2.0)
+        settle = {}
+
+        async def open_contract(client, plan, stake):
+            return f"{plan.symbol}-{stake:.2f}", None
+
+        async def wait_settlement(client, contract_id):
+            fut = settle[contract_id] = asyncio.get_running_loop().create_future()
+            return await fut, None
+
+        engine._open_contract = open_contract
+        engine._wait_settlement = wait_settlement
+        finals = []
+        record = engine._record_virtual_result
+        engine._record_virtual_result = lambda plan, status: (finals.append((plan.symbol, status)), record(plan, status))
+
+        engine._submit_signal("R_10", "PAR", 0.0)
+        engine._submit_signal("R_25", "PAR", 0.0)
+        await idle()
+        assert engine._open_stake == pytest.approx(2.0)
+
+        # R_10 perde: gale 2 -> aberto 1 + 2 = 3, no teto
+        settle.pop("R_10-1.00").set_result({"status": "lost", "profit": -1.0})
+        await idle()
+        assert "R_10-2.00" in settle
+        assert engine._open_stake == pytest.approx(3.0)
+
+        # R_25 perde: gale 2 daria 2 + 2 = 4 > 3 -> sequência para sem comprar
+        settle.pop("R_25-1.00").set_result({"status": "lost", "profit": -1.0})
+        await idle()
+        assert "R_25-2.00" not in settle
+        assert finals == [("R_25", "STOP")]
+        assert engine._open_stake == pytest.approx(2.0)
+
+        # R_10 perde de novo: gale 4 daria 4 > 3 mesmo sozinho
+        settle.pop("R_10-2.00").set_result({"status": "lost", "profit": -2.0})
+        await idle()
+        assert not settle
+        assert finals == [("R_25", "STOP"), ("R_10", "STOP")]
+        assert engine._open_stake == pytest.approx(0.0)
+
+        logs = []
+        while not engine.ui_queue.empty():
+            item = engine.ui_queue.get_nowait()
+            if item[0] == "log_general":
+                logs.append(item[1])
+        assert sum("GALE bloqueado por exposição" in line for line in logs) == 2
+    run(go())
+
+
+def fake_quotes(e):
+    """
+    Proposal falsa com subscription; os forget enviados ficam em `forgets`.
+    """
+    forgets = []
+
+    async def quote(client, symbol, direction, stake):
+        return {"id": f"p-{symbol}-{stake:.2f}", "subscription_id": f"s-{symbol}-{stake:.2f}",
+                "expires_at": time.time() + PREQUOTE_TTL}, None
+
+    async def send_quiet(client, payload):
+        forgets.append(payload["forget"])
+
+    e._quote = quote
+    e._send_quiet = send_quiet
+    return forgets
+
+
+def test_expired_prequote_is_forgotten(engine):
+    async def go():
+        configure(engine)
+        forgets = fake_quotes(engine)
+        plan = SignalPlan(symbol="R_10", direction="PAR", account="REAL", base_stake=1.0, max_gale=1, mult=2.0, seq=0)
+        engine._start_prequote(engine.real, plan, 2.0)
+        await idle()
+        quote = engine._prequotes[("REAL", "R_10", "PAR", 2.0)][0].result()
+        quote["expires_at"] = time.time() - 0.1
+        assert await engine._take_prequote("REAL", "R_10", "PAR", 2.0) is None
+        await idle()
+        assert forgets == ["s-R_10-2.00"]
+
+        # dentro do prazo o id vai para quem pegou (o forget fica com ele, depois do buy)
+        engine._start_prequote(engine.real, plan, 2.0)
+        await idle()
+        assert (await engine._take_prequote("REAL", "R_10", "PAR", 2.0))["id"] == "p-R_10-2.00"
+        assert not engine._prequotes
+        assert forgets == ["s-R_10-2.00"]
+    run(go())
+
+
+def test_unused_gale_prequote_is_forgotten_when_sequence_ends(engine):
+    async def go():
+        configure(engine, max_gale=1, mult=2.0)
+        engine.exec_mode = "PROPOSTA"
+        forgets = fake_quotes(engine)
+        settle = {}
+
+        async def open_contract(client, plan, stake):
+            return f"{plan.symbol}-{stake:.2f}", None
+
+        async def wait_settlement(client, contract_id):
+            fut = settle[contract_id] = asyncio.get_running_loop().create_future()
+            return await fut, None
+
+        engine._open_contract = open_contract
+        engine._wait_settlement = wait_settlement
+
+        engine._submit_signal("R_10", "PAR", 0.0)
+        await idle()
+        assert ("REAL", "R_10", "PAR", 2.0) in engine._prequotes
+
+        # WIN no primeiro passo: a cotação do gale não será usada
+        settle.pop("R_10-1.00").set_result({"status": "won", "profit": 0.95})
+        await idle()
+        assert not engine._prequotes
+        assert forgets == ["s-R_10-2.00"]
+    run(go())
@@ -0,0 +1,120 @@
+"""
+Ring de ticks em memória compartilhada: ida e volta dos campos, leitor atrasado (overrun),
+slot sendo reescrito durante a leitura (seqlock) e leitor em outro processo pelo nome.
+
+    python -m pytest -q test_par_impar_shm.py
+"""
+import multiprocessing
+import os
+import uuid
+
+import pytest
+
+from par_impar_shm import SLOT_SEQ, SLOT_SIZE, TickRing, TickRingReader
+
+
+SYMBOLS = ["R_10", "R_25", "1HZ100V"]
+
+
+@pytest.fixture
+def ring():
+    r = TickRing(SYMBOLS, name=f"pitk_test_{uuid.uuid4().hex[:12]}", capacity=8)
+    yield r
+    r.close()
+
+
+def test_roundtrip(ring):
+    reader = TickRingReader(ring.name)
+    try:
+        assert reader.symbols == SYMBOLS
+        assert reader.capacity == 8
+        ring.publish("R_10", 1700000000, 6543.21, 1, "IMPAR", 2)
+        ring.publish("1HZ100V", 1700000001, 812.046, 6, None, 3)
+        ring.publish("R_25", None, 1.5, None, "PAR", None)
+        ring.publish("DESCONHECIDO", 1700000002, 1.0, 0, None, 2)  # ignorado, não consome seq
+
+        assert reader.poll() == [
+            (1, "R_10", 1700000000, 6543.21, 1, "IMPAR", 2),
+            (2, "1HZ100V", 1700000001, 812.046, 6, None, 3),
+            (3, "R_25", 0, 1.5, None, "PAR", None),
+        ]
+        assert reader.poll() == []
+        assert reader.lost == 0 and reader.head() == 3
+    finally:
+        reader.close()
+
+
+def test_reader_overrun_skips_to_oldest_valid(ring):
+    late = TickRingReader(ring.name)
+    try:
+        for i in range(20):
+            ring.publish("R_10", i, float(i), i % 10, None, 2)
+
+        # 20 publicados num ring de 8: os 12 primeiros já foram sobrescritos
+        got = late.poll()
+        assert [t[0] for t in got] == list(range(13, 21))
+        assert [t[3] for t in got] == [float(i) for i in range(12, 20)]
+        assert late.lost == 12
+
+        fresh = TickRingReader(ring.name, from_start=True)
+        try:
+            assert [t[0] for t in fresh.poll(max_items=3)] == [13, 14, 15]
+            assert [t[0] for t in fresh.poll()] == [16, 17, 18, 19, 20]
+            assert fresh.lost == 0
+        finally:
+            fresh.close()
+    finally:
+        late.close()
+
+
+def test_slot_being_rewritten_is_counted_as_lost(ring):
+    reader = TickRingReader(ring.name)
+    try:
+        for i in range(3):
+            ring.publish("R_25", i, float(i), i, None, 2)
+        # escritor no meio do slot do tick 2 (seq zerado antes de gravar os campos)
+        SLOT_SEQ.pack_into(ring.shm.buf, ring._slots + 1 * SLOT_SIZE, 0)
+        assert [t[0] for t in reader.poll()] == [1, 3]
+        assert reader.lost == 1
+
+        # slot do tick 4 já lapado pelo 12: seq diferente do esperado também é perda
+        reader.next_seq = 4
+        for i in range(3, 8):
+            ring.publish("R_25", i, float(i), i, None, 2)
+        SLOT_SEQ.pack_into(ring.shm.buf, ring._slots + 3 * SLOT_SIZE, 12)
+        assert [t[0] for t in reader.poll()] == [5, 6, 7, 8]
+        assert reader.lost == 2
+    finally:
+        reader.close()
+
+
+def _read_in_child(name, out):
+    reader = TickRingReader(name, from_start=True)
+    try:
+        out.put((reader.writer_pid(), reader.poll()))
+    finally:
+        reader.close()
+
+
+def test_attach_by_name_from_another_process(ring):
+    for i in range(3):
+        ring.publish(SYMBOLS[i], 1700000000 + i, 100.0 + i, i, "PAR", 2)
+
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    child = ctx.Process(target=_read_in_child, args=(ring.name, out))
+    child.start()
+    writer_pid, ticks = out.get(timeout=30)
+    child.join(timeout=30)
+    assert child.exitcode == 0
+
+    assert writer_pid == os.getpid()
+    assert [(t[0], t[1], t[3]) for t in ticks] == [(1, "R_10", 100.0), (2, "R_25", 101.0), (3, "1HZ100V", 102.0)]
+
+    # o leitor que saiu não pode ter apagado o segmento do escritor
+    ring.publish("R_10", 1700000003, 103.0, 3, None, 2)
+    reader = TickRingReader(ring.name, from_start=True)
+    try:
+        assert reader.head() == 4
+    finally:
+        reader.close()
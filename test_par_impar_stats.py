@@ -0,0 +1,82 @@
+"""
+ParityStats contra contagem por força bruta: janelas deslizantes a cada tick (passando várias
+vezes pela volta do ring de bytes), sequências de paridade e reset.
+
+    python -m pytest -q test_par_impar_stats.py
+"""
+import random
+
+import pytest
+
+from par_impar_stats import STATS_WINDOWS, ParityStats, SignalOutcomes
+
+
+def brute_rates(history, w):
+    tail = history[-w:]
+    if not tail:
+        return 0.0, 0.0
+    even = sum(1 for digit, _ in tail if digit % 2 == 0)
+    uniform = sum(1 for _, u in tail if u is not None)
+    return even / len(tail), uniform / len(tail)
+
+
+def brute_runs(history):
+    parities = [digit % 2 for digit, _ in history]
+    run = max_run = 0
+    for i, p in enumerate(parities):
+        run = run + 1 if i and p == parities[i - 1] else 1
+        max_run = max(max_run, run)
+    return run, max_run
+
+
+@pytest.mark.parametrize("windows", [STATS_WINDOWS, (7, 3), (1, 5)])
+def test_windows_match_brute_force(windows):
+    rng = random.Random(1234)
+    stats = ParityStats(windows)
+    history = []
+    # 3.4 voltas no ring de 500 (e muito mais nos menores)
+    for _ in range(max(windows) * 3 + 200):
+        if rng.random() < 0.02:
+            stats.update(None, None)  # tick sem dígito não entra na janela
+            continue
+        digit = rng.randrange(10)
+        uniform = rng.choice((None, None, None, "PAR", "IMPAR"))
+        stats.update(digit, uniform)
+        history.append((digit, uniform))
+
+        for w in windows:
+            even, unif = brute_rates(history, w)
+            assert stats.even_rate(w) == pytest.approx(even)
+            assert stats.uniform_rate(w) == pytest.approx(unif)
+        assert (stats.run_len, stats.max_run) == brute_runs(history)
+
+    assert stats.n == len(history)
+    assert stats.run_parity == ("PAR" if history[-1][0] % 2 == 0 else "IMPAR")
+
+
+def test_long_runs_and_reset():
+    stats = ParityStats((3,))
+    for digit in (2, 4, 6, 8, 0, 1, 3):
+        stats.update(digit, None)
+    assert (stats.run_parity, stats.run_len, stats.max_run) == ("IMPAR", 2, 5)
+    assert stats.even_rate(3) == pytest.approx(1 / 3)
+
+    stats.reset()
+    assert stats.snapshot() == {"n": 0, "even": {3: 0.0}, "uniform": {3: 0.0},
+                                "run_parity": None, "run_len": 0, "max_run": 0}
+    # depois do reset o ring antigo não vaza para a janela
+    stats.update(1, "IMPAR")
+    assert stats.even_rate(3) == 0.0
+    assert stats.uniform_rate(3) == 1.0
+
+
+def test_signal_outcomes_window():
+    rng = random.Random(99)
+    out = SignalOutcomes(size=50)
+    assert out.win_rate() is None
+    results = [rng.random() < 0.6 for _ in range(173)]
+    for i, win in enumerate(results, 1):
+        out.record(win)
+        tail = results[max(0, i - 50):i]
+        assert out.win_rate() == pytest.approx(sum(tail) / len(tail))
+    assert (out.wins, out.losses) == (sum(results), len(results) - sum(results))